@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends, status, Body
 from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
-from app.database.database import get_database
+from app.database.database import get_database, get_async_database, AnySession
 from app.schemas.user_auth import UserAuthCreate
 from app.services.user import UserService
 from app.services.oauth2 import OAuth2Service
@@ -12,9 +12,9 @@ import secrets
 router = APIRouter(prefix="/api/v1/auth", tags=["auth"])
 
 @router.post("/session", response_model = Token)
-def login_endpoint(login_data: UserAuthCreate, db: Session = Depends(get_database)):
+async def login_endpoint(login_data: UserAuthCreate, db: AnySession = Depends(get_async_database)):
     try: 
-        return UserService.authenticate_user(db, login_data)
+        return await UserService.authenticate_user_async(db, login_data)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -1,16 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import List
-from datetime import date
+from datetime import date, timedelta
 from app.database.database import get_database
-from app.utils.jwt import get_current_user
+from app.utils.jwt import get_current_user, get_current_user_claims
 from app.services.dependant import DependentService
 from app.schemas.dependent import DependentCreateRequest
 from app.schemas.user import User as UserSchema
 from app.schemas.plan import PlanResponse
 from pydantic import BaseModel
-from app.crud.care_relation import get_dependents_by_carer_id
-from app.crud.plans import get_plan_with_meals_by_user_id_and_date
+from app.crud.plans import get_dependents_daily_progress, get_dependents_progress_range
+from app.crud.daily_adherence import ADHERENCE_ROLLUP_ENABLED, get_dependents_adherence_rollup
+
+SUMMARY_RANGE_MAX_DAYS = 93
 
 router = APIRouter(
     prefix="/api/v1/dependents",
@@ -28,6 +30,18 @@ class DependentStatus(BaseModel):
     meds_taken: int
     meds_total: int
 
+class DependentDayStatus(DependentStatus):
+    day: date
+
+def _plan_status(row) -> str:
+    if row.plan_id is None:
+        return "No Plan"
+    if row.meals_total == 0 and row.meds_total == 0:
+        return "Empty"
+    if row.meals_done == row.meals_total and row.meds_taken == row.meds_total:
+        return "Completed"
+    return "In Progress"
+
 @router.post("/create", response_model=UserSchema, status_code=status.HTTP_201_CREATED)
 async def create_dependent_account(
     request: DependentCreateRequest,
@@ -55,7 +69,7 @@ async def create_dependent_account(
 @router.get("/my", response_model=List[UserSchema])
 async def get_my_dependents(
     db: Session = Depends(get_database),
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user_claims)
 ):
     service = DependentService(db)
     dependents = service.get_my_dependents(carer_id=current_user.id)
@@ -66,7 +80,7 @@ async def get_dependent_plan_by_date(
     dependent_id: int,
     date_str: date,
     db: Session = Depends(get_database),
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user_claims)
 ):
     service = DependentService(db)
     
@@ -93,40 +107,60 @@ async def generate_dependent_plan(
 @router.get("/dashboard-summary", response_model=List[DependentStatus])
 def get_dependents_summary(
     db: Session = Depends(get_database),
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user_claims)
 ):
-    dependents = get_dependents_by_carer_id(db, current_user.id)
-    summary = []
-    today = date.today()
-
-    for dep in dependents:
-        plan = get_plan_with_meals_by_user_id_and_date(db, dep.id, today)
-        status_data = {
-            "id": dep.id,
-            "name": dep.name,
-            "surname": dep.surname,
-            "meals_done": 0,
-            "meals_total": 0,
-            "meds_taken": 0,
-            "meds_total": 0,
-            "plan_status": "No Plan"
+    return [
+        {
+            "id": row.id,
+            "name": row.name,
+            "surname": row.surname,
+            "meals_done": row.meals_done,
+            "meals_total": row.meals_total,
+            "meds_taken": row.meds_taken,
+            "meds_total": row.meds_total,
+            "plan_status": _plan_status(row)
         }
-        if plan:
-            meals = plan.meals
-            status_data["meals_total"] = len(meals)
-            status_data["meals_done"] = sum(1 for m in meals if m.eaten)
-            
-            meds = plan.medications
-            status_data["meds_total"] = len(meds)
-            status_data["meds_taken"] = sum(1 for m in meds if m.taken)
-            
-            if status_data["meals_total"] == 0 and status_data["meds_total"] == 0:
-                status_data["plan_status"] = "Empty"
-            elif (status_data["meals_done"] == status_data["meals_total"] and 
-                  status_data["meds_taken"] == status_data["meds_total"]):
-                status_data["plan_status"] = "Completed"
-            else:
-                status_data["plan_status"] = "In Progress"
-        summary.append(status_data)
+        for row in get_dependents_daily_progress(db, current_user.id, date.today())
+    ]
 
-    return summary
\ No newline at end of file
+@router.get("/dashboard-summary/range", response_model=List[DependentDayStatus])
+def get_dependents_summary_range(
+    start: date,
+    end: date,
+    db: Session = Depends(get_database),
+    current_user: dict = Depends(get_current_user_claims)
+):
+    days = (end - start).days + 1
+    if days < 1 or days > SUMMARY_RANGE_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range must cover 1 to {SUMMARY_RANGE_MAX_DAYS} days"
+        )
+    if ADHERENCE_ROLLUP_ENABLED:
+        rows = get_dependents_adherence_rollup(db, current_user.id, start, end)
+    else:
+        rows = get_dependents_progress_range(db, current_user.id, start, end)
+
+    # Rows only exist for days with a plan, fill the rest of the grid as "No Plan".
+    dependents, progress = {}, {}
+    for row in rows:
+        dependents.setdefault(row.id, row)
+        if row.day is not None:
+            progress[(row.id, row.day)] = row
+    summary = []
+    for dependent in dependents.values():
+        for offset in range(days):
+            day = start + timedelta(days=offset)
+            row = progress.get((dependent.id, day))
+            summary.append({
+                "id": dependent.id,
+                "name": dependent.name,
+                "surname": dependent.surname,
+                "day": day,
+                "meals_done": row.meals_done if row else 0,
+                "meals_total": row.meals_total if row else 0,
+                "meds_taken": row.meds_taken if row else 0,
+                "meds_total": row.meds_total if row else 0,
+                "plan_status": _plan_status(row) if row else "No Plan"
+            })
+    return summary
@@ -3,7 +3,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.database.database import get_database
 from app.services.health_form import HealthFormService
-from app.utils.jwt import get_current_user
+from app.utils.jwt import get_current_user, get_current_user_claims
 from app.services.calculator import CalculatorService
 from app.schemas.health_form import CalorieTargetResponse
 from app.crud.care_relation import check_relation
@@ -24,7 +24,7 @@ router = APIRouter(prefix="/api/v1/health-form",tags=["health-form"])
 @router.get("/{user_id}")
 def get_user_form(user_id: int,
                   db: Session = Depends(get_database), 
-                  currenct_user: dict = Depends(get_current_user),):
+                  currenct_user: dict = Depends(get_current_user_claims),):
     check_user_carrer_relation(db=db, carrer_id=currenct_user.id, patient_id=user_id)
     form = HealthFormService(db)
     if not form:
@@ -52,7 +52,7 @@ def upsert_health_form(user_id: int,
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/me/calories", response_model=CalorieTargetResponse)
-def count_calories(db: Session = Depends(get_database), user: dict = Depends(get_current_user)):
+def count_calories(db: Session = Depends(get_database), user: dict = Depends(get_current_user_claims)):
     health_form = HealthFormService(db)
     user_health_form = health_form.get_health_form(user_id=user.id)
     
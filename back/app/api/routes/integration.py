@@ -7,10 +7,12 @@ from app.database.database import get_database
 from app.services.google_calendar import GoogleCalendarService
 from app.services.plan import PlanCreationService
 from app.crud.oauth2 import create_oauth2_account, get_oauth2_account_by_id
-from app.utils.jwt import get_current_user 
+from app.utils.jwt import get_current_user, get_current_user_claims
 from app.models.oauth2 import OAuth2Account
 from app.crud.care_relation import check_relation
 from app.crud.user import get_user_info_by_id
+from app.services.jobs import job_runner
+from app.schemas.job import JobResponse
 
 router = APIRouter(prefix="/api/v1/integrations", tags=["Integrations"])
 
@@ -79,8 +81,36 @@ async def sync_calendar(
     
     return {"message": f"Plan for {target_date} synced to Google Calendar!"}
 
+@router.post("/google/sync/job", response_model=JobResponse, status_code=202)
+def enqueue_calendar_sync(
+    payload: dict = Body(...),
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_database)
+):
+    date_str = payload.get("plan_date")
+    dependent_id = payload.get("dependent_id")
+    target_date = date.fromisoformat(date_str) if date_str else date.today()
+    target_user_id = current_user.id
+    owner_name = None
+    if dependent_id:
+        if not check_relation(db, carer_id=current_user.id, patient_id=dependent_id):
+            raise HTTPException(status_code=403, detail="Nie masz uprawnień do tego podopiecznego")
+        target_user_id = dependent_id
+        dependent_user = get_user_info_by_id(db, dependent_id)
+        if dependent_user:
+            owner_name = f"{dependent_user.name} {dependent_user.surname}"
+
+    job_payload = {
+        "user_id": current_user.id,
+        "target_user_id": target_user_id,
+        "plan_date": target_date.isoformat(),
+        "owner_name": owner_name
+    }
+    return job_runner.enqueue(db, "calendar_sync", job_payload, created_by_id=current_user.id,
+                              lock_key=f"calendar_sync:{target_user_id}:{target_date.isoformat()}")
+
 @router.get("/google/status")
-def get_google_status(current_user = Depends(get_current_user), db: Session = Depends(get_database)):
+def get_google_status(current_user = Depends(get_current_user_claims), db: Session = Depends(get_database)):
     creds = get_oauth2_account_by_id(db, provider="google_calendar", provider_id="calendar")    
     account = db.query(OAuth2Account).filter(
         OAuth2Account.user_id == current_user.id,
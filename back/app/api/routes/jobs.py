@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from app.database.database import get_database
+from app.utils.jwt import get_current_user, get_current_user_claims, is_admin
+from app.crud.job import get_job
+from app.schemas.job import JobResponse
+from app.services.jobs import job_runner
+
+router = APIRouter(prefix="/api/v1/jobs", tags=["Jobs"])
+
+# Jobs that are not tied to one user. Only admins may start them and follow them.
+SHARED_JOB_KINDS = {"rpl_update", "adherence_backfill"}
+
+def _get_visible_job(db: Session, job_id: int, user):
+    job = get_job(db, job_id)
+    if not job or (job.created_by_id != user.id and not (job.kind in SHARED_JOB_KINDS and is_admin(user))):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+@router.get("/{job_id}", response_model=JobResponse)
+def get_job_status(job_id: int, db: Session = Depends(get_database), current_user = Depends(get_current_user_claims)):
+    return _get_visible_job(db, job_id, current_user)
+
+@router.delete("/{job_id}", response_model=JobResponse)
+def cancel_job(job_id: int, db: Session = Depends(get_database),
+               claims = Depends(get_current_user_claims), current_user = Depends(get_current_user)):
+    job = _get_visible_job(db, job_id, claims)
+    if job.created_by_id != current_user.id or (job.kind in SHARED_JOB_KINDS and not is_admin(claims)):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only the creator can cancel this job")
+    return job_runner.cancel(db, job)
@@ -1,34 +1,65 @@
 import httpx
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from app.database.database import get_database
-from app.utils.jwt import get_current_user
-from app.services.plan import PlanCreationService
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.database import get_database, get_async_database
+from app.utils.jwt import get_current_user, get_current_user_claims
+from app.services.plan import PlanCreationService, PLAN_MAX_RANGE_DAYS
+from app.services.jobs import job_runner
+from app.services.notification_dispatcher import notification_dispatcher
+from app.schemas.job import JobResponse
 from app.schemas.plan import PlanResponse, MealResponse, ManualMealAddRequest, MealStatusUpdate, MealUpdate
 from app.schemas.spoonacular import ComplexSearchResponse
 from app.schemas.shopping_list import ShoppingListResponse, ShoppingListGenerateRequest
-from app.crud.care_relation import get_carer_by_patient_id, check_relation
-from app.crud.notification import create_new_notification
-from app.schemas.notification import NotificationCreate
+from app.crud.care_relation import check_relation, check_relation_async
 from app.crud.meals import get_meal_by_id, change_meal_status, change_meal_time_or_type
 import logging
 from datetime import date
+from typing import List, Optional, Union
 from app.models.shopping_list import ShoppingList
 
 router = APIRouter(prefix="/api/v1/meals", tags=["meals"])
 
-@router.post("/generate", response_model=PlanResponse)
+PLAN_RANGE_DAYS = {"day": 1, "week": 7}
+
+@router.post("/generate", response_model=Union[PlanResponse, List[PlanResponse]])
 async def generate_plan(db: Session = Depends(get_database), 
                         user: Session = Depends(get_current_user),
                         range: str = "day",
-                        plan_date: date = Query(default_factory=date.today)):
-    if range != "day":
-         raise HTTPException(
-            status_code=status.HTTP_501_NOT_IMPLEMENTED,
-            detail="In progress..."
+                        plan_date: date = Query(default_factory=date.today),
+                        days: Optional[int] = Query(default=None, ge=1)):
+    if range == "custom":
+        if days is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Parameter 'days' is required for a custom range"
+            )
+        range_days = days
+    elif range in PLAN_RANGE_DAYS:
+        range_days = PLAN_RANGE_DAYS[range]
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported range '{range}', use day, week or custom"
         )
 
     plan_service = PlanCreationService(db)
+
+    if range != "day":
+        try:
+            return await plan_service.generate_and_save_plans(
+                created_by_id=user.id,
+                user_id=user.id,
+                start_date=plan_date,
+                days=range_days
+            )
+        except HTTPException:
+            raise
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
     
     try:
         new_plan = await plan_service.generate_and_save_plan(
@@ -49,12 +80,21 @@ async def generate_plan(db: Session = Depends(get_database),
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail=f"Error: {e}"
         )
+
+@router.post("/generate/job", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+def enqueue_plan_generation(db: Session = Depends(get_database),
+                            user: Session = Depends(get_current_user),
+                            plan_date: date = Query(default_factory=date.today),
+                            days: int = Query(default=PLAN_RANGE_DAYS["week"], ge=1, le=PLAN_MAX_RANGE_DAYS)):
+    payload = {"created_by_id": user.id, "user_id": user.id, "start_date": plan_date.isoformat(), "days": days}
+    return job_runner.enqueue(db, "plan_generation", payload, created_by_id=user.id,
+                              lock_key=f"plan_generation:{user.id}")
     
 @router.get('/date/{date_str}', response_model=PlanResponse) 
 async def get_plan_by_specific_date(
     date_str: date,
     db: Session = Depends(get_database),
-    user: Session = Depends(get_current_user)
+    user: Session = Depends(get_current_user_claims)
 ):
     plan_service = PlanCreationService(db)
     logging.info(f"Fetching plan for user_id={user.id}, date={date_str}")
@@ -93,8 +133,8 @@ async def add_meal_to_plan_manually(
 @router.patch("/{meal_id}", response_model=MealResponse)
 async def meal_status_update(meal_id: int, updated_data: MealStatusUpdate,  
                              current_user: dict = Depends(get_current_user), 
-                             db: Session = Depends(get_database)):
-    db_meal = get_meal_by_id(db, meal_id)
+                             db: AsyncSession = Depends(get_async_database)):
+    db_meal = await get_meal_by_id(db, meal_id)
     
     if not db_meal:
         raise HTTPException(
@@ -104,36 +144,25 @@ async def meal_status_update(meal_id: int, updated_data: MealStatusUpdate,
     is_owner = db_meal.plan.user_id == current_user.id 
     is_carer = False
     if not is_owner:
-        is_carer = check_relation(db=db, carer_id=current_user.id, patient_id=db_meal.plan.user_id)
+        is_carer = await check_relation_async(db=db, carer_id=current_user.id, patient_id=db_meal.plan.user_id)
         if not is_carer and not is_owner:  
             raise HTTPException(
                 status_code=403,
                 detail="You are not autherized to update this meal"
             )
-    updated_meal = change_meal_status(
+    updated_meal = await change_meal_status(
         db=db, 
         meal_id=meal_id, 
         updated_data=updated_data
     )
     if is_owner:
-        try:
-            carrer = get_carer_by_patient_id(db=db, patient_id=current_user.id)
-            if carrer:
-                meal_status_text = "eaten" if updated_data.eaten else "marked as not eaten"
-                patient_name = current_user.name
-                desc_preview = db_meal.description.split('.')[0] if db_meal.description else "Meal"
-                message = f"{patient_name} {meal_status_text} '{desc_preview}'."
-                if updated_data.comment:
-                    message += f" Comment: \"{updated_data.comment}\""
-                notification_data = NotificationCreate(
-                        user_id = carrer.id,
-                        related_user_id=current_user.id,
-                        type= "meal_status_update",
-                        message=message
-                    )
-                create_new_notification(db, notification_data)
-        except Exception as e:
-            logging.error(f"Failed to create notification for carrer")
+        # The carer is told by the dispatcher, which batches and coalesces these.
+        meal_status_text = "eaten" if updated_data.eaten else "marked as not eaten"
+        desc_preview = db_meal.description.split('.')[0] if db_meal.description else "Meal"
+        text = f"{meal_status_text} '{desc_preview}'."
+        if updated_data.comment:
+            text += f" Comment: \"{updated_data.comment}\""
+        notification_dispatcher.dispatch(current_user.id, "meal_status_update", meal_id, text)
             
     return updated_meal
 
@@ -148,7 +177,7 @@ async def generate_shopping_list(
 
 @router.get("/shopping-list/latest", response_model=ShoppingListResponse)
 def get_latest_shopping_list(
-    current_user = Depends(get_current_user),
+    current_user = Depends(get_current_user_claims),
     db: Session = Depends(get_database)
 ):
     latest_list = db.query(ShoppingList).filter(
@@ -177,25 +206,25 @@ async def edit_meal_details(
     meal_id: int,
     new_data: MealUpdate,
     user: dict = Depends(get_current_user),
-    db: Session = Depends(get_database)
+    db: AsyncSession = Depends(get_async_database)
 ):
-    meal = get_meal_by_id(db=db, meal_id=meal_id)
+    meal = await get_meal_by_id(db=db, meal_id=meal_id)
     if not meal:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Meal not found")
     is_owner = meal.plan.user_id == user.id
     is_carer = False
     if not is_owner:
-        is_carer = check_relation(db=db, carer_id=user.id, patient_id= meal.plan.user_id)
+        is_carer = await check_relation_async(db=db, carer_id=user.id, patient_id= meal.plan.user_id)
     if not is_owner and not is_carer:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="You can't update this meal")
-    updated_data = change_meal_time_or_type(db, meal_id, new_data)
+    updated_data = await change_meal_time_or_type(db, meal_id, new_data)
     return updated_data
 
 @router.get("/search", response_model=ComplexSearchResponse)
 async def search_new_recipes_with_user_preferences(
     query:str, 
     db: Session = Depends(get_database),
-    user: dict = Depends(get_current_user)
+    user: dict = Depends(get_current_user_claims)
 ):
     service = PlanCreationService(db)
     try:
@@ -214,7 +243,7 @@ async def replace_meal_in_plan(
     db: Session = Depends(get_database)
     ):
     service = PlanCreationService(db)
-    db_meal = get_meal_by_id(db, meal_id=meal_id)
+    db_meal = await get_meal_by_id(db, meal_id=meal_id)
     is_owner = db_meal.plan.user_id == user.id
     is_carer = False
     if not is_owner:
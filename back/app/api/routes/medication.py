@@ -1,22 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from app.utils.jwt import get_current_user
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.utils.jwt import get_current_user, get_current_admin
 from app.crud.medication import *
-from app.crud.care_relation import check_relation
-from app.database.database import get_database
+from app.crud.care_relation import check_relation, check_relation_async
+from app.database.database import get_database, get_async_database
 from app.schemas.medication import (MedicationCreate, MedicationListResponse,
                                     DrugValidationRequest, DrugValidationResponse,
                                     MedicationResponse, MedicationStatusUpdate,
                                     MedicationDashboardUpdate)
 from app.services.medication_service import MedicationService
 from app.services.notification import NotificationService
-from app.schemas.notification import NotificationCreate
-from app.crud.care_relation import get_carer_by_patient_id
-from app.crud.notification import create_new_notification
-from app.schemas.medication import RplDownloadStats
-from app.services.rpl_service import RPLService 
-from typing import List
-import logging
+from app.services.jobs import job_runner
+from app.services.notification_dispatcher import notification_dispatcher
+from app.schemas.job import JobResponse
+from typing import List, Literal
 
 router = APIRouter(prefix="/api/v1/medications", tags=["medications"])
 
@@ -63,11 +61,11 @@ async def add_medications_to_plan(
 async def edit_medication_details(
     medication_id: int,
     medication_data: MedicationDashboardUpdate,
-    db: Session = Depends(get_database),
+    db: AsyncSession = Depends(get_async_database),
     current_user: dict = Depends(get_current_user)
 ):
 
-    db_med = get_medication_by_id(db, medication_id)
+    db_med = await get_medication_by_id(db, medication_id)
 
     if not db_med:
         raise HTTPException(
@@ -77,14 +75,14 @@ async def edit_medication_details(
     is_owner = db_med.plan.user_id == current_user.id
     is_carer = False
     if not is_owner:
-        is_carer = check_relation(db=db, carer_id=current_user.id, patient_id=db_med.plan.user_id)
+        is_carer = await check_relation_async(db=db, carer_id=current_user.id, patient_id=db_med.plan.user_id)
     if not is_owner and not is_carer:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to edit this medication"
         )
 
-    updated_med = update_medication_dashboard(
+    updated_med = await update_medication_dashboard(
         db, med_id=medication_id, update_data=medication_data
     )
     return updated_med
@@ -93,10 +91,10 @@ async def edit_medication_details(
 async def update_medication_status_endpoint(
     medication_id: int,
     update_data: MedicationStatusUpdate,
-    db: Session = Depends(get_database),
+    db: AsyncSession = Depends(get_async_database),
     current_user: dict = Depends(get_current_user)
 ):
-    db_medication = get_medication_by_id(db, medication_id)
+    db_medication = await get_medication_by_id(db, medication_id)
     if not db_medication:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -105,53 +103,39 @@ async def update_medication_status_endpoint(
     is_owner = db_medication.plan.user_id == current_user.id
     is_carer = False
     if not is_owner:
-        is_carer = check_relation(db=db, carer_id=current_user.id, patient_id=db_medication.plan.user_id)
+        is_carer = await check_relation_async(db=db, carer_id=current_user.id, patient_id=db_medication.plan.user_id)
     if not is_owner and not is_carer:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to update this medication"
         )
-    updated_medication =update_medication_status(
+    updated_medication = await update_medication_status(
         db=db, 
         med_id=medication_id, 
         updated_data=update_data
     )
     if is_owner:
-        try:
-            carrer = get_carer_by_patient_id(db=db, patient_id=current_user.id)
-            if carrer:
-                status_text = "taken" if update_data.taken else "marked as not taken"
-                patient_name = current_user.name
-                message = f"{patient_name} {status_text} - {db_medication.name}"
-                notification_data = NotificationCreate(
-                    user_id = carrer.id,
-                    related_user_id=current_user.id,
-                    type="medication_status_update",
-                    message=message
-                )
-                create_new_notification(db, notification_data)
-        except Exception as e:
-            logging.error(f"Failed to create notification {e}")
+        # The carer is told by the dispatcher, which batches and coalesces these.
+        status_text = "taken" if update_data.taken else "marked as not taken"
+        notification_dispatcher.dispatch(current_user.id, "medication_status_update", medication_id,
+                                         f"{status_text} - {db_medication.name}")
     return updated_medication
 
 @router.get('/search', response_model=List[str])
 async def search_medications_db(
-        query,
+        query: str,
+        limit: int = Query(15, ge=1, le=50),
         db: Session = Depends(get_database)
 ):
     service = MedicationService(db=db)
-    results = await service.search_drug(query=query)
+    results = await service.search_drug(query=query, limit=limit)
     return results
 
-@router.post('/rpl/update', response_model=RplDownloadStats, status_code=status.HTTP_200_OK)
-async def update_polish_db(db:Session= Depends(get_database)):
-    rpl_service = RPLService(db=db)
-    try:
-        stats = await rpl_service.update_database_from_rpl()
-        return stats
-    except Exception as e:
-        logging.error(f"Failed to update RPL database: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to update medication database: {str(e)}"
-        )
\ No newline at end of file
+@router.post('/rpl/update/job', response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+def enqueue_polish_db_update(
+    mode: Literal["delta", "full"] = "delta",
+    db: Session = Depends(get_database),
+    current_user: dict = Depends(get_current_admin)
+):
+    # Only one registry update runs at a time, a second request gets the running job back.
+    return job_runner.enqueue(db, "rpl_update", {"mode": mode}, created_by_id=current_user.id, lock_key="rpl_update")
\ No newline at end of file
@@ -1,9 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import os
+import json
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
-from app.database.database import get_database
-from app.utils.jwt import get_current_user
-from app.schemas.notification import NotificationCreate, NotificationResponse
+from typing import List, Optional
+from app.database.database import get_database, local_session
+from app.utils.jwt import get_current_user_claims, optional_oauth2_scheme
+from app.utils.pubsub import notification_broker
+from app.schemas.notification import (NotificationCreate, NotificationResponse, NotificationPage,
+                                      UnreadCountResponse, MarkReadRequest, MarkReadResponse)
 from app.services.notification import NotificationService
 import logging
 
@@ -12,23 +18,58 @@ router = APIRouter(
     tags=["Notifications"]
 )
 
+SSE_HEARTBEAT_SECONDS = float(os.getenv('SSE_HEARTBEAT_SECONDS') or 15)
+NOTIFICATIONS_MAX_PAGE_SIZE = 200
+
 @router.get("/me", response_model=List[NotificationResponse])
 def get_my_notifications(
-        user: dict = Depends(get_current_user),
+        limit: int = Query(50, ge=1, le=NOTIFICATIONS_MAX_PAGE_SIZE),
+        user: dict = Depends(get_current_user_claims),
         db: Session = Depends(get_database)
 ):
     try:
         service = NotificationService(db=db)
-        notifications = service.get_user_notification(carrer_id=user.id)
+        notifications = service.get_user_notification(carrer_id=user.id, limit=limit)
         return notifications
     except Exception as e:
         logging.error(f"Error fetching notifications: {e}")
         db.rollback()
         return []
 
+@router.get("/me/page", response_model=NotificationPage)
+def get_my_notification_page(
+        cursor: Optional[str] = None,
+        limit: int = Query(50, ge=1, le=NOTIFICATIONS_MAX_PAGE_SIZE),
+        unread_only: bool = True,
+        user: dict = Depends(get_current_user_claims),
+        db: Session = Depends(get_database)
+):
+    try:
+        return NotificationService(db=db).get_notification_page(
+            carrer_id=user.id, limit=limit, cursor=cursor, unread_only=unread_only
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@router.get("/me/unread-count", response_model=UnreadCountResponse)
+def get_my_unread_count(
+        user: dict = Depends(get_current_user_claims),
+        db: Session = Depends(get_database)
+):
+    return UnreadCountResponse(unread=NotificationService(db=db).unread_count(carrer_id=user.id))
+
+@router.post("/me/read", response_model=MarkReadResponse)
+def mark_my_notifications_read(
+        request: MarkReadRequest,
+        user: dict = Depends(get_current_user_claims),
+        db: Session = Depends(get_database)
+):
+    updated = NotificationService(db=db).mark_all_as_read(carrer_id=user.id, up_to_id=request.up_to_id)
+    return MarkReadResponse(updated=updated)
+
 @router.patch("/{notification_id}", status_code=status.HTTP_204_NO_CONTENT)
 def mark_as_read(notification_id: int,
-                 user: dict = Depends(get_current_user),
+                 user: dict = Depends(get_current_user_claims),
                  db: Session = Depends(get_database),
                  ):
     service = NotificationService(db=db)
@@ -39,3 +80,75 @@ def mark_as_read(notification_id: int,
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Notification not found or you do not have permission to read it."
         )
+
+def _sse_event(message: dict) -> str:
+    return f"id: {message['id']}\nevent: notification\ndata: {json.dumps(message)}\n\n"
+
+async def _notification_events(user_id: int, queue: asyncio.Queue, missed: List[dict], last_id: int):
+    try:
+        yield "retry: 3000\n\n"
+        # The replay goes page by page, a full page means there may be more after it.
+        while missed:
+            for message in missed:
+                last_id = message["id"]
+                yield _sse_event(message)
+            if len(missed) < NOTIFICATIONS_MAX_PAGE_SIZE:
+                break
+            missed = await asyncio.to_thread(_missed_notifications, user_id, last_id)
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # Comment line, keeps proxies from closing an idle stream.
+                yield ": keep-alive\n\n"
+                continue
+            # Skips what the replay already sent.
+            if message["id"] <= last_id:
+                continue
+            last_id = message["id"]
+            yield _sse_event(message)
+    finally:
+        notification_broker.unsubscribe(user_id, queue)
+
+def _missed_notifications(user_id: int, last_id: int) -> List[dict]:
+    # A short session of its own: a request-scoped one would stay open, and keep its
+    # pooled connection, for as long as the stream lives.
+    with local_session() as db:
+        notifications = NotificationService(db=db).get_notifications_after(
+            carrer_id=user_id, after_id=last_id, limit=NOTIFICATIONS_MAX_PAGE_SIZE
+        )
+        return [NotificationResponse.model_validate(n).model_dump(mode="json") for n in notifications]
+
+@router.get("/stream")
+async def stream_notifications(
+        request: Request,
+        access_token: Optional[str] = None,
+        token: Optional[str] = Depends(optional_oauth2_scheme)
+):
+    if not (token or access_token):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    user = get_current_user_claims(token or access_token)
+
+    # Subscribe before the replay query so nothing published in between is lost.
+    queue = notification_broker.subscribe(user.id)
+    missed = []
+    last_id = 0
+    last_event_id = request.headers.get("last-event-id")
+    try:
+        if last_event_id and last_event_id.isdigit():
+            # EventSource reconnects with the last id it saw, resend everything after it.
+            last_id = int(last_event_id)
+            missed = await asyncio.to_thread(_missed_notifications, user.id, last_id)
+    except Exception:
+        notification_broker.unsubscribe(user.id, queue)
+        raise
+
+    return StreamingResponse(
+        _notification_events(user.id, queue, missed, last_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
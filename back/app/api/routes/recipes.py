@@ -2,11 +2,12 @@ from fastapi import APIRouter, Depends, Query, HTTPException, status
 from sqlalchemy.orm import Session
 from app.database.database import get_database
 from app.services.spoonacular import Spoonacular
-from app.schemas.spoonacular import ComplexSearchResponse, RecipeResponse
+from app.schemas.spoonacular import ComplexSearchResponse, RecipeResponse, RecipeCacheStats
+from app.services.recipe_cache import RecipeCacheService
 from app.schemas.health_form import HealthFormCreate 
 from app.services.health_form import HealthFormService 
 from app.services.spoonacular import Spoonacular 
-from app.utils.jwt import get_current_user 
+from app.utils.jwt import get_current_user_claims, get_current_admin
 from app.models.user import User 
 from typing import List, Optional
 router = APIRouter(prefix="/api/v1/recipes", tags=["Recipes"])
@@ -16,7 +17,7 @@ async def search_recipes_endpoint(
     q: str,
     limit: int,
     db: Session = Depends(get_database),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_claims)
 ): 
 
     health_form_service = HealthFormService(db)
@@ -47,9 +48,17 @@ async def search_recipes_endpoint(
             detail=f"Błąd podczas wyszukiwania przepisów: {e}"
         )
     
+@router.get("/cache/stats", response_model=RecipeCacheStats)
+def get_recipe_cache_stats(db: Session = Depends(get_database), current_user: dict = Depends(get_current_user_claims)):
+    return RecipeCacheService(db).stats()
+
+@router.delete("/{recipe_id}/cache", status_code=status.HTTP_204_NO_CONTENT)
+def invalidate_recipe_cache(recipe_id: int, db: Session = Depends(get_database), current_user: dict = Depends(get_current_admin)):
+    RecipeCacheService(db).invalidate(recipe_id)
+
 @router.get("/{recipe_id}", response_model=RecipeResponse)
-async def get_recipe_info(recipe_id: int, db: Session = Depends(get_database), current_user: dict = Depends(get_current_user)):
-    service = Spoonacular()
+async def get_recipe_info(recipe_id: int, db: Session = Depends(get_database), current_user: dict = Depends(get_current_user_claims)):
+    service = Spoonacular(db=db)
     try:
         details = await service.get_recipe_information(recipe_id=recipe_id)
         return details
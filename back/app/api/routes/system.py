@@ -0,0 +1,34 @@
+import os
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from app.database.database import get_database, get_pool_stats
+from app.utils.jwt import get_current_admin
+from app.schemas.system import DatabasePoolStats
+from app.schemas.job import JobResponse
+from app.services.jobs import job_runner
+
+router = APIRouter(prefix="/api/v1/system", tags=["System"])
+
+ADHERENCE_BACKFILL_MAX_DAYS = int(os.getenv('ADHERENCE_BACKFILL_MAX_DAYS') or 3660)
+
+@router.get("/db/pool", response_model=DatabasePoolStats)
+def get_database_pool_stats(current_user: dict = Depends(get_current_admin)):
+    return get_pool_stats()
+
+@router.post("/adherence/backfill/job", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+def enqueue_adherence_backfill(
+    start: date,
+    end: date,
+    db: Session = Depends(get_database),
+    current_user: dict = Depends(get_current_admin)
+):
+    # Fills the daily adherence rollup for plans that predate it.
+    days = (end - start).days + 1
+    if days < 1 or days > ADHERENCE_BACKFILL_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range must cover 1 to {ADHERENCE_BACKFILL_MAX_DAYS} days"
+        )
+    return job_runner.enqueue(db, "adherence_backfill", {"start": start.isoformat(), "end": end.isoformat()},
+                              created_by_id=current_user.id, lock_key="adherence_backfill")
@@ -4,9 +4,9 @@ from app.schemas.user import User
 from app.schemas.user_auth import (UserAuthCreate, UserWithAuth, RegisterRequest, 
                                    PasswordUpdateRequest, PasswordUpdateResponse)
 from sqlalchemy.orm import Session
-from app.database.database import get_database
+from app.database.database import get_database, get_async_database, AnySession
 from app.schemas.token import Token
-from app.utils.jwt import get_current_user
+from app.utils.jwt import get_current_user, get_current_user_claims
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import datetime
 
@@ -23,13 +23,13 @@ def create_user_endpoint(register_request: RegisterRequest, db:Session = Depends
         )
     
 @router.post("/tokens",response_model=Token)
-def login_for_acces_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_database)):
+async def login_for_acces_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AnySession = Depends(get_async_database)):
     try:
         login_data = UserAuthCreate(
             email = form_data.username, 
             password = form_data.password
         )
-        return UserService.authenticate_user(db, login_data)
+        return await UserService.authenticate_user_async(db, login_data)
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -70,7 +70,7 @@ def change_password_endpoint(change_password_data: PasswordUpdateRequest,
         )
 
 @router.get('/me', response_model = User)
-def get_current_user_endpoint(current_user: dict = Depends(get_current_user), db: Session = Depends(get_database)):
+def get_current_user_endpoint(current_user: dict = Depends(get_current_user_claims), db: Session = Depends(get_database)):
     try:
         user_id = current_user.id
         return UserService.get_user_info(db, user_id)
@@ -1,5 +1,7 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
+from app.database.database import AnySession, execute
 from app.models.user import User
 from app.models.care_relation import CareRelation
 
@@ -12,8 +14,10 @@ def get_dependents_by_carer_id(db: Session, carer_id: int):
     relations = db.query(CareRelation).filter(CareRelation.carer_id == carer_id).all()
     return [relation.patient for relation in relations]
 
-def get_carer_by_patient_id(db: Session, patient_id: int):
-    relation = db.query(CareRelation).filter(CareRelation.patient_id == patient_id).first()
+async def get_carer_by_patient_id(db: AnySession, patient_id: int):
+    result = await execute(db, select(CareRelation).options(joinedload(CareRelation.carer))
+                           .where(CareRelation.patient_id == patient_id))
+    relation = result.scalars().first()
     if relation:
         return relation.carer
     return None
@@ -25,5 +29,12 @@ def check_relation(db: Session, carer_id: int, patient_id: int) -> bool:
     ).first()
     return relation is not None
 
+async def check_relation_async(db: AnySession, carer_id: int, patient_id: int) -> bool:
+    result = await execute(db, select(CareRelation.id).where(
+        CareRelation.carer_id == carer_id,
+        CareRelation.patient_id == patient_id
+    ).limit(1))
+    return result.first() is not None
+
 def is_user_patient(db: Session, user_id: int) -> bool:
     return db.query(CareRelation).filter(CareRelation.patient_id == user_id).count() > 0
\ No newline at end of file
@@ -0,0 +1,115 @@
+import os
+from datetime import date
+from sqlalchemy import case, delete, func, insert, select, true
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.database.database import AnySession, execute
+from app.models.daily_adherence import DailyAdherence
+from app.models.plan import Plan
+from app.models.meal import Meal
+from app.models.medication import Medication
+from app.models.care_relation import CareRelation
+from app.models.user import User
+
+ADHERENCE_ROLLUP_ENABLED = os.getenv('ADHERENCE_ROLLUP_ENABLED', 'false').lower() == 'true'
+ROLLUP_COLUMNS = ("user_id", "day", "plan_id", "meals_done", "meals_total", "meds_taken", "meds_total")
+
+def plan_progress(*criteria):
+    # Meal and medication counts of the latest plan per user and day among the plans
+    # matching criteria. Meals and medications are grouped separately so their rows
+    # never multiply each other.
+    ranked = (
+        select(Plan.id.label("plan_id"), Plan.user_id, Plan.day_start,
+               func.row_number().over(partition_by=(Plan.user_id, Plan.day_start),
+                                      order_by=(Plan.created_at.desc(), Plan.id.desc())).label("rn"))
+        .where(*criteria)
+        .subquery()
+    )
+    latest = select(ranked.c.plan_id, ranked.c.user_id, ranked.c.day_start).where(ranked.c.rn == 1).cte("latest_plans")
+    meal_counts = (
+        select(Meal.plan_id, func.count().label("total"),
+               func.sum(case((Meal.eaten == True, 1), else_=0)).label("done"))
+        .join(latest, latest.c.plan_id == Meal.plan_id)
+        .group_by(Meal.plan_id)
+        .subquery()
+    )
+    med_counts = (
+        select(Medication.plan_id, func.count().label("total"),
+               func.sum(case((Medication.taken == True, 1), else_=0)).label("done"))
+        .join(latest, latest.c.plan_id == Medication.plan_id)
+        .group_by(Medication.plan_id)
+        .subquery()
+    )
+    return (
+        select(latest.c.user_id, latest.c.day_start.label("day"), latest.c.plan_id,
+               func.coalesce(meal_counts.c.done, 0).label("meals_done"),
+               func.coalesce(meal_counts.c.total, 0).label("meals_total"),
+               func.coalesce(med_counts.c.done, 0).label("meds_taken"),
+               func.coalesce(med_counts.c.total, 0).label("meds_total"))
+        .select_from(latest)
+        .outerjoin(meal_counts, meal_counts.c.plan_id == latest.c.plan_id)
+        .outerjoin(med_counts, med_counts.c.plan_id == latest.c.plan_id)
+    )
+
+def dependents_progress(carer_id: int, progress):
+    # Every dependent of the carer joined to per-day progress rows, dependents without
+    # any row still come back once with NULL day and plan.
+    progress = progress.subquery()
+    return (
+        select(User.id, User.name, User.surname, progress.c.day, progress.c.plan_id,
+               func.coalesce(progress.c.meals_done, 0).label("meals_done"),
+               func.coalesce(progress.c.meals_total, 0).label("meals_total"),
+               func.coalesce(progress.c.meds_taken, 0).label("meds_taken"),
+               func.coalesce(progress.c.meds_total, 0).label("meds_total"))
+        .select_from(CareRelation)
+        .join(User, User.id == CareRelation.patient_id)
+        .outerjoin(progress, progress.c.user_id == User.id)
+        .where(CareRelation.carer_id == carer_id)
+        .order_by(CareRelation.id, progress.c.day)
+    )
+
+def dependent_ids(carer_id: int):
+    return select(CareRelation.patient_id).where(CareRelation.carer_id == carer_id)
+
+def _upsert_from(db: AnySession, progress, *scope):
+    # WHERE true keeps SQLite from reading ON CONFLICT as part of the SELECT's join.
+    progress = progress.where(true())
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert_fn = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        statement = insert_fn(DailyAdherence).from_select(ROLLUP_COLUMNS, progress)
+        return [statement.on_conflict_do_update(
+            index_elements=["user_id", "day"],
+            set_={column: statement.excluded[column] for column in ROLLUP_COLUMNS[2:]}
+        )]
+    return [delete(DailyAdherence).where(*scope), insert(DailyAdherence).from_select(ROLLUP_COLUMNS, progress)]
+
+async def refresh_daily_adherence(db: AnySession, plan_id: int):
+    # Recounts the day of the given plan inside the caller's transaction. Changes must be flushed first.
+    if not ADHERENCE_ROLLUP_ENABLED:
+        return
+    plan = (await execute(db, select(Plan.user_id, Plan.day_start).where(Plan.id == plan_id))).first()
+    if plan is None:
+        return
+    await refresh_user_adherence(db, plan.user_id, plan.day_start, plan.day_start)
+
+async def refresh_user_adherence(db: AnySession, user_id: int, start: date, end: date):
+    # refresh_daily_adherence for every day of one user's range at once.
+    if not ADHERENCE_ROLLUP_ENABLED:
+        return
+    progress = plan_progress(Plan.user_id == user_id, Plan.day_start.between(start, end))
+    for statement in _upsert_from(db, progress, DailyAdherence.user_id == user_id, DailyAdherence.day.between(start, end)):
+        await execute(db, statement)
+
+def backfill_daily_adherence(db: Session, start: date, end: date):
+    progress = plan_progress(Plan.day_start.between(start, end))
+    for statement in _upsert_from(db, progress, DailyAdherence.day.between(start, end)):
+        db.execute(statement)
+    db.commit()
+
+def get_dependents_adherence_rollup(db: Session, carer_id: int, start: date, end: date):
+    progress = select(*(getattr(DailyAdherence, column) for column in ROLLUP_COLUMNS)).where(
+        DailyAdherence.user_id.in_(dependent_ids(carer_id)),
+        DailyAdherence.day.between(start, end)
+    )
+    return db.execute(dependents_progress(carer_id, progress)).all()
@@ -1,12 +1,21 @@
-from sqlalchemy import or_, and_
+from typing import Iterable, List, Tuple
+from sqlalchemy import tuple_, insert
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
 from app.models.drug_interaction import DrugInteraction
 from app.schemas.drug_interaction import DrugInteractionCreate
 
+PAIR_LOOKUP_CHUNK = 500
+
+def canonical_pair(drug1: str, drug2: str) -> Tuple[str, str]:
+    drug1, drug2 = drug1.lower(), drug2.lower()
+    return (drug1, drug2) if drug1 <= drug2 else (drug2, drug1)
+
 def create_new_drug_interaction(db: Session, interaction_data: DrugInteractionCreate):
+    drug1, drug2 = canonical_pair(interaction_data.drug1, interaction_data.drug2)
     new_interaction = DrugInteraction(
-        drug1 = interaction_data.drug1.lower(),
-        drug2 = interaction_data.drug2.lower(),
+        drug1 = drug1,
+        drug2 = drug2,
         description = interaction_data.description,
         severity = interaction_data.severity
     )
@@ -16,12 +25,43 @@ def create_new_drug_interaction(db: Session, interaction_data: DrugInteractionCr
     return new_interaction
 
 def get_interaction(db: Session, drug1: str, drug2: str):
-    drug1 = drug1.lower()
-    drug2 = drug2.lower()
-    db_interaction = db.query(DrugInteraction).filter(
-        or_(
-            and_(DrugInteraction.drug1 == drug1, DrugInteraction.drug2 == drug2),
-            and_(DrugInteraction.drug1 == drug2, DrugInteraction.drug2 == drug1) 
-            )
+    drug1, drug2 = canonical_pair(drug1, drug2)
+    return db.query(DrugInteraction).filter(
+        DrugInteraction.drug1 == drug1,
+        DrugInteraction.drug2 == drug2
     ).first()
-    return db_interaction
\ No newline at end of file
+
+def get_interactions_for_pairs(db: Session, pairs: Iterable[Tuple[str, str]]) -> List[DrugInteraction]:
+    pairs = list(dict.fromkeys(canonical_pair(drug1, drug2) for drug1, drug2 in pairs))
+    found = []
+    for start in range(0, len(pairs), PAIR_LOOKUP_CHUNK):
+        chunk = pairs[start:start + PAIR_LOOKUP_CHUNK]
+        found.extend(db.query(DrugInteraction).filter(
+            tuple_(DrugInteraction.drug1, DrugInteraction.drug2).in_(chunk)
+        ).all())
+    return found
+
+def _insert_ignoring_duplicates(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(DrugInteraction).on_conflict_do_nothing(index_elements=["drug1", "drug2"])
+    if dialect == "sqlite":
+        return sqlite.insert(DrugInteraction).on_conflict_do_nothing(index_elements=["drug1", "drug2"])
+    return insert(DrugInteraction)
+
+def create_drug_interactions_bulk(db: Session, interactions: List[DrugInteractionCreate]) -> List[DrugInteraction]:
+    rows = {}
+    for interaction in interactions:
+        drug1, drug2 = canonical_pair(interaction.drug1, interaction.drug2)
+        rows[(drug1, drug2)] = {
+            "drug1": drug1,
+            "drug2": drug2,
+            "description": interaction.description,
+            "severity": interaction.severity,
+        }
+    if not rows:
+        return []
+    # Another request may have stored some of these pairs meanwhile, the unique index keeps the first.
+    db.execute(_insert_ignoring_duplicates(db), list(rows.values()))
+    db.commit()
+    return get_interactions_for_pairs(db, rows.keys())
\ No newline at end of file
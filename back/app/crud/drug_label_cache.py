@@ -0,0 +1,21 @@
+from datetime import datetime
+from typing import List
+from sqlalchemy.orm import Session
+from app.models.drug_label_cache import DrugLabelCache
+
+def get_cached_labels(db: Session, drug_names: List[str], now: datetime):
+    if not drug_names:
+        return []
+    return db.query(DrugLabelCache).filter(
+        DrugLabelCache.drug_name.in_(drug_names),
+        DrugLabelCache.expires_at > now
+    ).all()
+
+def save_cached_label(db: Session, entry: DrugLabelCache):
+    db.merge(entry)
+    db.commit()
+
+def delete_cached_label(db: Session, drug_name: str) -> int:
+    deleted = db.query(DrugLabelCache).filter(DrugLabelCache.drug_name == drug_name).delete(synchronize_session=False)
+    db.commit()
+    return deleted
@@ -0,0 +1,46 @@
+from datetime import datetime, timezone
+from typing import List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models.job import Job, JOB_ACTIVE_STATUSES
+
+def create_job(db: Session, kind: str, payload: Optional[dict] = None,
+               created_by_id: Optional[int] = None, lock_key: Optional[str] = None,
+               worker_id: Optional[str] = None) -> Job:
+    job = Job(kind=kind, payload=payload, created_by_id=created_by_id, lock_key=lock_key, status="queued",
+              worker_id=worker_id, heartbeat_at=datetime.now(timezone.utc))
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+def get_job(db: Session, job_id: int) -> Optional[Job]:
+    return db.query(Job).filter(Job.id == job_id).first()
+
+def get_active_job(db: Session, lock_key: str) -> Optional[Job]:
+    return db.query(Job).filter(Job.lock_key == lock_key, Job.status.in_(JOB_ACTIVE_STATUSES)).first()
+
+def update_job(db: Session, job_id: int, expected_status: Optional[str] = None, **fields) -> int:
+    query = db.query(Job).filter(Job.id == job_id)
+    if expected_status is not None:
+        # Compare-and-set, so a cancel and a worker picking the job up cannot both win.
+        query = query.filter(Job.status == expected_status)
+    updated = query.update(fields, synchronize_session=False)
+    db.commit()
+    return updated
+
+def touch_jobs(db: Session, worker_id: str, now: datetime) -> List[int]:
+    # Heartbeat for every active job of the worker, returns those someone asked to cancel.
+    active = db.query(Job).filter(Job.worker_id == worker_id, Job.status.in_(JOB_ACTIVE_STATUSES))
+    active.update({"heartbeat_at": now}, synchronize_session=False)
+    db.commit()
+    return [job_id for job_id, in active.filter(Job.cancel_requested == True).with_entities(Job.id)]
+
+def fail_stale_jobs(db: Session, before: datetime) -> int:
+    # Only jobs whose worker stopped sending heartbeats, jobs of live workers are left alone.
+    updated = db.query(Job).filter(
+        Job.status.in_(JOB_ACTIVE_STATUSES),
+        func.coalesce(Job.heartbeat_at, Job.created_at) < before
+    ).update({"status": "failed", "error": "Interrupted, its worker stopped responding"}, synchronize_session=False)
+    db.commit()
+    return updated
@@ -1,9 +1,13 @@
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session, joinedload
+from typing import Dict, List
 from app.models.common import MealType
 from datetime import time
 from app.models.meal import Meal
-from app.schemas.plan import MealStatusUpdate, MealUpdate
+from app.schemas.plan import MealCreate, MealStatusUpdate, MealUpdate
+from app.database.database import AnySession, supports_bulk_returning, execute, commit, flush
+from app.crud.daily_adherence import refresh_daily_adherence
 
 def create_meal(db: Session, plan_id: int, meal_type: MealType, time: time, description: str, spoonacular_recipe_id: int = None) -> Meal:
     meal_data = Meal(
@@ -20,23 +24,46 @@ def create_meal(db: Session, plan_id: int, meal_type: MealType, time: time, desc
     db.refresh(meal_data)
     return meal_data
 
-def get_meal_by_id(db:Session, meal_id: int):
-    return db.query(Meal).filter(Meal.id==meal_id).first()
+def create_meals_bulk(db: Session, meals_by_plan: Dict[int, List[MealCreate]]) -> List[Meal]:
+    rows = [
+        {
+            "plan_id": plan_id,
+            "meal_type": meal.meal_type,
+            "time": meal.time,
+            "description": meal.description,
+            "eaten": False,
+            "comment": None,
+            "spoonacular_recipe_id": meal.spoonacular_recipe_id
+        }
+        for plan_id, meals in meals_by_plan.items()
+        for meal in meals
+    ]
+    if not rows:
+        return []
+    if supports_bulk_returning(db):
+        return list(db.scalars(insert(Meal).returning(Meal, sort_by_parameter_order=True), rows))
+    new_meals = [Meal(**row) for row in rows]
+    db.add_all(new_meals)
+    db.flush()
+    return new_meals
 
-def change_meal_time_or_type(db:Session, meal_id: int, update_data: MealUpdate):
-    meal = get_meal_by_id(db=db, meal_id=meal_id)
+async def get_meal_by_id(db: AnySession, meal_id: int):
+    result = await execute(db, select(Meal).options(joinedload(Meal.plan)).where(Meal.id == meal_id))
+    return result.scalars().first()
+
+async def change_meal_time_or_type(db: AnySession, meal_id: int, update_data: MealUpdate):
+    meal = await get_meal_by_id(db=db, meal_id=meal_id)
     if not meal:
         return None
     update_dict = update_data.model_dump(exclude_unset=True)
     for key, value in update_dict.items():
         setattr(meal, key, value)
 
-    db.commit()
-    db.refresh(meal)
+    await commit(db)
     return meal
 
-def change_meal_status(db: Session, meal_id: int, updated_data: MealStatusUpdate):
-    db_meal = get_meal_by_id(db, meal_id)
+async def change_meal_status(db: AnySession, meal_id: int, updated_data: MealStatusUpdate):
+    db_meal = await get_meal_by_id(db, meal_id)
 
     if not db_meal:
         raise HTTPException(
@@ -48,6 +75,7 @@ def change_meal_status(db: Session, meal_id: int, updated_data: MealStatusUpdate
          db_meal.comment = updated_data.comment
     elif updated_data.eaten is False: 
           db_meal.comment = None
-    db.commit()
-    db.refresh(db_meal)
+    await flush(db)
+    await refresh_daily_adherence(db, db_meal.plan_id)
+    await commit(db)
     return db_meal
\ No newline at end of file
@@ -1,9 +1,12 @@
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session, joinedload
 from app.models.medication import Medication
 from app.models.common import WithMealRelation
 from app.schemas.medication import MedicationCreate, MedicationStatusUpdate, MedicationDashboardUpdate
-from typing import Optional
+from typing import Dict, List, Optional
+from app.database.database import AnySession, supports_bulk_returning, execute, commit, flush
+from app.crud.daily_adherence import refresh_daily_adherence
 
 def create_medication(db: Session, plan_id: int, medication_data: MedicationCreate):
     new_med = Medication(
@@ -17,26 +20,50 @@ def create_medication(db: Session, plan_id: int, medication_data: MedicationCrea
     db.flush()
     return new_med
 
+def create_medications_bulk(db: Session, medications_by_plan: Dict[int, List[MedicationCreate]]) -> List[Medication]:
+    rows = [
+        {
+            "plan_id": plan_id,
+            "time": medication.time,
+            "name": medication.name,
+            "taken": False,
+            "with_meal_relation": medication.with_meal_relation,
+            "description": medication.description,
+        }
+        for plan_id, medications in medications_by_plan.items()
+        for medication in medications
+    ]
+    if not rows:
+        return []
+    if supports_bulk_returning(db):
+        return list(db.scalars(insert(Medication).returning(Medication, sort_by_parameter_order=True), rows))
+    new_meds = [Medication(**row) for row in rows]
+    db.add_all(new_meds)
+    db.flush()
+    return new_meds
+
 def get_medications_by_plan_id(db: Session, plan_id: int):
     return db.query(Medication).filter(Medication.plan_id == plan_id).all()
 
-def get_medication_by_id(db: Session, med_id: int):
-    return db.query(Medication).filter(Medication.id == med_id).first()
+async def get_medication_by_id(db: AnySession, med_id: int):
+    result = await execute(db, select(Medication).options(joinedload(Medication.plan)).where(Medication.id == med_id))
+    return result.scalars().first()
 
-def update_medication_status(db: Session, med_id:int, updated_data: MedicationStatusUpdate):
-    db_med = get_medication_by_id(db, med_id)
+async def update_medication_status(db: AnySession, med_id:int, updated_data: MedicationStatusUpdate):
+    db_med = await get_medication_by_id(db, med_id)
     if not db_med:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Med with {med_id} not found"
         )
     db_med.taken = updated_data.taken   
-    db.commit()
-    db.refresh(db_med)
+    await flush(db)
+    await refresh_daily_adherence(db, db_med.plan_id)
+    await commit(db)
     return db_med
 
-def update_medication_dashboard(db: Session, med_id: int, update_data: MedicationDashboardUpdate):
-    medication_to_change = get_medication_by_id(db=db, med_id=med_id)
+async def update_medication_dashboard(db: AnySession, med_id: int, update_data: MedicationDashboardUpdate):
+    medication_to_change = await get_medication_by_id(db=db, med_id=med_id)
     if not medication_to_change:
         return None
     update_dict = update_data.model_dump(exclude_unset=True)
@@ -52,6 +79,5 @@ def update_medication_dashboard(db: Session, med_id: int, update_data: Medicatio
         medication_to_change.description = f"Take: {new_desc_text}. Please verify dose."
     for key, value in update_dict.items():
         setattr(medication_to_change, key, value)
-    db.commit()
-    db.refresh(medication_to_change)
+    await commit(db)
     return medication_to_change
\ No newline at end of file
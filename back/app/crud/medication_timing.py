@@ -0,0 +1,17 @@
+from datetime import datetime
+from typing import List
+from sqlalchemy.orm import Session
+from app.models.medication_timing import MedicationTiming
+
+def get_medication_timings(db: Session, substances: List[str], now: datetime):
+    if not substances:
+        return []
+    return db.query(MedicationTiming).filter(
+        MedicationTiming.substance.in_(substances),
+        MedicationTiming.expires_at > now
+    ).all()
+
+def save_medication_timings(db: Session, entries: List[MedicationTiming]):
+    for entry in entries:
+        db.merge(entry)
+    db.commit()
@@ -1,9 +1,16 @@
-from app.schemas.notification import NotificationCreate
+import base64
+import logging
+from datetime import datetime
+from typing import Optional, Tuple
+from app.schemas.notification import NotificationCreate, NotificationResponse
 from app.models.notification import Notification
 from app.models.user import User
+from sqlalchemy import func, select, tuple_, update
 from sqlalchemy.orm import Session, joinedload
+from app.database.database import AnySession, execute, commit
+from app.utils.pubsub import notification_broker
 
-def create_new_notification(db: Session, data: NotificationCreate):
+async def create_new_notification(db: AnySession, data: NotificationCreate):
     new_notification = Notification(
         user_id = data.user_id,
         related_user_id = data.related_user_id,
@@ -12,28 +19,83 @@ def create_new_notification(db: Session, data: NotificationCreate):
         is_read = False
     )
     db.add(new_notification)
-    db.commit()
-    db.refresh(new_notification)
-    return db.query(Notification).options(
+    await commit(db)
+    result = await execute(db, select(Notification).options(
         joinedload(Notification.subject)
-    ).filter(Notification.id == new_notification.id).first()
+    ).where(Notification.id == new_notification.id))
+    notification = result.scalars().first()
+    try:
+        message = NotificationResponse.model_validate(notification).model_dump(mode="json")
+        await notification_broker.publish(notification.user_id, message)
+    except Exception as e:
+        # The notification is stored either way, a missed push shows up on the next stream replay.
+        logging.error(f"Failed to publish notification {notification.id}: {e}")
+    return notification
+
+def encode_cursor(notification: Notification) -> str:
+    raw = f"{notification.sent_at.isoformat()}|{notification.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        sent_at, notification_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return datetime.fromisoformat(sent_at), int(notification_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
 
-def get_unread_notification(db: Session, user_id: int):
+def get_unread_notification(db: Session, user_id: int, limit: Optional[int] = None,
+                            cursor: Optional[str] = None, unread_only: bool = True):
+    # Keyset pagination, newest first: the next page starts strictly after (sent_at, id)
+    # of the cursor, served by the (user_id, is_read, sent_at) index.
+    query = db.query(Notification).options(
+        joinedload(Notification.subject)
+    ).filter(Notification.user_id == user_id)
+    if unread_only:
+        query = query.filter(Notification.is_read == False)
+    if cursor:
+        query = query.filter(tuple_(Notification.sent_at, Notification.id) < decode_cursor(cursor))
+    query = query.order_by(Notification.sent_at.desc(), Notification.id.desc())
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
+def get_notifications_after(db: Session, user_id: int, after_id: int, limit: int):
+    # Read or not, oldest first: what a reconnecting stream has not seen yet.
     return db.query(Notification).options(
         joinedload(Notification.subject)
     ).filter(
+        Notification.user_id == user_id,
+        Notification.id > after_id
+    ).order_by(Notification.id).limit(limit).all()
+
+def count_unread_notifications(db: Session, user_id: int) -> int:
+    return db.query(func.count(Notification.id)).filter(
         Notification.user_id == user_id,
         Notification.is_read == False
-    ).order_by(Notification.sent_at.desc()).all()
+    ).scalar()
 
-def mark_as_read_notification(db: Session, notification_id: int, user_id: int):
-    notification = db.query(Notification).filter(
-        Notification.id == notification_id, 
+def mark_as_read_notification(db: Session, notification_id: int, user_id: int) -> bool:
+    result = db.execute(update(Notification).where(
+        Notification.id == notification_id,
         Notification.user_id == user_id
-    ).first()
-    if notification:
-        notification.is_read = True
-        db.commit()
-        db.refresh(notification)
-        db.refresh(notification.subject)
-    return notification
\ No newline at end of file
+    ).values(is_read=True))
+    db.commit()
+    return result.rowcount > 0
+
+def mark_notifications_read(db: Session, user_id: int, up_to_id: Optional[int] = None) -> int:
+    # One UPDATE for "mark all read", or everything up to and including a given
+    # notification in feed order.
+    statement = update(Notification).where(
+        Notification.user_id == user_id,
+        Notification.is_read == False
+    )
+    if up_to_id is not None:
+        bound = db.execute(select(Notification.sent_at, Notification.id).where(
+            Notification.id == up_to_id, Notification.user_id == user_id
+        )).first()
+        if bound is None:
+            return 0
+        statement = statement.where(tuple_(Notification.sent_at, Notification.id) <= tuple(bound))
+    result = db.execute(statement.values(is_read=True).execution_options(synchronize_session=False))
+    db.commit()
+    return result.rowcount
@@ -1,6 +1,14 @@
 from app.models.plan import Plan
-from app.schemas.plan import PlanCreate
+from app.schemas.plan import PlanCreate, MealCreate
+from app.schemas.medication import MedicationCreate
+from app.crud.meals import create_meals_bulk
+from app.crud.medication import create_medications_bulk
+from app.crud.daily_adherence import plan_progress, dependents_progress, dependent_ids
+from app.database.database import supports_bulk_returning
+from collections import defaultdict
 from datetime import date
+from typing import List, Optional, Tuple
+from sqlalchemy import insert
 from sqlalchemy.orm import Session, joinedload
 
 def create_plan(db: Session, plan_data: PlanCreate):
@@ -10,6 +18,35 @@ def create_plan(db: Session, plan_data: PlanCreate):
     db.refresh(new_plan)
     return new_plan
 
+def create_plans_bulk(db: Session, plans: List[Tuple[PlanCreate, List[MealCreate], List[MedicationCreate]]],
+                      commit: bool = True):
+    # Plans, then meals, then medications. On PostgreSQL that is three INSERTs whatever the
+    # number of days. SQLite cannot keep RETURNING rows in parameter order for a multi-row
+    # insert, so SQLAlchemy sends one row per statement there.
+    if not plans:
+        return []
+    rows = [plan_data.dict() for plan_data, _, _ in plans]
+    if supports_bulk_returning(db):
+        new_plans = list(db.scalars(insert(Plan).returning(Plan, sort_by_parameter_order=True), rows))
+    else:
+        new_plans = [Plan(**row) for row in rows]
+        db.add_all(new_plans)
+        db.flush()
+    new_meals = create_meals_bulk(db, {plan.id: meals for plan, (_, meals, _) in zip(new_plans, plans)})
+    new_meds = create_medications_bulk(db, {plan.id: meds or [] for plan, (_, _, meds) in zip(new_plans, plans)})
+    if commit:
+        db.commit()
+    meals_by_plan, meds_by_plan = defaultdict(list), defaultdict(list)
+    for meal in new_meals:
+        meals_by_plan[meal.plan_id].append(meal)
+    for med in new_meds:
+        meds_by_plan[med.plan_id].append(med)
+    return [(plan, meals_by_plan[plan.id], meds_by_plan[plan.id]) for plan in new_plans]
+
+def create_plan_bulk(db: Session, plan_data: PlanCreate, meals: List[MealCreate],
+                     medications: Optional[List[MedicationCreate]] = None, commit: bool = True):
+    return create_plans_bulk(db, [(plan_data, meals, medications or [])], commit=commit)[0]
+
 def get_plan_by_id(db: Session, plan_id:int):
     return db.query(Plan).filter(Plan.id == plan_id).first()
 
@@ -21,4 +58,12 @@ def get_plan_with_meals_by_user_id_and_date(db: Session, user_id: int, plan_date
         .filter(Plan.day_start == plan_date)
         .order_by(Plan.created_at.desc())
         .first()
-    )
\ No newline at end of file
+    )
+
+def get_dependents_daily_progress(db: Session, carer_id: int, plan_date: date):
+    progress = plan_progress(Plan.user_id.in_(dependent_ids(carer_id)), Plan.day_start == plan_date)
+    return db.execute(dependents_progress(carer_id, progress)).all()
+
+def get_dependents_progress_range(db: Session, carer_id: int, start: date, end: date):
+    progress = plan_progress(Plan.user_id.in_(dependent_ids(carer_id)), Plan.day_start.between(start, end))
+    return db.execute(dependents_progress(carer_id, progress)).all()
@@ -0,0 +1,30 @@
+from datetime import datetime
+from typing import List
+from sqlalchemy.orm import Session
+from app.models.recipe_cache import RecipeCache
+
+def get_cached_recipes(db: Session, recipe_ids: List[int], now: datetime):
+    if not recipe_ids:
+        return []
+    return db.query(RecipeCache).filter(
+        RecipeCache.recipe_id.in_(recipe_ids),
+        RecipeCache.expires_at > now
+    ).all()
+
+def save_cached_recipes(db: Session, entries: List[RecipeCache]):
+    for entry in entries:
+        db.merge(entry)
+    db.commit()
+
+def delete_cached_recipe(db: Session, recipe_id: int) -> int:
+    deleted = db.query(RecipeCache).filter(RecipeCache.recipe_id == recipe_id).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+def delete_expired_recipes(db: Session, now: datetime) -> int:
+    deleted = db.query(RecipeCache).filter(RecipeCache.expires_at <= now).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+def count_cached_recipes(db: Session) -> int:
+    return db.query(RecipeCache).count()
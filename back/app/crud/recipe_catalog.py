@@ -0,0 +1,28 @@
+from typing import Iterable, List
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models.recipe_catalog import CatalogRecipe
+
+def get_catalog_recipes_by_ids(db: Session, recipe_ids: List[int]):
+    if not recipe_ids:
+        return []
+    return db.query(CatalogRecipe).filter(CatalogRecipe.recipe_id.in_(recipe_ids)).all()
+
+def find_catalog_recipes(db: Session, dish_type: str, min_calories: float, max_calories: float,
+                         diet_mask: int = 0, intolerance_mask: int = 0,
+                         exclude_ids: Iterable[int] = (), limit: int = 3):
+    query = db.query(CatalogRecipe).filter(
+        CatalogRecipe.dish_type == dish_type,
+        CatalogRecipe.calories.between(min_calories, max_calories)
+    )
+    if diet_mask:
+        query = query.filter(CatalogRecipe.diet_mask.op("&")(diet_mask) == diet_mask)
+    if intolerance_mask:
+        query = query.filter(CatalogRecipe.intolerance_free_mask.op("&")(intolerance_mask) == intolerance_mask)
+    exclude_ids = list(exclude_ids)
+    if exclude_ids:
+        query = query.filter(CatalogRecipe.recipe_id.notin_(exclude_ids))
+    return query.order_by(func.random()).limit(limit).all()
+
+def count_catalog_recipes(db: Session) -> int:
+    return db.query(CatalogRecipe).count()
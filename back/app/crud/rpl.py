@@ -0,0 +1,12 @@
+from typing import Optional
+from sqlalchemy.orm import Session
+from app.models.medication import RplSyncState
+
+RPL_SYNC_STATE_ID = 1
+
+def get_rpl_sync_state(db: Session) -> Optional[RplSyncState]:
+    return db.query(RplSyncState).filter(RplSyncState.id == RPL_SYNC_STATE_ID).first()
+
+def save_rpl_sync_state(db: Session, etag: Optional[str], last_modified: Optional[str], row_count: int):
+    db.merge(RplSyncState(id=RPL_SYNC_STATE_ID, etag=etag, last_modified=last_modified, row_count=row_count))
+    db.commit()
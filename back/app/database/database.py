@@ -1,6 +1,11 @@
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from typing import Union
 import os
+import time
+import logging
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -14,16 +19,146 @@ DB_NAME = os.getenv('DB_NAME')
 DB_PORT = os.getenv('DB_PORT')  
 
 DataBaseUrl = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+AsyncDataBaseUrl = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
-engine = create_engine(DataBaseUrl, echo = True)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE') or 5)
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW') or 10)
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT') or 30)
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE') or 1800)
+DB_POOL_PRE_PING = (os.getenv('DB_POOL_PRE_PING') or 'true').lower() in ('1', 'true', 'yes')
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS') or 0)
+# "false" (default), "true" to log statements, "debug" to also log result rows.
+DB_ECHO = (os.getenv('DB_ECHO') or 'false').lower()
+
+def _echo_setting():
+    if DB_ECHO == 'debug':
+        return 'debug'
+    return DB_ECHO in ('1', 'true', 'yes')
+
+def _engine_options(name: str, pool_class = QueuePool):
+    return dict(
+        echo = _echo_setting(),
+        poolclass = _timed_pool(name, pool_class),
+        pool_size = DB_POOL_SIZE,
+        max_overflow = DB_MAX_OVERFLOW,
+        pool_timeout = DB_POOL_TIMEOUT,
+        pool_recycle = DB_POOL_RECYCLE,
+        pool_pre_ping = DB_POOL_PRE_PING,
+    )
+
+def _connect_args(is_async: bool = False):
+    if not DB_STATEMENT_TIMEOUT_MS:
+        return {}
+    if is_async:
+        return {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+    return {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+
+# Time spent waiting for a pooled connection, per engine.
+_pool_waits = {}
+
+def _record_pool_wait(name: str, seconds: float):
+    stats = _pool_waits.setdefault(name, {"checkouts": 0, "total_wait": 0.0, "max_wait": 0.0})
+    stats["checkouts"] += 1
+    stats["total_wait"] += seconds
+    stats["max_wait"] = max(stats["max_wait"], seconds)
+    if seconds > DB_POOL_TIMEOUT / 2:
+        logging.warning(f"Waited {seconds:.2f}s for a {name} database connection, consider raising DB_POOL_SIZE")
+
+def _timed_pool(name: str, pool_class):
+    # Records how long each real checkout blocked. Only checkouts that found the pool
+    # exhausted count as waiting, the rest are free or just opening a new connection.
+    class TimedPool(pool_class):
+        def _do_get(self):
+            exhausted = self.checkedin() == 0 and 0 <= self._max_overflow <= self.overflow()
+            started = time.perf_counter()
+            connection = super()._do_get()
+            _record_pool_wait(name, time.perf_counter() - started if exhausted else 0.0)
+            return connection
+    return TimedPool
+
+engine = create_engine(DataBaseUrl, connect_args = _connect_args(), **_engine_options("sync"))
 local_session = sessionmaker(autocommit = False, autoflush = False, bind = engine)
 
+# Created on first use so importing the app does not require asyncpg (tests run on sync SQLite).
+async_engine = None
+async_local_session = None
+
 Base = declarative_base()
 
+AnySession = Union[Session, AsyncSession]
+
+def get_async_sessionmaker():
+    global async_engine, async_local_session
+    if async_local_session is None:
+        async_engine = create_async_engine(AsyncDataBaseUrl, connect_args = _connect_args(is_async = True),
+                                           **_engine_options("async", AsyncAdaptedQueuePool))
+        async_local_session = async_sessionmaker(async_engine, autoflush = False, expire_on_commit = False)
+    return async_local_session
+
+async def execute(db: AnySession, statement):
+    if isinstance(db, AsyncSession):
+        return await db.execute(statement)
+    return db.execute(statement)
+
+async def commit(db: AnySession):
+    if isinstance(db, AsyncSession):
+        await db.commit()
+    else:
+        db.commit()
+
+async def flush(db: AnySession):
+    if isinstance(db, AsyncSession):
+        await db.flush()
+    else:
+        db.flush()
+
+def supports_bulk_returning(db) -> bool:
+    return bool(getattr(db.get_bind().dialect, "insert_executemany_returning", False))
+
+def _pool_snapshot(name: str, db_engine):
+    if db_engine is None:
+        return None
+    pool = db_engine.pool
+    waits = _pool_waits.get(name, {"checkouts": 0, "total_wait": 0.0, "max_wait": 0.0})
+    snapshot = {
+        "size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "checked_out": None,
+        "checked_in": None,
+        "overflow": None,
+        "checkouts": waits["checkouts"],
+        "avg_wait_ms": (waits["total_wait"] / waits["checkouts"] * 1000) if waits["checkouts"] else 0.0,
+        "max_wait_ms": waits["max_wait"] * 1000,
+    }
+    if isinstance(pool, QueuePool):
+        snapshot.update(
+            size = pool.size(),
+            checked_out = pool.checkedout(),
+            checked_in = pool.checkedin(),
+            overflow = max(pool.overflow(), 0),
+        )
+    return snapshot
+
+def get_pool_stats():
+    return {
+        "sync_engine": _pool_snapshot("sync", engine),
+        "async_engine": _pool_snapshot("async", async_engine.sync_engine if async_engine is not None else None),
+    }
+
 def get_database():
+    # No connection up front: the session checks one out on its first query and gives
+    # it back on commit, so time spent on external APIs or streaming holds none.
     database = local_session() 
     try:
         yield database
     finally:
         database.close()
 
+async def get_async_database():
+    async with get_async_sessionmaker()() as database:
+        yield database
+
+async def dispose_async_engine():
+    if async_engine is not None:
+        await async_engine.dispose()
+
@@ -5,7 +5,7 @@ from app.database.database import Base
 class CareRelation(Base):
     __tablename__ = "care_relations"
     id = Column(Integer, primary_key=True, index=True)
-    carer_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    carer_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
     patient_id = Column(Integer, ForeignKey("users.id"), nullable=False, unique=True)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
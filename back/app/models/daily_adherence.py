@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.database.database import Base
+
+# Materialized per-day counts of a user's latest plan, kept current by the status
+# endpoints so adherence history never has to scan meals and medications.
+class DailyAdherence(Base):
+    __tablename__ = "daily_adherence"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    plan_id = Column(Integer, ForeignKey("plans.id", ondelete="CASCADE"), nullable=False)
+    meals_done = Column(Integer, nullable=False, default=0)
+    meals_total = Column(Integer, nullable=False, default=0)
+    meds_taken = Column(Integer, nullable=False, default=0)
+    meds_total = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
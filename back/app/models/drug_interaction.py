@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, func
+from sqlalchemy import Column, Integer, String, DateTime, Index, func
 from app.database.database import Base
 
 
@@ -6,9 +6,15 @@ class DrugInteraction(Base):
     __tablename__ = "drug_interactions"
 
     id = Column(Integer ,primary_key=True, index = True)
-    drug1 = Column(String, nullable=False, index = True)
-    drug2 = Column(String, nullable=False, index = True)
-    description = Column(String, nullable=False)
+    # Stored as a canonical pair: lowercased, drug1 sorts before drug2.
+    drug1 = Column(String, nullable=False)
+    drug2 = Column(String, nullable=False)
+    # NULL when the labels were checked and mention no interaction.
+    description = Column(String, nullable=True)
     severity = Column(String, nullable=False, default="None")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ux_drug_interactions_pair", "drug1", "drug2", unique=True),
+    )
\ No newline at end of file
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, DateTime, JSON
+from sqlalchemy.sql import func
+from app.database.database import Base
+
+class DrugLabelCache(Base):
+    __tablename__ = "drug_label_cache"
+
+    drug_name = Column(String, primary_key=True)
+    # NULL means openFDA has no label for this name.
+    label = Column(JSON, nullable=True)
+    fetched_at = Column(DateTime, server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
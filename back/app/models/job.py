@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, ForeignKey, JSON, Index, func, text
+from app.database.database import Base
+
+JOB_ACTIVE_STATUSES = ("queued", "running")
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="queued")
+    created_by_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
+    # Jobs sharing a lock_key run one at a time, see ux_jobs_active_lock.
+    lock_key = Column(String, nullable=True)
+    payload = Column(JSON, nullable=True)
+    progress = Column(Float, nullable=False, default=0.0)
+    message = Column(String, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    # The API process that owns the job keeps heartbeat_at fresh, see JobRunner._heartbeat.
+    worker_id = Column(String, nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    # Set when a cancel reaches a process that is not running the job.
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+
+    __table_args__ = (
+        Index(
+            "ux_jobs_active_lock", "lock_key", unique=True,
+            postgresql_where=text("status IN ('queued', 'running')"),
+            sqlite_where=text("status IN ('queued', 'running')"),
+        ),
+    )
@@ -10,7 +10,7 @@ class Meal(Base):
     __tablename__ = "meals"
 
     id = Column(Integer, primary_key=True, index=True)
-    plan_id = Column(Integer, ForeignKey("plans.id", ondelete="CASCADE"), nullable=False)
+    plan_id = Column(Integer, ForeignKey("plans.id", ondelete="CASCADE"), index=True, nullable=False)
     meal_type = Column(SAEnum(MealType), nullable=True)
     time = Column(Time, nullable=False)
     description = Column(String, nullable=True)
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, Time, ForeignKey, Boolean, String
+from sqlalchemy import Column, Integer, Time, ForeignKey, Boolean, String, DateTime, Index, DDL, event
+from sqlalchemy.sql import func
 from sqlalchemy import Enum as SAEnum
 from app.models.common import WithMealRelation
 from app.database.database import Base
@@ -8,7 +9,7 @@ class Medication(Base):
     __tablename__ = "medications"
 
     id = Column(Integer, primary_key=True, index=True)
-    plan_id = Column(Integer, ForeignKey("plans.id", ondelete="Cascade"), nullable=False)
+    plan_id = Column(Integer, ForeignKey("plans.id", ondelete="Cascade"), index=True, nullable=False)
     time = Column(Time, nullable=False)
     name = Column(String, nullable=False)
     taken = Column(Boolean, default=False)
@@ -25,4 +26,27 @@ class PolishMedication(Base):
     trade_name = Column(String, index=True, nullable=False)       
     active_substance = Column(String, index=True, nullable=True)  
     strength = Column(String, nullable=True)
-    form = Column(String, nullable=True)
\ No newline at end of file
+    form = Column(String, nullable=True)
+    # Stable key of the registry row and a hash of its content, used by the delta sync.
+    rpl_key = Column(String, index=True, nullable=True)
+    row_hash = Column(String(32), nullable=True)
+
+    __table_args__ = (
+        # Trigram index serves the ILIKE '%...%' and similarity searches, Postgres only.
+        Index("ix_polish_medications_trade_name_trgm", "trade_name",
+              postgresql_using="gin", postgresql_ops={"trade_name": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+    )
+
+event.listen(
+    PolishMedication.__table__, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+
+class RplSyncState(Base):
+    __tablename__ = "rpl_sync_state"
+
+    id = Column(Integer, primary_key=True)
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
+    row_count = Column(Integer, nullable=False, default=0)
+    synced_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
\ No newline at end of file
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, DateTime, Enum as SAEnum
+from sqlalchemy.sql import func
+from app.database.database import Base
+from app.models.common import WithMealRelation
+
+class MedicationTiming(Base):
+    __tablename__ = "medication_timing"
+
+    substance = Column(String, primary_key=True)
+    with_meal_relation = Column(SAEnum(WithMealRelation), nullable=False, default=WithMealRelation.unknown)
+    # openFDA set_id:version of the label the timing was derived from, NULL when there was no label.
+    label_version = Column(String, nullable=True)
+    computed_at = Column(DateTime, server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, func
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Index, func
 from sqlalchemy.orm import relationship
 from app.database.database import Base
 
@@ -13,5 +13,9 @@ class Notification(Base):
     message = Column(String, nullable=False) 
     is_read = Column(Boolean, default=False)
 
+    __table_args__ = (
+        Index("ix_notifications_user_read_sent", "user_id", "is_read", "sent_at"),
+    )
+
     recipient = relationship("User", foreign_keys=[user_id], back_populates="notifications_received")
     subject = relationship("User", foreign_keys=[related_user_id], back_populates="notifications_about")
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Date, ForeignKey, DateTime, Float
+from sqlalchemy import Column, Integer, Date, ForeignKey, DateTime, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database.database import Base
@@ -18,6 +18,10 @@ class Plan(Base):
     total_fat = Column(Float)
     total_carbohydrates = Column(Float)
 
+    __table_args__ = (
+        Index("ix_plans_user_id_day_start", "user_id", "day_start"),
+    )
+
     user = relationship(
         "User",
         back_populates="plans",
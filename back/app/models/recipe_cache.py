@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, DateTime, JSON
+from sqlalchemy.sql import func
+from app.database.database import Base
+
+class RecipeCache(Base):
+    __tablename__ = "recipe_cache"
+
+    recipe_id = Column(Integer, primary_key=True, autoincrement=False)
+    payload = Column(JSON, nullable=False)
+    fetched_at = Column(DateTime, server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
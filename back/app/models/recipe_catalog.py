@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index
+from sqlalchemy.sql import func
+from app.database.database import Base
+
+class CatalogRecipe(Base):
+    __tablename__ = "recipe_catalog"
+
+    recipe_id = Column(Integer, primary_key=True, autoincrement=False)
+    title = Column(String, nullable=False)
+    dish_type = Column(String, nullable=False)
+    calories = Column(Float, nullable=False)
+    protein = Column(Float, nullable=False, default=0)
+    fat = Column(Float, nullable=False, default=0)
+    carbohydrates = Column(Float, nullable=False, default=0)
+    diet_mask = Column(Integer, nullable=False, default=0)
+    intolerance_free_mask = Column(Integer, nullable=False, default=0)
+    ready_in_minutes = Column(Integer, nullable=True)
+    servings = Column(Integer, nullable=True)
+    source_url = Column(String, nullable=True)
+    image = Column(String, nullable=True)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_recipe_catalog_slot", "dish_type", "calories"),
+    )
+
+    def to_search_result(self) -> dict:
+        return {
+            "id": self.recipe_id,
+            "title": self.title,
+            "image": self.image,
+            "readyInMinutes": self.ready_in_minutes,
+            "servings": self.servings,
+            "sourceUrl": self.source_url,
+            "nutrition": {"nutrients": [
+                {"name": "Calories", "amount": self.calories},
+                {"name": "Protein", "amount": self.protein},
+                {"name": "Fat", "amount": self.fat},
+                {"name": "Carbohydrates", "amount": self.carbohydrates},
+            ]}
+        }
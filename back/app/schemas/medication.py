@@ -38,4 +38,9 @@ class DrugValidationResponse(DrugValidationRequest):
 class RplDownloadStats(BaseModel):
     total_processed: int
     added: int
-    errors: int
\ No newline at end of file
+    errors: int
+    mode: str = "full"
+    not_modified: bool = False
+    updated: int = 0
+    deleted: int = 0
+    unchanged: int = 0
\ No newline at end of file
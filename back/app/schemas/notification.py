@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 class RelatedUserResponse(BaseModel):
     id: int
@@ -22,4 +22,17 @@ class NotificationResponse(BaseModel):
     is_read: bool
     subject: Optional[RelatedUserResponse] = None
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class NotificationPage(BaseModel):
+    items: List[NotificationResponse]
+    next_cursor: Optional[str] = None
+
+class UnreadCountResponse(BaseModel):
+    unread: int
+
+class MarkReadRequest(BaseModel):
+    up_to_id: Optional[int] = None
+
+class MarkReadResponse(BaseModel):
+    updated: int
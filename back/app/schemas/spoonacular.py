@@ -53,6 +53,17 @@ class DailyPlanResponse(BaseModel):
     class Config:
         from_attributes=True
 
+class RecipeCacheStats(BaseModel):
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    db_hits: int
+    db_misses: int
+    db_entries: Optional[int] = None
+
 class WeeklyPlanResponse(BaseModel):
     week: Dict[str, DailyPlanResponse]
     class Config:
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from typing import Optional
+
+class PoolStats(BaseModel):
+    size: int
+    max_overflow: int
+    checked_out: Optional[int] = None
+    checked_in: Optional[int] = None
+    overflow: Optional[int] = None
+    checkouts: int
+    avg_wait_ms: float
+    max_wait_ms: float
+
+class DatabasePoolStats(BaseModel):
+    sync_engine: Optional[PoolStats] = None
+    # Empty until the first request that uses the async engine.
+    async_engine: Optional[PoolStats] = None
@@ -5,6 +5,10 @@ class Token(BaseModel):
     access_token: str
     token_type: str
 
+class TokenUser(BaseModel):
+    id: int
+    email: str
+
 class OAuth2LoginRequest(BaseModel):
     user_name: str
     password: str
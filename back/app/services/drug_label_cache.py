@@ -0,0 +1,89 @@
+import os
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from sqlalchemy.orm import Session
+from app.crud.drug_label_cache import get_cached_labels, save_cached_label, delete_cached_label
+from app.models.drug_label_cache import DrugLabelCache
+from app.utils.cache import TTLLRUCache
+
+DRUG_LABEL_CACHE_TTL_SECONDS = int(os.getenv('DRUG_LABEL_CACHE_TTL_SECONDS') or 30 * 24 * 3600)
+DRUG_LABEL_NEGATIVE_TTL_SECONDS = int(os.getenv('DRUG_LABEL_NEGATIVE_TTL_SECONDS') or 24 * 3600)
+DRUG_LABEL_CACHE_MAX_ENTRIES = int(os.getenv('DRUG_LABEL_CACHE_MAX_ENTRIES') or 512)
+
+# Only these parts of a label are read, the rest is dropped before caching.
+LABEL_SECTIONS = (
+    'set_id', 'version', 'effective_time', 'openfda', 'food_effect',
+    'dosage_and_administration', 'drug_interactions', 'patient_counseling_information',
+    'instructions_for_use', 'food_interactions', 'clinical_pharmacology', 'how_supplied',
+    'precautions', 'warnings', 'boxed_warning', 'warnings_and_cautions'
+)
+
+label_lru = TTLLRUCache(max_size=DRUG_LABEL_CACHE_MAX_ENTRIES, ttl=DRUG_LABEL_CACHE_TTL_SECONDS)
+
+def normalize_drug_name(drug_name: str) -> str:
+    return " ".join((drug_name or "").lower().split())
+
+def trim_label(label: Dict) -> Dict:
+    # Never empty, an empty dict is how a missing label is cached.
+    return {key: label[key] for key in LABEL_SECTIONS if key in label} or {'id': label.get('id')}
+
+class DrugLabelCacheService:
+    def __init__(self, db: Optional[Session] = None):
+        self.db = db
+
+    def _session(self) -> Session:
+        # Own short session: the cache is used in the middle of other work and must not
+        # commit or roll back whatever the caller has pending.
+        return Session(bind=self.db.get_bind())
+
+    def get(self, drug_name: str) -> Optional[Dict]:
+        key = normalize_drug_name(drug_name)
+        label = label_lru.get(key)
+        if label is not None or self.db is None:
+            return label
+
+        now = datetime.utcnow()
+        try:
+            with self._session() as db:
+                rows = get_cached_labels(db, [key], now)
+        except Exception as e:
+            logging.error(f"Drug label cache lookup failed: {e}")
+            return None
+        if not rows:
+            return None
+
+        row = rows[0]
+        # A missing label is cached as an empty dict so it can be told apart from a cache miss.
+        label = row.label or {}
+        label_lru.set(key, label, ttl=(row.expires_at - now).total_seconds())
+        return label
+
+    def put(self, drug_name: str, label: Optional[Dict]) -> Dict:
+        key = normalize_drug_name(drug_name)
+        label = trim_label(label) if label else {}
+        ttl = DRUG_LABEL_CACHE_TTL_SECONDS if label else DRUG_LABEL_NEGATIVE_TTL_SECONDS
+        label_lru.set(key, label, ttl=ttl)
+
+        if self.db is None:
+            return label
+        now = datetime.utcnow()
+        try:
+            with self._session() as db:
+                save_cached_label(db, DrugLabelCache(
+                    drug_name=key,
+                    label=label or None,
+                    fetched_at=now,
+                    expires_at=now + timedelta(seconds=ttl)
+                ))
+        except Exception as e:
+            logging.error(f"Failed to persist drug label for {key}: {e}")
+        return label
+
+    def invalidate(self, drug_name: str) -> bool:
+        key = normalize_drug_name(drug_name)
+        removed = label_lru.invalidate(key)
+        if self.db is not None:
+            with self._session() as db:
+                removed = delete_cached_label(db, key) > 0 or removed
+        return removed
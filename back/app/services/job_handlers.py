@@ -0,0 +1,65 @@
+import os
+from datetime import date, timedelta
+from app.models.oauth2 import OAuth2Account
+from app.crud.daily_adherence import backfill_daily_adherence
+from app.services.google_calendar import GoogleCalendarService
+from app.services.jobs import JobContext, job_handler
+from app.services.plan import PlanCreationService
+from app.services.rpl_service import RPLService
+from app.utils.threads import run_in_thread
+
+ADHERENCE_BACKFILL_CHUNK_DAYS = int(os.getenv('ADHERENCE_BACKFILL_CHUNK_DAYS') or 31)
+
+@job_handler("rpl_update")
+async def run_rpl_update(context: JobContext, payload: dict):
+    stats = await RPLService(db=context.db).update_database_from_rpl(
+        mode=payload.get("mode", "delta"), progress=context.report, cancel_check=context.check_cancelled
+    )
+    return stats.model_dump()
+
+@job_handler("plan_generation")
+async def run_plan_generation(context: JobContext, payload: dict):
+    context.report(0.05, "Generating plans")
+    plans = await PlanCreationService(context.db).generate_and_save_plans(
+        created_by_id=payload["created_by_id"],
+        user_id=payload["user_id"],
+        start_date=date.fromisoformat(payload["start_date"]),
+        days=payload["days"]
+    )
+    return {"plan_ids": [plan.id for plan in plans]}
+
+@job_handler("adherence_backfill")
+async def run_adherence_backfill(context: JobContext, payload: dict):
+    start, end = date.fromisoformat(payload["start"]), date.fromisoformat(payload["end"])
+    days = (end - start).days + 1
+    # One transaction per chunk keeps each recount short, and a cancel lands between chunks.
+    for offset in range(0, days, ADHERENCE_BACKFILL_CHUNK_DAYS):
+        chunk_start = start + timedelta(days=offset)
+        chunk_end = min(end, chunk_start + timedelta(days=ADHERENCE_BACKFILL_CHUNK_DAYS - 1))
+        context.report(offset / days, f"Recounting daily adherence from {chunk_start.isoformat()}")
+        await run_in_thread(backfill_daily_adherence, context.db, chunk_start, chunk_end)
+    return {"start": payload["start"], "end": payload["end"]}
+
+@job_handler("calendar_sync")
+async def run_calendar_sync(context: JobContext, payload: dict):
+    db = context.db
+    target_date = date.fromisoformat(payload["plan_date"])
+    creds_db = db.query(OAuth2Account).filter(
+        OAuth2Account.user_id == payload["user_id"],
+        OAuth2Account.provider == "google_calendar"
+    ).first()
+    if not creds_db:
+        raise ValueError("Google Calendar not connected")
+
+    context.report(0.1, "Loading plan")
+    plan = await PlanCreationService(db).get_plan_by_date(user_id=payload["target_user_id"], plan_date=target_date)
+    if not plan or (not plan.meals and not plan.medications):
+        raise ValueError(f"No plan found for {target_date}")
+
+    context.report(0.3, "Creating calendar events")
+    # The Google client is blocking.
+    await run_in_thread(
+        GoogleCalendarService(db).create_calendar_events,
+        payload["target_user_id"], plan, creds_db, owner_name=payload.get("owner_name")
+    )
+    return {"plan_date": target_date.isoformat()}
@@ -0,0 +1,196 @@
+import os
+import socket
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from typing import Awaitable, Callable, Dict, Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.crud.job import create_job, get_job, get_active_job, update_job, touch_jobs, fail_stale_jobs
+from app.database.database import local_session
+from app.models.job import Job, JOB_ACTIVE_STATUSES
+
+JOB_WORKERS = int(os.getenv('JOB_WORKERS') or 2)
+JOB_HEARTBEAT_SECONDS = float(os.getenv('JOB_HEARTBEAT_SECONDS') or 30)
+# Active jobs without a heartbeat for this long belong to a dead process and are failed.
+JOB_STALE_SECONDS = float(os.getenv('JOB_STALE_SECONDS') or 120)
+
+class JobCancelled(Exception):
+    pass
+
+class JobContext:
+    def __init__(self, runner: "JobRunner", job_id: int, db: Session):
+        self.runner = runner
+        self.job_id = job_id
+        self.db = db
+        self.cancel_requested = False
+
+    def check_cancelled(self):
+        # Safe to call from worker threads, blocking steps use it to stop between chunks.
+        if self.cancel_requested:
+            raise JobCancelled()
+
+    def report(self, progress: float, message: Optional[str] = None):
+        self.check_cancelled()
+        self.runner._update_later(self.job_id, progress=max(0.0, min(1.0, progress)), message=message)
+
+JobHandler = Callable[[JobContext, dict], Awaitable[Optional[dict]]]
+JOB_HANDLERS: Dict[str, JobHandler] = {}
+
+def job_handler(kind: str):
+    def register(func: JobHandler) -> JobHandler:
+        JOB_HANDLERS[kind] = func
+        return func
+    return register
+
+def _now():
+    return datetime.now(timezone.utc)
+
+class JobRunner:
+    # Runs jobs inside the API process. Each job gets its own session. Status updates go
+    # through short-lived sessions on one thread, so they never share a session with the
+    # job, never block the event loop and are applied in the order they were made.
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = workers
+        self.session_factory = local_session
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks = []
+        self._running: Dict[int, asyncio.Task] = {}
+        self._contexts: Dict[int, JobContext] = {}
+        self._status_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-status")
+
+    async def start(self):
+        if self._queue is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        try:
+            await self._db(fail_stale_jobs, _now() - timedelta(seconds=JOB_STALE_SECONDS))
+        except Exception as e:
+            logging.error(f"Failed to clean up interrupted jobs: {e}")
+        self._queue = asyncio.Queue()
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._worker_tasks.append(asyncio.create_task(self._heartbeat()))
+
+    async def stop(self):
+        # Jobs first: they unwind only once their blocking steps return, and the workers
+        # still have to record their final status.
+        for job_id, task in list(self._running.items()):
+            self._contexts[job_id].cancel_requested = True
+            task.cancel()
+        await asyncio.gather(*self._running.values(), return_exceptions=True)
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._queue = None
+
+    def enqueue(self, db: Session, kind: str, payload: Optional[dict] = None,
+                created_by_id: Optional[int] = None, lock_key: Optional[str] = None) -> Job:
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind '{kind}'")
+        # Checked before the row exists, a queued row nobody runs would hold its lock_key forever.
+        if self._queue is None:
+            raise RuntimeError("Job runner is not started")
+        if lock_key:
+            active = get_active_job(db, lock_key)
+            if active:
+                return active
+        try:
+            job = create_job(db, kind=kind, payload=payload, created_by_id=created_by_id,
+                             lock_key=lock_key, worker_id=self.worker_id)
+        except IntegrityError:
+            # Lost the race against another enqueue with the same lock_key.
+            db.rollback()
+            return get_active_job(db, lock_key)
+        # Sync routes call this from the threadpool, asyncio.Queue is not thread-safe.
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, job.id)
+        return job
+
+    def cancel(self, db: Session, job: Job) -> Job:
+        if job.status not in JOB_ACTIVE_STATUSES:
+            return job
+        task = self._running.get(job.id)
+        if task:
+            self._contexts[job.id].cancel_requested = True
+            self._loop.call_soon_threadsafe(task.cancel)
+        elif not update_job(db, job.id, expected_status="queued", status="cancelled", finished_at=_now()):
+            # Running in another process, its heartbeat picks the request up.
+            update_job(db, job.id, cancel_requested=True)
+        db.refresh(job)
+        return job
+
+    def _write(self, func, *args, **kwargs):
+        with self.session_factory() as db:
+            return func(db, *args, **kwargs)
+
+    async def _db(self, func, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(
+            self._status_executor, partial(self._write, func, *args, **kwargs)
+        )
+
+    def _update_later(self, job_id: int, **fields):
+        # Progress reports are fire and forget, the executor keeps them ahead of the final status.
+        self._status_executor.submit(self._write, update_job, job_id, **fields)
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+            try:
+                for job_id in await self._db(touch_jobs, self.worker_id, _now()):
+                    task = self._running.get(job_id)
+                    if task:
+                        self._contexts[job_id].cancel_requested = True
+                        task.cancel()
+                await self._db(fail_stale_jobs, _now() - timedelta(seconds=JOB_STALE_SECONDS))
+            except Exception as e:
+                logging.error(f"Job heartbeat failed: {e}")
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Job {job_id} crashed the worker: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: int):
+        job = await self._db(get_job, job_id)
+        if job is None or job.status != "queued":
+            return
+        kind, payload = job.kind, job.payload or {}
+        started = await self._db(update_job, job_id, expected_status="queued", status="running",
+                                 started_at=_now(), heartbeat_at=_now(), worker_id=self.worker_id)
+        if not started:
+            return
+
+        with self.session_factory() as db:
+            context = JobContext(self, job_id, db)
+            task = asyncio.create_task(JOB_HANDLERS[kind](context, payload))
+            self._running[job_id] = task
+            self._contexts[job_id] = context
+            try:
+                # Handlers run blocking steps through run_in_thread, so by the time the task
+                # is done no thread is using db any more.
+                result = await task
+                await self._db(update_job, job_id, status="succeeded", progress=1.0, result=result, finished_at=_now())
+            except (asyncio.CancelledError, JobCancelled):
+                await self._db(update_job, job_id, status="cancelled", finished_at=_now())
+                if not task.cancelled() and not context.cancel_requested:
+                    raise
+            except Exception as e:
+                logging.error(f"Job {job_id} ({kind}) failed: {e}")
+                db.rollback()
+                await self._db(update_job, job_id, status="failed", error=str(e)[:1000], finished_at=_now())
+            finally:
+                self._running.pop(job_id, None)
+                self._contexts.pop(job_id, None)
+
+job_runner = JobRunner()
@@ -0,0 +1,115 @@
+import os
+import time
+import asyncio
+import logging
+import unicodedata
+from bisect import bisect_left
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.crud.rpl import get_rpl_sync_state
+from app.database.database import local_session
+from app.models.medication import PolishMedication
+
+MEDICATION_INDEX_REFRESH_SECONDS = float(os.getenv('MEDICATION_INDEX_REFRESH_SECONDS') or 300)
+
+# "ł" has no decomposition, so NFKD alone would not fold it.
+_EXTRA_FOLDS = str.maketrans({"ł": "l", "đ": "d", "ø": "o", "ß": "ss"})
+
+def fold_name(text: str) -> str:
+    text = unicodedata.normalize("NFKD", (text or "").lower().translate(_EXTRA_FOLDS))
+    return " ".join("".join(c for c in text if not unicodedata.combining(c)).split())
+
+# Autocomplete over trade names and active substances of the RPL registry.
+# Folded names are kept in one sorted list, so a prefix lookup is a bisect plus a
+# short scan. A rebuild swaps in a new snapshot, readers never need a lock.
+# Every process keeps its own copy, a periodic check of rpl_sync_state reloads it
+# when an import ran in another worker.
+class MedicationPrefixIndex:
+    def __init__(self):
+        self.session_factory = local_session
+        self.logger = logging.getLogger(__name__)
+        self._snapshot: Optional[Tuple[List[str], List[str]]] = None
+        self._version = None
+        self._task = None
+
+    @property
+    def ready(self) -> bool:
+        # Empty means the registry was never imported, search keeps using the database.
+        return bool(self._snapshot and self._snapshot[0])
+
+    def __len__(self) -> int:
+        return len(self._snapshot[0]) if self._snapshot else 0
+
+    def build(self, names: Iterable[str]):
+        entries = {}
+        for name in names:
+            if not name or name == "N/A":
+                continue
+            name = " ".join(name.split())
+            key = fold_name(name)
+            # Spellings that fold to the same key collapse into one suggestion.
+            if key and key not in entries:
+                entries[key] = name
+        keys = sorted(entries)
+        self._snapshot = (keys, [entries[key] for key in keys])
+
+    def rebuild(self, db: Optional[Session] = None):
+        if db is None:
+            with self.session_factory() as session:
+                return self._load(session)
+        self._load(db)
+
+    def refresh_if_stale(self) -> bool:
+        with self.session_factory() as session:
+            if self.ready and self._registry_version(session) == self._version:
+                return False
+            self._load(session)
+        return True
+
+    @staticmethod
+    def _registry_version(db: Session):
+        state = get_rpl_sync_state(db)
+        return (state.synced_at, state.row_count) if state else None
+
+    def _load(self, db: Session):
+        started = time.perf_counter()
+        # Read first, an import committing in between only causes one more reload.
+        version = self._registry_version(db)
+        rows = db.execute(select(PolishMedication.trade_name, PolishMedication.active_substance)).all()
+        self.build(name for row in rows for name in row)
+        self._version = version
+        self.logger.info(f"Medication index rebuilt: {len(self)} names in {time.perf_counter() - started:.2f}s")
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(MEDICATION_INDEX_REFRESH_SECONDS)
+            try:
+                await asyncio.to_thread(self.refresh_if_stale)
+            except Exception as e:
+                self.logger.error(f"Failed to refresh medication index: {e}")
+
+    def search(self, prefix: str, limit: int = 10) -> List[str]:
+        snapshot = self._snapshot
+        key = fold_name(prefix)
+        if snapshot is None or not key or limit <= 0:
+            return []
+        keys, names = snapshot
+        results = []
+        i = bisect_left(keys, key)
+        while i < len(keys) and len(results) < limit and keys[i].startswith(key):
+            results.append(names[i])
+            i += 1
+        return results
+
+medication_index = MedicationPrefixIndex()
@@ -1,3 +1,4 @@
+import asyncio
 import httpx
 import logging
 import os
@@ -7,37 +8,63 @@ from app.schemas.medication import (MedicationCreate, MedicationResponse,
                                     MedicationListResponse, DrugValidationResponse)
 from app.schemas.drug_interaction import (DrugInteractionCreate, DrugInteractionResponse)
 from app.crud.medication import create_medication
-from app.crud.drug_interaction import get_interaction, create_new_drug_interaction
+from app.crud.daily_adherence import refresh_daily_adherence
+from app.crud.drug_interaction import canonical_pair, get_interactions_for_pairs, create_drug_interactions_bulk
 from app.models.common import WithMealRelation
 from app.services.rpl_service import RPLService
+from app.services.drug_label_cache import DrugLabelCacheService, normalize_drug_name
+from app.services.medication_timing import MedicationTimingCacheService, label_version
+from app.services.medication_index import medication_index, fold_name
+from app.utils.cache import TTLLRUCache
+from app.utils.http_client import get_http_client
+from app.utils.label_classifier import classify_meal_timing, determine_severity, determine_severity_many
+
+OPENFDA_MAX_CONCURRENCY = int(os.getenv('OPENFDA_MAX_CONCURRENCY') or 4)
+INTERACTION_LABEL_SECTIONS = ('drug_interactions', 'warnings', 'precautions', 'boxed_warning', 'warnings_and_cautions')
+OPENFDA_SEARCH_DEADLINE_SECONDS = float(os.getenv('OPENFDA_SEARCH_DEADLINE_SECONDS') or 0.8)
+OPENFDA_SEARCH_CACHE_TTL_SECONDS = int(os.getenv('OPENFDA_SEARCH_CACHE_TTL_SECONDS') or 24 * 3600)
+
+# openFDA autocomplete responses keyed by folded query and limit, shared across requests.
+fda_search_lru = TTLLRUCache(max_size=2048, ttl=OPENFDA_SEARCH_CACHE_TTL_SECONDS)
+_fda_searches: Dict[tuple, asyncio.Task] = {}
 
 class DrugInteractionService:
     def __init__(self, db: Session, fda_api_key: Optional[str]):
         self.db = db
         self.openfda_base = "https://api.fda.gov/drug"
         self.api_key = fda_api_key
+        self.label_cache = DrugLabelCacheService(db=db)
+        self.timing_cache = MedicationTimingCacheService(db=db)
+        self._label_fetches: Dict[str, asyncio.Task] = {}
 
-    async def _make_request(self, url: str, params: Dict[str, Any] = None):
+    async def _make_request(self, url: str, params: Dict[str, Any] = None, raise_errors: bool = False):
         if params is None:
             params = {}
         if self.api_key and 'api_key' not in params:
             params['api_key'] = self.api_key
             
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            try:
-                response = await client.get(url, params=params)
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 404:
-                    return None
-                logging.error(f"HTTP Error {e.response.status_code}: {e.response.text}")
-                return None
-            except Exception as e:
-                logging.error(f"Request error: {str(e)}")
+        client = get_http_client()
+        try:
+            response = await client.get(url, params=params)
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
                 return None
+            logging.error(f"HTTP Error {e.response.status_code}: {e.response.text}")
+            if raise_errors:
+                raise
+            return None
+        except Exception as e:
+            logging.error(f"Request error: {str(e)}")
+            if raise_errors:
+                raise
+            return None
 
     async def validate_drug_name(self, drug_name: str) -> bool:
+        return await self._get_drug_label_info(drug_name) is not None
+
+    async def _fetch_drug_label(self, drug_name: str) -> Optional[Dict]:
         endpoint = f"{self.openfda_base}/label.json"
         search_queries = [
             f'openfda.brand_name:"{drug_name}"', f'openfda.generic_name:"{drug_name}"',
@@ -45,173 +72,146 @@ class DrugInteractionService:
         ]
         
         for search_query in search_queries:
-            data = await self._make_request(endpoint, params={"search": search_query, "limit": 1})
-            if data and data.get('results'):
-                return True
-        return False
-    
-    async def _get_drug_label_info(self, drug_name: str) -> Optional[Dict]:
-        endpoint = f"{self.openfda_base}/label.json"
-        search_queries = [
-            f'openfda.brand_name:"{drug_name}"', f'openfda.generic_name:"{drug_name}"',
-            f'openfda.brand_name:{drug_name}', f'openfda.generic_name:{drug_name}'
-        ]
-        
-        for search_query in search_queries:
-            data = await self._make_request(endpoint, params={"search": search_query, "limit": 1})
+            data = await self._make_request(endpoint, params={"search": search_query, "limit": 1}, raise_errors=True)
             if data and data.get('results'):
                 return data['results'][0]
         return None
+
+    async def _load_drug_label(self, drug_name: str) -> Optional[Dict]:
+        try:
+            label = await self._fetch_drug_label(drug_name)
+        except Exception:
+            # Transient failure, don't remember it as "no label".
+            return None
+        return self.label_cache.put(drug_name, label) or None
+
+    async def _get_drug_label_info(self, drug_name: str) -> Optional[Dict]:
+        cached = self.label_cache.get(drug_name)
+        if cached is not None:
+            return cached or None
+
+        # Concurrent lookups of the same drug wait for one openFDA fetch.
+        key = normalize_drug_name(drug_name)
+        task = self._label_fetches.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load_drug_label(drug_name))
+            self._label_fetches[key] = task
+            task.add_done_callback(lambda _: self._label_fetches.pop(key, None))
+        return await task
     
-    async def _check_interaction_in_label(self, drug_name: str, other_drug_name: str) -> Optional[str]:
-        label_data = await self._get_drug_label_info(drug_name)
+    def _scan_label_for_drugs(self, label_data: Optional[Dict], other_drug_names: List[str]) -> Dict[str, str]:
+        # Maps every other drug mentioned in the label to the first sentence that mentions it.
         if not label_data:
-            return None
-        
-        sections = ['drug_interactions', 'warnings', 'precautions', 'boxed_warning', 'warnings_and_cautions']
-        other_drug_lower = other_drug_name.lower()
-        
-        for section in sections:
-            if section in label_data:
-                content = label_data[section]
-                if isinstance(content, list):
-                    content = ' '.join(content)
-                
-                if isinstance(content, str) and other_drug_lower in content.lower():
-                    sentences = content.split('.')
-                    for sentence in sentences:
-                        if other_drug_lower in sentence.lower():
-                            return sentence.strip()[:300]
-        return None
+            return {}
+
+        mentions = {}
+        for section in INTERACTION_LABEL_SECTIONS:
+            if section not in label_data:
+                continue
+            content = label_data[section]
+            if isinstance(content, list):
+                content = ' '.join(content)
+            if not isinstance(content, str):
+                continue
+
+            content_lower = content.lower()
+            pending = [name for name in other_drug_names if name not in mentions and name in content_lower]
+            if not pending:
+                continue
+            for sentence in content.split('.'):
+                sentence_lower = sentence.lower()
+                for name in pending:
+                    if name not in mentions and name in sentence_lower:
+                        mentions[name] = sentence.strip()[:300]
+        return mentions
+
+    async def _get_drug_labels(self, drug_names: List[str]) -> Dict[str, Optional[Dict]]:
+        semaphore = asyncio.Semaphore(OPENFDA_MAX_CONCURRENCY)
+
+        async def fetch(name: str):
+            async with semaphore:
+                try:
+                    return await self._get_drug_label_info(name)
+                except Exception as e:
+                    logging.error(f"Failed to fetch label for {name}: {e}")
+                    return None
+
+        labels = await asyncio.gather(*(fetch(name) for name in drug_names))
+        return dict(zip(drug_names, labels))
 
     async def check_drug_interaction(self, drug_names: List[str]) -> List[DrugInteractionResponse]:
-        if len(drug_names) < 2:
+        names = list(dict.fromkeys(name.lower() for name in drug_names if name))
+        if len(names) < 2:
             return []
-        
+
+        pairs = [canonical_pair(names[i], names[j]) for i in range(len(names)) for j in range(i + 1, len(names))]
+        # Own short sessions: callers check interactions in the middle of their own
+        # transaction, which must not be committed or rolled back from here.
+        with Session(bind=self.db.get_bind()) as db:
+            known = {
+                (interaction.drug1, interaction.drug2): interaction
+                for interaction in get_interactions_for_pairs(db, pairs)
+            }
+
+        missing = [pair for pair in pairs if pair not in known]
+        if missing:
+            try:
+                new_interactions = await self._fetch_interactions_from_api(missing)
+                with Session(bind=self.db.get_bind()) as db:
+                    for interaction in create_drug_interactions_bulk(db, new_interactions):
+                        known[(interaction.drug1, interaction.drug2)] = interaction
+            except Exception as e:
+                logging.error(f"Failed to fetch interactions: {e}")
+
         interactions_list = []
-        checked_pairs = set()
-        
-        for i in range(len(drug_names)):
-            for j in range(i + 1, len(drug_names)):
-                drug1, drug2 = drug_names[i], drug_names[j]
-                pair_key = tuple(sorted([drug1.lower(), drug2.lower()]))
-                
-                if pair_key in checked_pairs:
-                    continue
-                checked_pairs.add(pair_key)
-                
-                db_interaction = get_interaction(db=self.db, drug1=drug1, drug2=drug2)
-                if not db_interaction:
-                    try:
-                        api_result = await self._fetch_interaction_from_api(drug1=drug1, drug2=drug2)
-                        db_interaction = create_new_drug_interaction(db=self.db, interaction_data=api_result)
-                        self.db.flush()
-                    except Exception as e:
-                        logging.error(f"Failed to fetch interaction: {e}")
-                        continue
-                
-                if db_interaction and db_interaction.description:
-                    interactions_list.append(DrugInteractionResponse(
-                        medication_1=db_interaction.drug1,
-                        medication_2=db_interaction.drug2,
-                        severity=db_interaction.severity,
-                        description=db_interaction.description
-                    ))
+        for pair in pairs:
+            db_interaction = known.get(pair)
+            if db_interaction and db_interaction.description:
+                interactions_list.append(DrugInteractionResponse(
+                    medication_1=db_interaction.drug1,
+                    medication_2=db_interaction.drug2,
+                    severity=db_interaction.severity,
+                    description=db_interaction.description
+                ))
         return interactions_list
     
     def _analyze_meal_timing(self, description: str) -> WithMealRelation:
-        if not description or len(description.strip()) < 5:
-            return WithMealRelation.unknown
-        
-        desc = description.lower()
-        
-        contradictions = [
-            'regardless of food', 'with or without food', 'does not matter',
-            'food has no effect', 'not affected by food', 'no food effect'
-        ]
-        for pattern in contradictions:
-            if pattern in desc:
-                return WithMealRelation.unknown
-        
-        timing_scores = {'empty_stomach': 0, 'before': 0, 'during': 0, 'after': 0}
-        
-        empty_stomach_patterns = {
-            'on an empty stomach': 100, 'empty stomach': 100, 'do not take with food': 100,
-            'must not be taken with food': 95, 'without food': 85, 'food decreases absorption': 80,
-            'absorption decreased by food': 80, 'fasting': 70, 'take on empty': 60,
-            'at least 1 hour before food': 90, 'at least 2 hours before food': 95,
-            'at least 30 minutes before food': 85, 'away from food': 75, 'separate from food': 70,
-            'avoid food': 80, 'food may reduce absorption': 75, 'reduced bioavailability with food': 80,
-            'avoid taking with food': 85, 'should not be taken with food': 90
-        }
-        before_patterns = {
-            '1 hour before meals': 100, 'one hour before meals': 100, '30 minutes before meals': 95,
-            'thirty minutes before': 95, 'at least 1 hour before': 95, 'before meals': 80,
-            'before eating': 80, 'prior to meals': 75, 'morning before breakfast': 80,
-            'take before': 70, '15 minutes before meals': 90, 'half an hour before': 95,
-            'on arising, before breakfast': 85, 'at least 30 minutes before': 85
-        }
-        during_patterns = {
-            'with food': 100, 'with meals': 100, 'take with food': 95, 'should be taken with food': 95,
-            'during meals': 85, 'with breakfast': 85, 'with dinner': 85, 'with lunch': 85,
-            'food increases absorption': 75, 'to minimize stomach upset': 65, 'with fatty meal': 80,
-            'with high-fat meal': 85, 'to reduce gastrointestinal': 70, 'to avoid nausea': 65,
-            'administer with food': 90, 'take alongside food': 85, 'better absorbed with food': 80,
-            'improved absorption with food': 80, 'food enhances bioavailability': 85,
-            'to reduce stomach irritation': 70, 'with a meal': 95
-        }
-        after_patterns = {
-            '2 hours after meals': 100, 'two hours after meals': 100, '1 hour after meals': 95,
-            'after meals': 80, 'after eating': 80, 'following meals': 75, 'post-meal': 70,
-            'at least 2 hours after': 95, 'wait 1 hour after eating': 90, 'at least 1 hour after': 90
-        }
-        
-        all_patterns = [
-            (empty_stomach_patterns, 'empty_stomach'), (before_patterns, 'before'),
-            (during_patterns, 'during'), (after_patterns, 'after')
-        ]
-        
-        for patterns_dict, category in all_patterns:
-            sorted_patterns = sorted(patterns_dict.items(), key=lambda x: len(x[0]), reverse=True)
-            for pattern, points in sorted_patterns:
-                if pattern in desc:
-                    timing_scores[category] += points
-
-        if 'do not take with food' in desc or 'avoid taking with food' in desc:
-            timing_scores['during'] = 0
-            timing_scores['after'] = 0
-        if timing_scores['empty_stomach'] >= 80:
-            timing_scores['before'] = 0
-
-        context_bonuses = [
-            (['absorption', 'decreased', 'food'], 'empty_stomach', 30),
-            (['absorption', 'increased', 'food'], 'during', 30),
-            (['bioavailability', 'reduced', 'food'], 'empty_stomach', 30),
-            (['bioavailability', 'increased', 'food'], 'during', 30),
-            (['stomach', 'upset'], 'during', 20),
-            (['hour', 'before'], 'before', 15),
-            (['hour', 'after'], 'after', 15),
-        ]
-        for keywords, category, bonus in context_bonuses:
-            if all(kw in desc for kw in keywords):
-                timing_scores[category] += bonus
-
-        max_score = max(timing_scores.values())
-        total_score = sum(timing_scores.values())
-        confidence = max_score / total_score if total_score > 0 else 0.0
-        
-        if max_score < 50 or confidence < 0.4:
-            return WithMealRelation.unknown
-            
-        winner = max(timing_scores.items(), key=lambda x: x[1])[0]
-        mapping = {
-            'empty_stomach': WithMealRelation.empty_stomach, 'before': WithMealRelation.before,
-            'during': WithMealRelation.during, 'after': WithMealRelation.after
-        }
-        return mapping.get(winner, WithMealRelation.unknown)
+        return classify_meal_timing(description)
 
     async def get_medication_timing(self, med_name: str) -> WithMealRelation:
-        label_data = await self._get_drug_label_info(drug_name=med_name)
+        timings = await self.get_medication_timings([med_name])
+        return timings.get(med_name, WithMealRelation.unknown)
+
+    async def get_medication_timings(self, med_names: List[str]) -> Dict[str, WithMealRelation]:
+        keys = {name: normalize_drug_name(name) for name in med_names}
+        # Only labels already cached are consulted, a refreshed label invalidates the timing
+        # computed from the old one.
+        versions = {}
+        for key in dict.fromkeys(keys.values()):
+            label = self.label_cache.get(key)
+            if label is not None:
+                versions[key] = label_version(label)
+        known = self.timing_cache.get_many(list(keys.values()), versions)
+
+        missing = list(dict.fromkeys(key for key in keys.values() if key not in known))
+        if missing:
+            labels = await self._get_drug_labels(missing)
+            computed = {}
+            for key in missing:
+                timing = self._timing_from_label(labels[key])
+                if timing == WithMealRelation.unknown:
+                    logging.info(f"Unknown meal timing for {key}")
+                    if labels[key] is None and self.label_cache.get(key) is None:
+                        # The label fetch failed, try again next time instead of remembering "unknown".
+                        known[key] = timing
+                        continue
+                computed[key] = timing
+            self.timing_cache.put_many(computed, {key: label_version(labels[key]) for key in computed})
+            known.update(computed)
+
+        return {name: known.get(key, WithMealRelation.unknown) for name, key in keys.items()}
+
+    def _timing_from_label(self, label_data: Optional[Dict]) -> WithMealRelation:
         if not label_data:
             return WithMealRelation.unknown
             
@@ -234,78 +234,59 @@ class DrugInteractionService:
                 elif isinstance(content, str):
                     description_parts.append(content)
         
-        result = self._analyze_meal_timing(" ".join(description_parts))
-        
-        if result == WithMealRelation.unknown:
-            logging.info(f"Unknown meal timing for {med_name}")
-        
-        return result
+        return self._analyze_meal_timing(" ".join(description_parts))
         
     def _determine_severity(self, description: str) -> str:
-        if not description or len(description.strip()) < 10:
-            return "Unknown"
-        
-        description_lower = description.lower()
-        risk_score = 0
-        
-        critical_patterns = {
-            'contraindicated': 100, 'do not use together': 100, 'must not be used': 100,
-            'life-threatening': 100, 'fatal': 90, 'death': 90, 'cardiac arrest': 100,
-            'anaphylaxis': 90, 'severe bleeding': 85, 'hemorrhage': 80, 'stroke': 80
-        }
-        high_risk_patterns = {
-            'significant interaction': 60, 'serious': 65, 'severe': 70, 'avoid': 60,
-            'should not': 55, 'increased bleeding': 70, 'seizure': 65, 'liver damage': 70,
-            'kidney damage': 70, 'renal failure': 75, 'significantly increases': 55
-        }
-        moderate_risk_patterns = {
-            'monitor': 30, 'caution': 25, 'use with caution': 30, 'may increase': 25,
-            'may decrease': 25, 'dose adjustment': 35, 'reduced effectiveness': 30
-        }
-        low_risk_patterns = {'minor': 10, 'mild': 10, 'unlikely': 5, 'possible': 10}
-        
-        all_patterns = {**critical_patterns, **high_risk_patterns, **moderate_risk_patterns, **low_risk_patterns}
-        sorted_patterns = sorted(all_patterns.items(), key=lambda x: len(x[0]), reverse=True)
-        
-        for pattern, points in sorted_patterns:
-            if pattern in description_lower:
-                risk_score += points
-                
-        danger_combinations = [
-            (['bleeding', 'anticoagulant'], 30), (['bleeding', 'nsaid'], 25),
-            (['prolonged', 'qt'], 40), (['serotonin', 'syndrome'], 50)
-        ]
-        for keywords, bonus in danger_combinations:
-            if all(k in description_lower for k in keywords):
-                risk_score += bonus
-                
-        if risk_score >= 100: return "Critical"
-        if risk_score >= 50: return "High"
-        if risk_score >= 20: return "Moderate"
-        if risk_score >= 1: return "Low"
-        return "Unknown"
+        return determine_severity(description)
     
-    async def _fetch_interaction_from_api(self, drug1: str, drug2: str):
-        desc1 = await self._check_interaction_in_label(drug1, drug2)
-        desc2 = await self._check_interaction_in_label(drug2, drug1)
-        description = desc1 or desc2
-
-        if description:
-            return DrugInteractionCreate(
-                drug1=drug1, drug2=drug2, 
-                severity=self._determine_severity(description), description=description
-            )
-        return DrugInteractionCreate(
-            drug1=drug1, drug2=drug2, severity="None", description=None
-        )
+    async def _fetch_interactions_from_api(self, pairs: List[tuple]) -> List[DrugInteractionCreate]:
+        partners: Dict[str, List[str]] = {}
+        for drug1, drug2 in pairs:
+            partners.setdefault(drug1, []).append(drug2)
+            partners.setdefault(drug2, []).append(drug1)
+
+        labels = await self._get_drug_labels(list(partners))
+        # One pass over each label finds every partner drug it mentions.
+        mentions = {drug: self._scan_label_for_drugs(labels[drug], others) for drug, others in partners.items()}
+
+        descriptions = [mentions[drug1].get(drug2) or mentions[drug2].get(drug1) for drug1, drug2 in pairs]
+        severities = iter(determine_severity_many(d for d in descriptions if d))
+
+        results = []
+        for (drug1, drug2), description in zip(pairs, descriptions):
+            if description:
+                results.append(DrugInteractionCreate(
+                    drug1=drug1, drug2=drug2, severity=next(severities), description=description
+                ))
+            else:
+                results.append(DrugInteractionCreate(
+                    drug1=drug1, drug2=drug2, severity="None", description=None
+                ))
+        return results
         
     async def search_medications(self, query: str, limit: int = 5):
-        if not query or len(query) < 2:
+        query = (query or "").strip()
+        if len(query) < 2:
             return []
-        
+
+        key = (fold_name(query), limit)
+        cached = fda_search_lru.get(key)
+        if cached is not None:
+            return cached
+        task = _fda_searches.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_medication_names(query, limit))
+            _fda_searches[key] = task
+            task.add_done_callback(lambda _: _fda_searches.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _fetch_medication_names(self, query: str, limit: int):
         endpoint = f"{self.openfda_base}/label.json"
         search_query = f'(openfda.brand_name:"{query}*" OR openfda.generic_name:{query}*)'
         data = await self._make_request(endpoint, {"search": search_query, "limit": limit})
+        if data is None:
+            # None is either a 404 (no match) or a failed request, neither is cached.
+            return []
         
         results = []
         if data and "results" in data:
@@ -317,6 +298,7 @@ class DrugInteractionService:
         clean_result = sorted(list(set(
             [r.title() for r in results if r.lower().startswith(query.lower())]
         )))[:limit]
+        fda_search_lru.set((fold_name(query), limit), clean_result)
         return clean_result
 
 class MedicationService:
@@ -330,14 +312,15 @@ class MedicationService:
         interaction_check_names = []
         substance_to_trade_name = {}
 
-        for med_data in medications_data:
-            active_substance = self.rpl_service.get_active_substance(med_data.name) 
-            api_search_name = active_substance if active_substance else med_data.name
-            
+        active_substances = [self.rpl_service.get_active_substance(med_data.name) for med_data in medications_data]
+        search_names = [substance or med_data.name for substance, med_data in zip(active_substances, medications_data)]
+        timings = await self.interaction_checker.get_medication_timings(search_names)
+
+        for med_data, active_substance, api_search_name in zip(medications_data, active_substances, search_names):
             substance_to_trade_name[api_search_name] = med_data.name
             interaction_check_names.append(api_search_name)
             
-            timing = await self.interaction_checker.get_medication_timing(api_search_name)
+            timing = timings[api_search_name]
             
             med_dict = med_data.model_dump()
             if med_dict.get('with_meal_relation') == WithMealRelation.unknown and timing != WithMealRelation.unknown:
@@ -352,6 +335,7 @@ class MedicationService:
             saved_medications.append(MedicationResponse.model_validate(db_med))
             
         self.db.flush()
+        await refresh_daily_adherence(self.db, plan_id)
 
         interactions_response = await self.interaction_checker.check_drug_interaction(drug_names=interaction_check_names)
         
@@ -383,11 +367,37 @@ class MedicationService:
             logging.error(f"Drug validation failed: {e}")
             return DrugValidationResponse(drug_name=drug_name, is_valid=False)
 
-    async def search_drug(self, query: str):
-        rpl_results = self.rpl_service.search_polish_medications(query, limit=10)
-        clean_rpl = [r.split(" || ")[0] for r in rpl_results]
-        
-        fda_results = await self.interaction_checker.search_medications(query, limit=5)
-        
-        combined = sorted(list(set(clean_rpl + fda_results)))
-        return combined[:15]
\ No newline at end of file
+    async def search_drug(self, query: str, limit: int = 15):
+        if medication_index.ready:
+            local = medication_index.search(query, limit=limit)
+        else:
+            local = [r.split(" || ")[0] for r in self.rpl_service.search_polish_medications(query, limit=limit)]
+        results = self._merge_names([], local, limit)
+        if len(results) >= limit:
+            return results
+
+        # openFDA only tops up a short local list, and only within the deadline. A slow
+        # lookup keeps running in the background so the next keystroke finds it cached.
+        try:
+            fda_results = await asyncio.wait_for(
+                self.interaction_checker.search_medications(query, limit=limit),
+                timeout=OPENFDA_SEARCH_DEADLINE_SECONDS
+            )
+        except asyncio.TimeoutError:
+            logging.info(f"openFDA search for {query!r} missed the deadline")
+            fda_results = []
+        except Exception as e:
+            logging.error(f"openFDA search failed: {e}")
+            fda_results = []
+        return self._merge_names(results, fda_results, limit)
+
+    @staticmethod
+    def _merge_names(results: List[str], names: List[str], limit: int) -> List[str]:
+        seen = {fold_name(name) for name in results}
+        merged = list(results)
+        for name in names:
+            key = fold_name(name)
+            if key and key not in seen and len(merged) < limit:
+                seen.add(key)
+                merged.append(name)
+        return merged
\ No newline at end of file
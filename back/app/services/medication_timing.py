@@ -0,0 +1,94 @@
+import os
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+from app.crud.medication_timing import get_medication_timings, save_medication_timings
+from app.models.common import WithMealRelation
+from app.models.medication_timing import MedicationTiming
+from app.services.drug_label_cache import normalize_drug_name
+from app.utils.cache import TTLLRUCache
+
+MEDICATION_TIMING_TTL_SECONDS = int(os.getenv('MEDICATION_TIMING_TTL_SECONDS') or 30 * 24 * 3600)
+# Unknown results are retried sooner, the label may show up or get better wording.
+MEDICATION_TIMING_UNKNOWN_TTL_SECONDS = int(os.getenv('MEDICATION_TIMING_UNKNOWN_TTL_SECONDS') or 24 * 3600)
+MEDICATION_TIMING_MAX_ENTRIES = int(os.getenv('MEDICATION_TIMING_MAX_ENTRIES') or 2048)
+
+# Values are (relation, label_version) pairs.
+timing_lru = TTLLRUCache(max_size=MEDICATION_TIMING_MAX_ENTRIES, ttl=MEDICATION_TIMING_TTL_SECONDS)
+
+def label_version(label: Optional[Dict]) -> Optional[str]:
+    if not label:
+        return None
+    version = label.get('version') or label.get('effective_time')
+    return f"{label.get('set_id') or ''}:{version or ''}"
+
+class MedicationTimingCacheService:
+    def __init__(self, db: Optional[Session] = None):
+        self.db = db
+
+    def _session(self) -> Session:
+        # Own short session, like the label cache: never commit or roll back the caller's work.
+        return Session(bind=self.db.get_bind())
+
+    def get_many(self, substances: List[str],
+                 current_versions: Optional[Dict[str, Optional[str]]] = None) -> Dict[str, WithMealRelation]:
+        # current_versions maps keys to the version of the label at hand. A timing computed
+        # from another version is a miss, keys without a known label are trusted.
+        current_versions = current_versions or {}
+
+        def is_current(key: str, version: Optional[str]) -> bool:
+            return key not in current_versions or current_versions[key] == version
+
+        found: Dict[str, WithMealRelation] = {}
+        missing = []
+        for key in dict.fromkeys(normalize_drug_name(s) for s in substances):
+            entry = timing_lru.get(key)
+            if entry is not None and is_current(key, entry[1]):
+                found[key] = entry[0]
+            else:
+                missing.append(key)
+
+        if not missing or self.db is None:
+            return found
+
+        now = datetime.utcnow()
+        try:
+            with self._session() as db:
+                rows = get_medication_timings(db, missing, now)
+        except Exception as e:
+            logging.error(f"Medication timing lookup failed: {e}")
+            return found
+
+        for row in rows:
+            if not is_current(row.substance, row.label_version):
+                continue
+            timing_lru.set(row.substance, (row.with_meal_relation, row.label_version),
+                           ttl=(row.expires_at - now).total_seconds())
+            found[row.substance] = row.with_meal_relation
+        return found
+
+    def put_many(self, timings: Dict[str, WithMealRelation], versions: Dict[str, Optional[str]]):
+        if not timings:
+            return
+        now = datetime.utcnow()
+        entries = []
+        for substance, relation in timings.items():
+            key = normalize_drug_name(substance)
+            ttl = MEDICATION_TIMING_UNKNOWN_TTL_SECONDS if relation == WithMealRelation.unknown else MEDICATION_TIMING_TTL_SECONDS
+            timing_lru.set(key, (relation, versions.get(substance)), ttl=ttl)
+            entries.append(MedicationTiming(
+                substance=key,
+                with_meal_relation=relation,
+                label_version=versions.get(substance),
+                computed_at=now,
+                expires_at=now + timedelta(seconds=ttl)
+            ))
+
+        if self.db is None:
+            return
+        try:
+            with self._session() as db:
+                save_medication_timings(db, entries)
+        except Exception as e:
+            logging.error(f"Failed to persist medication timings: {e}")
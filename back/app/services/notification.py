@@ -1,23 +1,44 @@
 from sqlalchemy.orm import Session
-from typing import List
-from app.schemas.notification import NotificationResponse
+from typing import List, Optional
+from app.schemas.notification import NotificationResponse, NotificationPage
 from app.crud.notification import (create_new_notification,
                                    get_unread_notification,
-                                   mark_as_read_notification)
+                                   get_notifications_after,
+                                   count_unread_notifications,
+                                   encode_cursor,
+                                   mark_as_read_notification,
+                                   mark_notifications_read)
 
 class NotificationService:
     def __init__(self, db: Session):
         self.db = db
     
-    def get_user_notification(self, carrer_id: int):
-        db_notifications = get_unread_notification(db=self.db, user_id=carrer_id)
+    def get_user_notification(self, carrer_id: int, limit: Optional[int] = None):
+        db_notifications = get_unread_notification(db=self.db, user_id=carrer_id, limit=limit)
         response_list = []
         for notification in db_notifications:
             response_list.append(notification)
 
         return response_list
+
+    def get_notification_page(self, carrer_id: int, limit: int, cursor: Optional[str] = None,
+                              unread_only: bool = True) -> NotificationPage:
+        # One extra row tells whether another page exists without a count query.
+        rows = get_unread_notification(db=self.db, user_id=carrer_id, limit=limit + 1,
+                                       cursor=cursor, unread_only=unread_only)
+        items = rows[:limit]
+        next_cursor = encode_cursor(items[-1]) if len(rows) > limit else None
+        return NotificationPage(items=items, next_cursor=next_cursor)
+
+    def get_notifications_after(self, carrer_id: int, after_id: int, limit: int):
+        return get_notifications_after(db=self.db, user_id=carrer_id, after_id=after_id, limit=limit)
+
+    def unread_count(self, carrer_id: int) -> int:
+        return count_unread_notifications(db=self.db, user_id=carrer_id)
     
     def mark_as_read(self, notification_id: int, carrer_id: int):
-        updated = mark_as_read_notification(db=self.db, notification_id=notification_id,
-                                               user_id = carrer_id)
-        return updated is not None
\ No newline at end of file
+        return mark_as_read_notification(db=self.db, notification_id=notification_id,
+                                         user_id = carrer_id)
+
+    def mark_all_as_read(self, carrer_id: int, up_to_id: Optional[int] = None) -> int:
+        return mark_notifications_read(db=self.db, user_id=carrer_id, up_to_id=up_to_id)
@@ -0,0 +1,155 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from app.database.database import local_session
+from app.models.care_relation import CareRelation
+from app.models.notification import Notification
+from app.models.user import User
+from app.schemas.notification import NotificationResponse
+from app.utils.pubsub import notification_broker
+from app.utils.threads import run_in_thread
+
+NOTIFICATION_COALESCE_SECONDS = float(os.getenv('NOTIFICATION_COALESCE_SECONDS') or 10)
+NOTIFICATION_BATCH_SIZE = int(os.getenv('NOTIFICATION_BATCH_SIZE') or 200)
+# Failed flushes put the events back for the next window, this many times at most.
+NOTIFICATION_FLUSH_RETRIES = int(os.getenv('NOTIFICATION_FLUSH_RETRIES') or 3)
+DIGEST_TYPE = "status_digest"
+
+class NotificationDispatcher:
+    # Collects patient status events in memory and hands them to the patient's carer
+    # off the request path. Events of one patient within the window become a single
+    # notification, toggling the same item again keeps only its last state. Carers and
+    # patient names are resolved at flush time, one query per batch.
+    def __init__(self, window: float = NOTIFICATION_COALESCE_SECONDS):
+        self.window = window
+        self.session_factory = local_session
+        self._pending: Dict[int, Tuple[float, "OrderedDict[tuple, str]"]] = {}
+        self._failures: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._task = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush(force=True)
+
+    def dispatch(self, patient_id: int, kind: str, item_id: int, text: str):
+        with self._lock:
+            _, events = self._pending.setdefault(patient_id, (time.monotonic(), OrderedDict()))
+            events.pop((kind, item_id), None)
+            events[(kind, item_id)] = text
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return sum(len(events) for _, events in self._pending.values())
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(max(min(self.window, 1.0), 0.05))
+            try:
+                await self.flush()
+            except Exception as e:
+                logging.error(f"Failed to flush notifications: {e}")
+
+    def _take_due(self, force: bool) -> Dict[int, "OrderedDict[tuple, str]"]:
+        now = time.monotonic()
+        with self._lock:
+            due = [patient_id for patient_id, (first_seen, _) in self._pending.items()
+                   if force or now - first_seen >= self.window]
+            return {patient_id: self._pending.pop(patient_id)[1] for patient_id in due}
+
+    def _requeue(self, failed: Dict[int, "OrderedDict[tuple, str]"]):
+        now = time.monotonic()
+        with self._lock:
+            for patient_id, events in failed.items():
+                attempts = self._failures.get(patient_id, 0) + 1
+                if attempts > NOTIFICATION_FLUSH_RETRIES:
+                    self._failures.pop(patient_id, None)
+                    logging.error(f"Dropping {len(events)} status events of patient {patient_id} after {attempts} failed flushes")
+                    continue
+                self._failures[patient_id] = attempts
+                first_seen, newer = self._pending.get(patient_id, (now, OrderedDict()))
+                # Events dispatched since the batch was taken are newer than the failed ones.
+                for key in newer:
+                    events.pop(key, None)
+                events.update(newer)
+                self._pending[patient_id] = (first_seen, events)
+
+    async def flush(self, force: bool = False) -> int:
+        due = self._take_due(force)
+        if not due:
+            return 0
+        taken = list(due)
+        created = []
+        try:
+            # Shielded, a cancelled flush still knows which chunks were committed.
+            await run_in_thread(self._write, due, created)
+        except BaseException:
+            # _write drops patients from due once their chunk is committed, only the rest is retried.
+            self._requeue(due)
+            raise
+        finally:
+            for user_id, message in created:
+                await notification_broker.publish(user_id, message)
+        with self._lock:
+            for patient_id in taken:
+                self._failures.pop(patient_id, None)
+        return len(created)
+
+    def _write(self, due: Dict[int, "OrderedDict[tuple, str]"], created: List[Tuple[int, dict]]):
+        patient_ids = list(due)
+        with self.session_factory() as db:
+            for start in range(0, len(patient_ids), NOTIFICATION_BATCH_SIZE):
+                chunk = patient_ids[start:start + NOTIFICATION_BATCH_SIZE]
+                carers = db.execute(
+                    select(CareRelation.patient_id, CareRelation.carer_id, User.name)
+                    .join(User, User.id == CareRelation.patient_id)
+                    .where(CareRelation.patient_id.in_(chunk))
+                ).all()
+                rows = [self._build(carer_id, patient_id, name, due[patient_id])
+                        for patient_id, carer_id, name in carers]
+                if not rows:
+                    for patient_id in chunk:
+                        del due[patient_id]
+                    continue
+                db.add_all(rows)
+                db.flush()
+                ids = [row.id for row in rows]
+                db.commit()
+                for patient_id in chunk:
+                    del due[patient_id]
+                notifications = db.execute(
+                    select(Notification).options(joinedload(Notification.subject)).where(Notification.id.in_(ids))
+                ).scalars().all()
+                created += [(n.user_id, NotificationResponse.model_validate(n).model_dump(mode="json"))
+                            for n in notifications]
+
+    @staticmethod
+    def _build(carer_id: int, patient_id: int, name: str, events: "OrderedDict[tuple, str]") -> Notification:
+        kinds = {kind for kind, _ in events}
+        texts = list(events.values())
+        if len(texts) == 1:
+            message = f"{name} {texts[0]}"
+        else:
+            message = f"{name} made {len(texts)} updates: " + "; ".join(texts)
+        return Notification(
+            user_id=carer_id,
+            related_user_id=patient_id,
+            type=kinds.pop() if len(kinds) == 1 else DIGEST_TYPE,
+            message=message,
+            is_read=False
+        )
+
+notification_dispatcher = NotificationDispatcher()
@@ -9,14 +9,15 @@ from fastapi import HTTPException, status
 from app.services.spoonacular import Spoonacular
 from app.services.health_form import HealthFormService
 from app.schemas.health_form import HealthFormCreate
-from app.schemas.plan import PlanCreate, PlanResponse, ManualMealAddRequest, MealResponse
+from app.schemas.plan import PlanCreate, PlanResponse, ManualMealAddRequest, MealResponse, MealCreate
 from app.schemas.spoonacular import DailyPlanResponse, ComplexSearchResponse
 from app.models.common import MealType, WithMealRelation
 from app.services.medication_service import DrugInteractionService, DrugInteractionResponse, MedicationResponse
 from app.schemas.shopping_list import ShoppingListResponse, ShoppingListCategory, ShoppingListGenerateRequest
-from app.crud.medication import get_medications_by_plan_id, create_medication
-from app.crud.plans import create_plan, get_plan_with_meals_by_user_id_and_date
+from app.crud.medication import get_medications_by_plan_id
+from app.crud.plans import create_plan_bulk, create_plans_bulk, get_plan_with_meals_by_user_id_and_date
 from app.crud.meals import create_meal, get_meal_by_id
+from app.crud.daily_adherence import refresh_daily_adherence, refresh_user_adherence
 from app.schemas.medication import MedicationCreate
 from app.models.shopping_list import ShoppingList
 from app.crud.care_relation import get_dependents_by_carer_id
@@ -72,6 +73,30 @@ MEAL_TEMPLATES = {
     6: [(0, "breakfast", "breakfast"), (1, "second_breakfast", "snack"), (2, "lunch", "main course"), (3, "snack", "snack"), (4, "dinner", "main course"), (5, "supper", "snack")]
 }
 
+PLAN_GENERATOR_MODE = os.getenv("PLAN_GENERATOR_MODE") or "api"
+PLAN_MAX_RANGE_DAYS = int(os.getenv("PLAN_MAX_RANGE_DAYS") or 31)
+
+MEDICATION_RELATION_TEXT = {
+    WithMealRelation.unknown: "no data",
+    WithMealRelation.empty_stomach: "on an empty stomach",
+    WithMealRelation.before: "before meal",
+    WithMealRelation.during: "during meal",
+    WithMealRelation.after: "after meal",
+}
+
+def parse_medication_names(health_form_model) -> List[str]:
+    if not health_form_model or not health_form_model.medicament_usage:
+        return []
+    try:
+        med_string = health_form_model.medicament_usage
+        if isinstance(med_string, str):
+            return [name.strip() for name in med_string.split(',') if name.strip()]
+        elif isinstance(med_string, list):
+            return [str(name).strip() for name in med_string if str(name).strip()]
+    except Exception as e:
+        logging.error(f"Error parsing medicament_usage from HealthForm: {e}")
+    return []
+
 def get_meal_mapping(num_meals: int):
     mappings = {
         1: MEAL_MAPPING_1,
@@ -85,13 +110,63 @@ def get_meal_mapping(num_meals: int):
 
 
 class PlanCreationService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, generator_mode: Optional[str] = None):
         self.db = db
-        self.spoonacular_service = Spoonacular()
+        self.generator_mode = generator_mode or PLAN_GENERATOR_MODE
+        self.spoonacular_service = Spoonacular(db=self.db)
         fda_key = os.getenv("OPEN_FDA_API_KEY")
         self.interaction_checker = DrugInteractionService(db=self.db, fda_api_key=fda_key)
         self.health_form_service = HealthFormService(db)
 
+    async def _detect_medications(self, medication_names: List[str]) -> List[MedicationCreate]:
+        try:
+            timings = await self.interaction_checker.get_medication_timings(medication_names)
+        except Exception as e:
+            logging.error(f"Failed to detect meal-med relations: {medication_names} : {e}")
+            timings = {}
+
+        medications_data = []
+        for med_name in medication_names:
+            detected_relation = timings.get(med_name, WithMealRelation.unknown)
+            default_desc_text = MEDICATION_RELATION_TEXT.get(detected_relation, "as directed")
+            medications_data.append(MedicationCreate(
+                name=med_name,
+                time=time(8, 0),
+                with_meal_relation=detected_relation,
+                description=f"Take: {default_desc_text}. (Auto-detected from FDA label)"
+            ))
+        return medications_data
+
+    def _meals_for_day(self, daily: DailyPlanResponse, meal_mapping) -> List[MealCreate]:
+        meals = []
+        for index, meal_data in enumerate(daily.meals):
+            if index not in meal_mapping:
+                logging.warning(f"Meal index {index} not in mapping for {len(meal_mapping)} meals")
+                continue
+            meal_type, meal_time = meal_mapping[index]
+            meals.append(MealCreate(
+                meal_type=meal_type,
+                time=meal_time,
+                description=f"{meal_data.title}",
+                spoonacular_recipe_id=meal_data.id
+            ))
+        return meals
+
+    def _build_plan_response(self, plan, meals, medications, interactions=None) -> PlanResponse:
+        return PlanResponse(
+            id=plan.id,
+            user_id=plan.user_id,
+            created_by=plan.created_by,
+            day_start=plan.day_start,
+            meals=[MealResponse.model_validate(meal) for meal in meals],
+            total_calories=plan.total_calories,
+            total_protein=plan.total_protein,
+            total_fat=plan.total_fat,
+            total_carbohydrates=plan.total_carbohydrates,
+            medications=[MedicationResponse.model_validate(med) for med in medications],
+            interactions=interactions or []
+        )
+
     async def generate_and_save_plan(self, created_by_id, user_id, time_frame: str = "day", plan_date: Optional[date] = None):
         if plan_date is None:
             plan_date = date.today()
@@ -113,7 +188,8 @@ class PlanCreationService:
         try:
             plan_response_spoonacular: DailyPlanResponse = await self.spoonacular_service.generate_structured_plan(
                 health_form=user_health_form_data,
-                meal_types=spoonacular_query_types
+                meal_types=spoonacular_query_types,
+                use_catalog=self.generator_mode == "catalog"
             )
 
             if plan_response_spoonacular is None or not plan_response_spoonacular.meals:
@@ -128,103 +204,26 @@ class PlanCreationService:
                 total_fat=plan_response_spoonacular.nutrients.fat,
                 total_carbohydrates=plan_response_spoonacular.nutrients.carbohydrates,
             )
-            new_plan = create_plan(db=self.db, plan_data=plan_data)
-            num_meals = user_health_form_data.number_of_meals_per_day
-            meal_mapping = get_meal_mapping(num_meals)
-            
-            for index, meal_data in enumerate(plan_response_spoonacular.meals):
-                if index not in meal_mapping:
-                    logging.warning(f"Meal index {index} not in mapping for {num_meals} meals")
-                    continue
-                
-                meal_type, meal_time = meal_mapping[index]
-                
-                create_meal(
-                    db=self.db,
-                    plan_id=new_plan.id,
-                    meal_type=meal_type,
-                    time=meal_time,
-                    description=f"{meal_data.title}",
-                    spoonacular_recipe_id=meal_data.id
-                )
-            
-            self.db.commit()
-            self.db.refresh(new_plan)            
-            
-            interactions: List[DrugInteractionResponse] = []
-            db_medications = []
-            
-            try:
-                medication_names_from_form: List[str] = []
-                
-                if user_health_form_model.medicament_usage:
-                    try:
-                        med_string = user_health_form_model.medicament_usage
-                        if isinstance(med_string, str):
-                            medication_names_from_form = [name.strip() for name in med_string.split(',') if name.strip()]
-                        elif isinstance(med_string, list):
-                            medication_names_from_form = [str(name).strip() for name in med_string if str(name).strip()]
-                    except Exception as e:
-                        logging.error(f"Error parsing medicament_usage from HealthForm: {e}")
-                
-                if medication_names_from_form:
-                    for med_name in medication_names_from_form:
-                        try:
-                            detected_relation = await self.interaction_checker.get_medication_timing(med_name=med_name)
-                        except Exception as e:
-                            logging.error(f"Failed to detect meal-med relation: {med_name} : {e}")
-                            detected_relation = WithMealRelation.unknown
-                        
-                        relation_map = {
-                            WithMealRelation.unknown: "no data",
-                            WithMealRelation.empty_stomach: "on an empty stomach",
-                            WithMealRelation.before: "before meal",
-                            WithMealRelation.during: "during meal",
-                            WithMealRelation.after: "after meal",
-                        }
-                        default_desc_text = relation_map.get(detected_relation, "as directed")
-                        med_data = MedicationCreate(
-                            name=med_name,
-                            time=time(8, 0),
-                            with_meal_relation=detected_relation,
-                            description=f"Take: {default_desc_text}. (Auto-detected from FDA label)"
-                        )
-                        
-                        create_medication(
-                            db=self.db,
-                            plan_id=new_plan.id, 
-                            medication_data=med_data,
-                        )
-                    
-                    self.db.commit()
-
-                    try:
-                        interactions = await self.interaction_checker.check_drug_interaction(medication_names_from_form)
-                    except Exception as e:
-                        logging.error(f"Error checking drug interactions: {e}")
-                        interactions = []
-                
-                db_medications = get_medications_by_plan_id(self.db, new_plan.id)
-
-            except Exception as e:
-                logging.error(f"Error processing medications, rolling back med section: {e}")
-                self.db.rollback()
-                interactions = []
-                db_medications = []
-
-            final_plan_response = PlanResponse(
-                id=new_plan.id,
-                user_id=new_plan.user_id,
-                created_by=new_plan.created_by,
-                day_start=new_plan.day_start,
-                meals=[MealResponse.model_validate(meal) for meal in new_plan.meals],
-                total_calories=new_plan.total_calories,
-                total_protein=new_plan.total_protein,
-                total_fat=new_plan.total_fat,
-                total_carbohydrates=new_plan.total_carbohydrates,
-                medications=[MedicationResponse.model_validate(med) for med in db_medications],
-                interactions=interactions
+            meal_mapping = get_meal_mapping(user_health_form_data.number_of_meals_per_day)
+            medication_names_from_form = parse_medication_names(user_health_form_model)
+            medications_data = await self._detect_medications(medication_names_from_form)
+
+            new_plan, new_meals, new_meds = create_plan_bulk(
+                db=self.db,
+                plan_data=plan_data,
+                meals=self._meals_for_day(plan_response_spoonacular, meal_mapping),
+                medications=medications_data,
+                commit=False
             )
+            final_plan_response = self._build_plan_response(new_plan, new_meals, new_meds)
+            await refresh_daily_adherence(self.db, new_plan.id)
+            self.db.commit()
+
+            if medication_names_from_form:
+                try:
+                    final_plan_response.interactions = await self.interaction_checker.check_drug_interaction(medication_names_from_form)
+                except Exception as e:
+                    logging.error(f"Error checking drug interactions: {e}")
             
             return final_plan_response
 
@@ -243,6 +242,82 @@ class PlanCreationService:
                 detail=f"An unexpected error occurred during plan generation: {e}"
             )
     
+    async def generate_and_save_plans(self, created_by_id: int, user_id: int, start_date: date, days: int) -> List[PlanResponse]:
+        if days < 1 or days > PLAN_MAX_RANGE_DAYS:
+            raise ValueError(f"Plan range must be between 1 and {PLAN_MAX_RANGE_DAYS} days")
+
+        user_health_form_model = self.health_form_service.get_health_form(user_id=user_id)
+        if not user_health_form_model:
+            raise ValueError("No user health form")
+        try:
+            user_health_form_data = HealthFormCreate.model_validate(user_health_form_model.__dict__)
+        except Exception as e:
+            raise ValueError(f"Data from health_form are not correctly: {e}")
+
+        num_meals = max(1, min(6, user_health_form_data.number_of_meals_per_day))
+        template = MEAL_TEMPLATES.get(num_meals, MEAL_TEMPLATES[3])
+        meal_mapping = get_meal_mapping(user_health_form_data.number_of_meals_per_day)
+
+        try:
+            daily_plans = await self.spoonacular_service.generate_structured_plans(
+                health_form=user_health_form_data,
+                meal_types=[item[2] for item in template],
+                days=days,
+                use_catalog=self.generator_mode == "catalog"
+            )
+            if not any(daily.meals for daily in daily_plans):
+                raise ValueError("Spoonacular returned no meals matching the criteria.")
+
+            medication_names = parse_medication_names(user_health_form_model)
+            medications_data = await self._detect_medications(medication_names)
+
+            entries = []
+            for offset, daily in enumerate(daily_plans):
+                if not daily.meals:
+                    continue
+                plan_data = PlanCreate(
+                    user_id=user_id,
+                    created_by=created_by_id,
+                    day_start=start_date + timedelta(days=offset),
+                    total_calories=daily.nutrients.calories,
+                    total_protein=daily.nutrients.protein,
+                    total_fat=daily.nutrients.fat,
+                    total_carbohydrates=daily.nutrients.carbohydrates,
+                )
+                entries.append((plan_data, self._meals_for_day(daily, meal_mapping), medications_data))
+            created = create_plans_bulk(db=self.db, plans=entries, commit=False)
+            responses: List[PlanResponse] = [
+                self._build_plan_response(new_plan, new_meals, new_meds)
+                for new_plan, new_meals, new_meds in created
+            ]
+            await refresh_user_adherence(self.db, user_id, start_date, start_date + timedelta(days=days - 1))
+            self.db.commit()
+
+            if medication_names:
+                try:
+                    interactions = await self.interaction_checker.check_drug_interaction(medication_names)
+                except Exception as e:
+                    logging.error(f"Error checking drug interactions: {e}")
+                    interactions = []
+                for response in responses:
+                    response.interactions = interactions
+            return responses
+
+        except ValueError as ve:
+            self.db.rollback()
+            logging.error(f"Spoonacular API or validation error: {ve}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Spoonacular service error: {ve}"
+            )
+        except Exception as e:
+            self.db.rollback()
+            logging.exception("Unexpected error during batch plan generation:")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"An unexpected error occurred during plan generation: {e}"
+            )
+
     async def get_plan_by_date(self, user_id: int, plan_date: date):
         try:
             user_plan = get_plan_with_meals_by_user_id_and_date(
@@ -268,17 +343,7 @@ class PlanCreationService:
 
             health_form_model = self.health_form_service.get_health_form(user_id=user_id)
             interactions: List[DrugInteractionResponse] = []
-            medication_names_from_form: List[str] = []
-
-            if health_form_model and health_form_model.medicament_usage:
-                try:
-                    med_string = health_form_model.medicament_usage
-                    if isinstance(med_string, str):
-                        medication_names_from_form = [name.strip() for name in med_string.split(',') if name.strip()]
-                    elif isinstance(med_string, list):
-                        medication_names_from_form = [str(name).strip() for name in med_string if str(name).strip()]
-                except Exception as e:
-                    logging.error(f"Error parsing medicament_usage from HealthForm: {e}")
+            medication_names_from_form = parse_medication_names(health_form_model)
 
             if medication_names_from_form:
                 try:
@@ -333,6 +398,8 @@ class PlanCreationService:
             description=description,
             spoonacular_recipe_id=meal_request.spoonacular_recipe_id
         )
+        await refresh_daily_adherence(self.db, plan_id)
+        self.db.commit()
 
         return MealResponse.model_validate(new_meal_orm)
 
@@ -361,10 +428,7 @@ class PlanCreationService:
                 return ShoppingListResponse(
                     from_date=start_date, to_date=end_date, total_items=0, categories=[]
                 )
-            unique_recipe_ids = list(set(recipe_ids))
-            tasks = [self.spoonacular_service.get_recipe_information(rid) for rid in unique_recipe_ids]
-            recipes_info = await asyncio.gather(*tasks)
-            recipe_map = {r.id: r for r in recipes_info if r}
+            recipe_map = await self.spoonacular_service.get_recipes_information(recipe_ids)
 
             aggregated_ingredients = defaultdict(float)
             ingredient_meta = {}
@@ -446,7 +510,7 @@ class PlanCreationService:
         )
     
     async def replace_meal(self, meal_id: int, new_meal_id: int):
-        old_meal = get_meal_by_id(db=self.db, meal_id= meal_id)
+        old_meal = await get_meal_by_id(db=self.db, meal_id= meal_id)
         if not old_meal:
             raise ValueError("Meal not found")
         plan_id = old_meal.plan_id
@@ -466,4 +530,6 @@ class PlanCreationService:
             description=description,
             spoonacular_recipe_id=new_meal_id
         )
+        await refresh_daily_adherence(self.db, plan_id)
+        self.db.commit()
         return MealResponse.model_validate(new_meal)
\ No newline at end of file
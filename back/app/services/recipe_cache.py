@@ -0,0 +1,109 @@
+import os
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+from app.crud.recipe_cache import (get_cached_recipes, save_cached_recipes,
+                                   delete_cached_recipe, delete_expired_recipes,
+                                   count_cached_recipes)
+from app.models.recipe_cache import RecipeCache
+from app.schemas.spoonacular import RecipeResponse, RecipeCacheStats
+from app.utils.cache import TTLLRUCache
+
+RECIPE_CACHE_TTL_SECONDS = int(os.getenv('RECIPE_CACHE_TTL_SECONDS') or 7 * 24 * 3600)
+RECIPE_CACHE_MAX_ENTRIES = int(os.getenv('RECIPE_CACHE_MAX_ENTRIES') or 1024)
+
+recipe_lru = TTLLRUCache(max_size=RECIPE_CACHE_MAX_ENTRIES, ttl=RECIPE_CACHE_TTL_SECONDS)
+_db_tier_stats = {"db_hits": 0, "db_misses": 0}
+
+class RecipeCacheService:
+    def __init__(self, db: Optional[Session] = None):
+        self.db = db
+
+    def _session(self) -> Session:
+        # Own short session: plan generation reads and fills the cache mid-transaction,
+        # cache I/O must not commit or roll back the caller's work.
+        return Session(bind=self.db.get_bind())
+
+    def get(self, recipe_id: int) -> Optional[RecipeResponse]:
+        return self.get_many([recipe_id]).get(recipe_id)
+
+    def get_many(self, recipe_ids: List[int]) -> Dict[int, RecipeResponse]:
+        found: Dict[int, RecipeResponse] = {}
+        missing = []
+        for recipe_id in dict.fromkeys(recipe_ids):
+            recipe = recipe_lru.get(recipe_id)
+            if recipe is not None:
+                found[recipe_id] = recipe
+            else:
+                missing.append(recipe_id)
+
+        if not missing or self.db is None:
+            return found
+
+        now = datetime.utcnow()
+        try:
+            with self._session() as db:
+                rows = get_cached_recipes(db, missing, now)
+        except Exception as e:
+            logging.error(f"Recipe cache lookup failed: {e}")
+            return found
+
+        for row in rows:
+            try:
+                recipe = RecipeResponse.model_validate(row.payload)
+            except Exception as e:
+                logging.warning(f"Dropping unreadable cached recipe {row.recipe_id}: {e}")
+                continue
+            remaining = (row.expires_at - now).total_seconds()
+            recipe_lru.set(row.recipe_id, recipe, ttl=remaining)
+            found[row.recipe_id] = recipe
+
+        _db_tier_stats["db_hits"] += len(rows)
+        _db_tier_stats["db_misses"] += len(missing) - len(rows)
+        return found
+
+    def put(self, recipe: RecipeResponse, ttl: Optional[int] = None):
+        self.put_many([recipe], ttl=ttl)
+
+    def put_many(self, recipes: List[RecipeResponse], ttl: Optional[int] = None):
+        if not recipes:
+            return
+        ttl = ttl if ttl is not None else RECIPE_CACHE_TTL_SECONDS
+        for recipe in recipes:
+            recipe_lru.set(recipe.id, recipe, ttl=ttl)
+
+        if self.db is None:
+            return
+        now = datetime.utcnow()
+        entries = [
+            RecipeCache(
+                recipe_id=recipe.id,
+                payload=recipe.model_dump(mode="json"),
+                fetched_at=now,
+                expires_at=now + timedelta(seconds=ttl)
+            )
+            for recipe in recipes
+        ]
+        try:
+            with self._session() as db:
+                save_cached_recipes(db, entries)
+        except Exception as e:
+            logging.error(f"Failed to persist recipe cache entries: {e}")
+
+    def invalidate(self, recipe_id: int) -> bool:
+        removed = recipe_lru.invalidate(recipe_id)
+        if self.db is not None:
+            with self._session() as db:
+                removed = delete_cached_recipe(db, recipe_id) > 0 or removed
+        return removed
+
+    def purge_expired(self) -> int:
+        if self.db is None:
+            return 0
+        with self._session() as db:
+            return delete_expired_recipes(db, datetime.utcnow())
+
+    def stats(self) -> RecipeCacheStats:
+        db_entries = count_cached_recipes(self.db) if self.db is not None else None
+        return RecipeCacheStats(**recipe_lru.stats(), **_db_tier_stats, db_entries=db_entries)
@@ -0,0 +1,168 @@
+import os
+import logging
+import random
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy.orm import Session
+from app.crud.recipe_catalog import get_catalog_recipes_by_ids, find_catalog_recipes, count_catalog_recipes
+from app.models.recipe_catalog import CatalogRecipe
+
+RECIPE_CATALOG_MIN_MATCHES = int(os.getenv('RECIPE_CATALOG_MIN_MATCHES') or 3)
+
+# Bit positions are persisted in recipe_catalog, only ever append to these tuples.
+CATALOG_DIETS = (
+    "gluten free", "ketogenic", "vegetarian", "lacto-vegetarian", "ovo-vegetarian",
+    "vegan", "pescetarian", "paleo", "primal", "whole30"
+)
+CATALOG_INTOLERANCES = (
+    "dairy", "egg", "gluten", "grain", "peanut", "seafood",
+    "sesame", "shellfish", "soy", "sulfite", "tree nut", "wheat"
+)
+DIET_BITS = {name: 1 << i for i, name in enumerate(CATALOG_DIETS)}
+INTOLERANCE_BITS = {name: 1 << i for i, name in enumerate(CATALOG_INTOLERANCES)}
+
+DIET_LABEL_ALIASES = {
+    "gluten free": ["gluten free"],
+    "ketogenic": ["ketogenic"],
+    "vegetarian": ["vegetarian"],
+    "lacto ovo vegetarian": ["vegetarian"],
+    "lacto vegetarian": ["lacto-vegetarian"],
+    "lacto-vegetarian": ["lacto-vegetarian"],
+    "ovo vegetarian": ["ovo-vegetarian"],
+    "ovo-vegetarian": ["ovo-vegetarian"],
+    "vegan": ["vegan", "vegetarian", "lacto-vegetarian", "ovo-vegetarian", "pescetarian"],
+    "pescatarian": ["pescetarian"],
+    "pescetarian": ["pescetarian"],
+    "paleolithic": ["paleo"],
+    "paleo": ["paleo"],
+    "primal": ["primal"],
+    "whole 30": ["whole30"],
+    "whole30": ["whole30"],
+}
+
+SLOT_DISH_TYPES = {
+    "breakfast": {"breakfast", "morning meal", "brunch"},
+    "main course": {"main course", "main dish", "lunch", "dinner"},
+    "snack": {"snack", "appetizer", "fingerfood", "antipasti", "starter"},
+}
+
+def _split(value: Optional[str | List[str]]) -> List[str]:
+    if not value:
+        return []
+    items = value.split(',') if isinstance(value, str) else value
+    return [i.strip().lower() for i in items if i and i.strip()]
+
+def diet_mask_for(diets: Optional[str | List[str]]) -> int:
+    mask = 0
+    for label in _split(diets):
+        for diet in DIET_LABEL_ALIASES.get(label, []):
+            mask |= DIET_BITS[diet]
+    return mask
+
+def intolerance_mask_for(intolerances: Optional[str | List[str]]) -> int:
+    mask = 0
+    for name in _split(intolerances):
+        mask |= INTOLERANCE_BITS.get(name, 0)
+    return mask
+
+def _nutrient(recipe: Dict, name: str) -> Optional[float]:
+    nutrients = (recipe.get("nutrition") or {}).get("nutrients") or []
+    return next((n.get("amount") for n in nutrients if n.get("name") == name), None)
+
+def _slot_for(recipe: Dict) -> Optional[str]:
+    dish_types = {d.lower() for d in recipe.get("dishTypes") or []}
+    for slot, aliases in SLOT_DISH_TYPES.items():
+        if dish_types & aliases:
+            return slot
+    return None
+
+class RecipeCatalogService:
+    def __init__(self, db: Optional[Session] = None):
+        self.db = db
+
+    def ingest(self, recipes: List[Dict], dish_type: Optional[str] = None,
+               diet: Optional[str] = None, intolerances: Optional[str] = None) -> int:
+        if self.db is None or not recipes:
+            return 0
+
+        search_diet_mask = diet_mask_for(diet)
+        search_intolerance_mask = intolerance_mask_for(intolerances)
+        rows = {}
+        for recipe in recipes:
+            calories = _nutrient(recipe, "Calories")
+            slot = dish_type or _slot_for(recipe)
+            if not recipe.get("id") or calories is None or slot is None:
+                continue
+
+            diet_mask = search_diet_mask | diet_mask_for(recipe.get("diets"))
+            intolerance_mask = search_intolerance_mask
+            if recipe.get("vegan"):
+                diet_mask |= diet_mask_for("vegan")
+            if recipe.get("vegetarian"):
+                diet_mask |= DIET_BITS["vegetarian"]
+            if recipe.get("ketogenic"):
+                diet_mask |= DIET_BITS["ketogenic"]
+            if recipe.get("glutenFree"):
+                diet_mask |= DIET_BITS["gluten free"]
+                intolerance_mask |= INTOLERANCE_BITS["gluten"]
+            if recipe.get("dairyFree"):
+                intolerance_mask |= INTOLERANCE_BITS["dairy"]
+
+            rows[recipe["id"]] = {
+                "title": recipe.get("title") or "",
+                "dish_type": slot,
+                "calories": calories,
+                "protein": _nutrient(recipe, "Protein") or 0,
+                "fat": _nutrient(recipe, "Fat") or 0,
+                "carbohydrates": _nutrient(recipe, "Carbohydrates") or 0,
+                "diet_mask": diet_mask,
+                "intolerance_free_mask": intolerance_mask,
+                "ready_in_minutes": recipe.get("readyInMinutes"),
+                "servings": recipe.get("servings"),
+                "source_url": recipe.get("sourceUrl"),
+                "image": recipe.get("image"),
+            }
+
+        if not rows:
+            return 0
+        try:
+            # Own short session: ingest runs in the middle of plan generation and must not
+            # commit or roll back whatever the caller has pending.
+            with Session(bind=self.db.get_bind()) as db:
+                existing = {r.recipe_id: r for r in get_catalog_recipes_by_ids(db, list(rows))}
+                for recipe_id, values in rows.items():
+                    entry = existing.get(recipe_id)
+                    if entry is None:
+                        db.add(CatalogRecipe(recipe_id=recipe_id, **values))
+                        continue
+                    # Flags only accumulate: a recipe proven vegan by one search stays vegan.
+                    values["diet_mask"] |= entry.diet_mask
+                    values["intolerance_free_mask"] |= entry.intolerance_free_mask
+                    for key, value in values.items():
+                        setattr(entry, key, value)
+                db.commit()
+        except Exception as e:
+            logging.error(f"Failed to update recipe catalog: {e}")
+            return 0
+        return len(rows)
+
+    def pick(self, dish_type: str, min_calories: float, max_calories: float,
+             diet: Optional[str] = None, intolerances: Optional[str] = None,
+             exclude_ids: Iterable[int] = ()) -> Optional[Dict]:
+        if self.db is None:
+            return None
+        candidates = find_catalog_recipes(
+            self.db,
+            dish_type=dish_type,
+            min_calories=min_calories,
+            max_calories=max_calories,
+            diet_mask=diet_mask_for(diet),
+            intolerance_mask=intolerance_mask_for(intolerances),
+            exclude_ids=exclude_ids,
+            limit=RECIPE_CATALOG_MIN_MATCHES
+        )
+        if len(candidates) < RECIPE_CATALOG_MIN_MATCHES:
+            return None
+        return random.choice(candidates).to_search_result()
+
+    def count(self) -> int:
+        return count_catalog_recipes(self.db) if self.db is not None else 0
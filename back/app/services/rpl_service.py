@@ -1,26 +1,74 @@
+import hashlib
 import httpx
 import logging
 import os
 import tempfile
+import re
 import openpyxl
+from typing import Callable, Iterable, Iterator, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import case, delete, func, insert, or_, select, update
 from app.models.medication import PolishMedication
 from app.schemas.medication import RplDownloadStats
+from app.crud.rpl import get_rpl_sync_state, save_rpl_sync_state
+from app.services.medication_index import medication_index
+from app.utils.threads import run_in_thread
 
 RPL_XLSX_URL = "https://rejestrymedyczne.ezdrowie.gov.pl/api/rpl/medicinal-products/public-pl-report/get-xlsx"
+RPL_COLUMNS = ("id", "rpl_key", "trade_name", "active_substance", "strength", "form", "row_hash")
+RPL_INSERT_BATCH_SIZE = 5000
+
+def _copy_value(value) -> str:
+    if value is None:
+        return "\\N"
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+# File-like reader for copy_expert that renders rows as COPY text on demand,
+# so memory stays flat whatever the size of the registry.
+class _CopyStream:
+    def __init__(self, rows: Iterable[Tuple]):
+        self.rows = iter(rows)
+        self.buffer = ""
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self.buffer) < size:
+            row = next(self.rows, None)
+            if row is None:
+                break
+            self.buffer += "\t".join(_copy_value(v) for v in row) + "\n"
+        if size < 0:
+            size = len(self.buffer)
+        chunk, self.buffer = self.buffer[:size], self.buffer[size:]
+        return chunk
+
+    def readline(self, size: int = -1) -> str:
+        return self.read(size)
 
 class RPLService:
     def __init__(self, db: Session):
         self.db = db
         self.logger = logging.getLogger(__name__)
+        # Called between batches of the blocking import, raising from it rolls the import back.
+        self.cancel_check: Optional[Callable[[], None]] = None
 
-    async def update_database_from_rpl(self) -> RplDownloadStats:
+    async def update_database_from_rpl(self, mode: str = "delta",
+                                       progress: Optional[Callable[[float, str], None]] = None,
+                                       cancel_check: Optional[Callable[[], None]] = None) -> RplDownloadStats:
         self.logger.info("Rozpoczynanie aktualizacji bazy RPL (tryb Excel)...")
-        stats = RplDownloadStats(total_processed=0, added=0, errors=0)
+        progress = progress or (lambda value, message: None)
+        self.cancel_check = cancel_check
+        state = get_rpl_sync_state(self.db)
+        # A delta needs rows that already carry keys and hashes from a previous sync.
+        delta = mode == "delta" and state is not None and state.row_count > 0
+        stats = RplDownloadStats(total_processed=0, added=0, errors=0, mode="delta" if delta else "full")
         
         tmp_path = None
         try:
+            progress(0.05, "Downloading registry")
             with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp_file:
                 tmp_path = tmp_file.name
                 self.logger.info(f"Pobieranie XLSX z {RPL_XLSX_URL} do: {tmp_path}")
@@ -28,126 +76,262 @@ class RPLService:
                 headers = {
                     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
                 }
+                if delta and state.etag:
+                    headers["If-None-Match"] = state.etag
+                if delta and state.last_modified:
+                    headers["If-Modified-Since"] = state.last_modified
                 async with httpx.AsyncClient(timeout=600.0, verify=False) as client:
                     async with client.stream("GET", RPL_XLSX_URL, headers=headers) as response:
+                        if response.status_code == 304:
+                            self.logger.info("Rejestr RPL nie zmienił się od ostatniej synchronizacji.")
+                            stats.not_modified = True
+                            return stats
                         response.raise_for_status()
+                        etag = response.headers.get("etag")
+                        last_modified = response.headers.get("last-modified")
                         async for chunk in response.aiter_bytes():
                             tmp_file.write(chunk)
-            self.logger.info("Czyszczenie tabeli polish_medications...")
-            try:
-                self.db.execute(text("TRUNCATE TABLE polish_medications RESTART IDENTITY CASCADE;"))
-            except Exception:
-                self.db.query(PolishMedication).delete()
+
+            progress(0.4, "Importing registry")
+            # Parsing and loading are blocking, keep them off the event loop.
+            if delta:
+                await run_in_thread(self.sync_rpl_file, tmp_path, stats)
+            else:
+                await run_in_thread(self.import_rpl_file, tmp_path, stats)
+            row_count = stats.added + stats.updated + stats.unchanged if delta else stats.added
+            save_rpl_sync_state(self.db, etag=etag, last_modified=last_modified, row_count=row_count)
+            if not delta or stats.added or stats.updated or stats.deleted:
+                progress(0.95, "Rebuilding search index")
+                await run_in_thread(medication_index.rebuild, self.db)
+
+        except Exception as e:
+            self.logger.error(f"Krytyczny błąd importu RPL: {e}")
+            raise e
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        
+        self.logger.info(f"Zakończono import. Statystyki: {stats}")
+        return stats
+
+    def import_rpl_file(self, path: str, stats: RplDownloadStats) -> RplDownloadStats:
+        self.logger.info("Otwieranie pliku Excel...")
+        wb = openpyxl.load_workbook(path, read_only=True)
+        try:
+            rows = self._iter_rpl_rows(wb.active, stats)
+            if self.db.get_bind().dialect.name == "postgresql":
+                self._copy_and_swap(rows, stats)
+            else:
+                self._replace_in_transaction(rows, stats)
+        finally:
+            wb.close()
+        return stats
+
+    def sync_rpl_file(self, path: str, stats: RplDownloadStats) -> RplDownloadStats:
+        # Diff the file against the stored key/hash pairs and apply only the changes.
+        existing = {key: (med_id, row_hash) for med_id, key, row_hash in self.db.execute(
+            select(PolishMedication.id, PolishMedication.rpl_key, PolishMedication.row_hash)
+        )}
+        inserts, updates = [], []
+
+        wb = openpyxl.load_workbook(path, read_only=True)
+        try:
+            for row in self._iter_rpl_rows(wb.active, stats):
+                values = dict(zip(RPL_COLUMNS[1:], row))
+                current = existing.pop(values["rpl_key"], None)
+                if current is None:
+                    inserts.append(values)
+                    stats.added += 1
+                elif current[1] != values["row_hash"]:
+                    updates.append({"id": current[0], **values})
+                    stats.updated += 1
+                else:
+                    stats.unchanged += 1
+
+                if len(inserts) >= RPL_INSERT_BATCH_SIZE:
+                    self.db.execute(insert(PolishMedication), inserts)
+                    inserts = []
+                if len(updates) >= RPL_INSERT_BATCH_SIZE:
+                    self.db.execute(update(PolishMedication), updates)
+                    updates = []
+            if inserts:
+                self.db.execute(insert(PolishMedication), inserts)
+            if updates:
+                self.db.execute(update(PolishMedication), updates)
+
+            # Whatever is left in existing is no longer in the registry.
+            removed = [med_id for med_id, _ in existing.values()]
+            for start in range(0, len(removed), RPL_INSERT_BATCH_SIZE):
+                self.db.execute(delete(PolishMedication).where(
+                    PolishMedication.id.in_(removed[start:start + RPL_INSERT_BATCH_SIZE])
+                ))
+            stats.deleted = len(removed)
             self.db.commit()
-            self.logger.info("Otwieranie pliku Excel...")
-            wb = openpyxl.load_workbook(tmp_path, read_only=True)
-            ws = wb.active
-            
-            batch = []
-            BATCH_SIZE = 5000 
-            
-            rows = ws.iter_rows(values_only=True)
-            
+        except Exception:
+            self.db.rollback()
+            raise
+        finally:
+            wb.close()
+        return stats
+
+    def _iter_rpl_rows(self, ws, stats: RplDownloadStats) -> Iterator[Tuple]:
+        rows = ws.iter_rows(values_only=True)
+        try:
+            header_row = next(rows)
+        except StopIteration:
+            self.logger.error("Plik Excel jest pusty!")
+            return
+        header_map = {str(col).strip().lower(): idx for idx, col in enumerate(header_row) if col}
+        self.logger.info(f"Znalezione kolumny: {list(header_map.keys())[:5]}...")
+
+        col_id_idx = header_map.get('identyfikator produktu leczniczego')
+        col_name_idx = header_map.get('nazwa produktu leczniczego', 0)
+        col_subst_idx = header_map.get('nazwa powszechnie stosowana', 1)
+        col_moc_idx = header_map.get('moc', 2)
+        col_form_idx = header_map.get('postać farmaceutyczna', 3)
+
+        seen_keys = {}
+        self.logger.info("Rozpoczynanie importu wierszy...")
+        for row in rows:
+            stats.total_processed += 1
+            if self.cancel_check and stats.total_processed % RPL_INSERT_BATCH_SIZE == 0:
+                self.cancel_check()
             try:
-                header_row = next(rows)
-                header_map = {str(col).strip().lower(): idx for idx, col in enumerate(header_row) if col}
-                self.logger.info(f"Znalezione kolumny: {list(header_map.keys())[:5]}...")
-            except StopIteration:
-                self.logger.error("Plik Excel jest pusty!")
-                return stats
+                name = row[col_name_idx]
+                if not name:
+                    continue
+                substance = row[col_subst_idx] if col_subst_idx < len(row) else None
+                strength = row[col_moc_idx] if col_moc_idx < len(row) else None
+                form = row[col_form_idx] if col_form_idx < len(row) else None
+                values = (
+                    str(name)[:250],
+                    str(substance)[:250] if substance else "N/A",
+                    str(strength)[:100] if strength else None,
+                    str(form)[:200] if form else None
+                )
 
-            col_name_idx = header_map.get('nazwa produktu leczniczego', 0)
-            col_subst_idx = header_map.get('nazwa powszechnie stosowana', 1)
-            col_moc_idx = header_map.get('moc', 2)
-            col_form_idx = header_map.get('postać farmaceutyczna', 3)
+                product_id = row[col_id_idx] if col_id_idx is not None and col_id_idx < len(row) else None
+                base_key = str(product_id) if product_id else "|".join(v or "" for v in (values[0], values[2], values[3]))
+                # Files without product ids can repeat name/strength/form, number the repeats.
+                occurrence = seen_keys.get(base_key, 0)
+                seen_keys[base_key] = occurrence + 1
+                rpl_key = base_key if occurrence == 0 else f"{base_key}#{occurrence}"
 
-            self.logger.info("Rozpoczynanie importu wierszy...")
+                row_hash = hashlib.md5("\x1f".join(v or "" for v in values).encode("utf-8")).hexdigest()
+                yield (rpl_key, *values, row_hash)
+            except Exception:
+                stats.errors += 1
+
+    def _copy_and_swap(self, rows: Iterable[Tuple], stats: RplDownloadStats):
+        # Load a staging table with COPY and rename it into place in the same transaction.
+        # Readers keep seeing the old rows until the commit, there is no empty-table window.
+        table = PolishMedication.__table__.name
+        staging = f"{table}_staging"
+
+        def numbered():
+            for i, row in enumerate(rows, start=1):
+                stats.added = i
+                yield (i, *row)
+
+        cursor = self.db.connection().connection.cursor()
+        try:
+            cursor.execute(
+                "SELECT indexname, indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s",
+                (table,)
+            )
+            indexes = [(name, definition) for name, definition in cursor.fetchall() if name != f"{table}_pkey"]
+            cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", (table,))
+            sequence = cursor.fetchone()[0]
+
+            cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+            cursor.execute(f"CREATE TABLE {staging} (LIKE {table} INCLUDING CONSTRAINTS)")
+            cursor.copy_expert(f"COPY {staging} ({', '.join(RPL_COLUMNS)}) FROM STDIN", _CopyStream(numbered()))
+            # Indexes are built after the load, which is much faster than maintaining them row by row.
+            cursor.execute(f"ALTER TABLE {staging} ADD CONSTRAINT {staging}_pkey PRIMARY KEY (id)")
+            for name, definition in indexes:
+                definition = definition.replace(f"INDEX {name} ON", f"INDEX {name}_staging ON", 1)
+                cursor.execute(re.sub(rf" ON (\S+\.)?{table} ", rf" ON \g<1>{staging} ", definition, count=1))
+
+            cursor.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+            if sequence:
+                cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY {staging}.id")
+                cursor.execute(f"ALTER TABLE {staging} ALTER COLUMN id SET DEFAULT nextval('{sequence}')")
+                cursor.execute(f"SELECT setval('{sequence}', (SELECT COALESCE(MAX(id), 0) + 1 FROM {staging}), false)")
+            cursor.execute(f"DROP TABLE {table}")
+            cursor.execute(f"ALTER TABLE {staging} RENAME TO {table}")
+            cursor.execute(f"ALTER TABLE {table} RENAME CONSTRAINT {staging}_pkey TO {table}_pkey")
+            for name, _ in indexes:
+                cursor.execute(f"ALTER INDEX {name}_staging RENAME TO {name}")
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        finally:
+            cursor.close()
 
+    def _replace_in_transaction(self, rows: Iterable[Tuple], stats: RplDownloadStats):
+        # Fallback for databases without COPY, delete and reload inside a single transaction.
+        try:
+            self.db.execute(delete(PolishMedication))
+            batch = []
             for row in rows:
-                stats.total_processed += 1
-                try:
-                    name = row[col_name_idx]
-                    
-                    if name:
-                        substance = row[col_subst_idx] if col_subst_idx < len(row) else None
-                        strength = row[col_moc_idx] if col_moc_idx < len(row) else None
-                        form = row[col_form_idx] if col_form_idx < len(row) else None
-
-                        new_med = PolishMedication(
-                            trade_name=str(name)[:250],
-                            active_substance=str(substance)[:250] if substance else "N/A",
-                            strength=str(strength)[:100] if strength else None,
-                            form=str(form)[:200] if form else None
-                        )
-                        batch.append(new_med)
-
-                except Exception:
-                    stats.errors += 1
-                
-                if len(batch) >= BATCH_SIZE:
-                    self.db.bulk_save_objects(batch)
-                    self.db.commit()
+                batch.append(dict(zip(RPL_COLUMNS[1:], row)))
+                if len(batch) >= RPL_INSERT_BATCH_SIZE:
+                    self.db.execute(insert(PolishMedication), batch)
                     stats.added += len(batch)
                     batch = []
-
             if batch:
-                self.db.bulk_save_objects(batch)
-                self.db.commit()
+                self.db.execute(insert(PolishMedication), batch)
                 stats.added += len(batch)
-            
-            wb.close()
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
 
-        except Exception as e:
-            self.logger.error(f"Krytyczny błąd importu RPL: {e}")
-            raise e
-        finally:
-            if tmp_path and os.path.exists(tmp_path):
-                os.remove(tmp_path)
-        
-        final_count = self.db.query(PolishMedication).count()
-        self.logger.info(f"Zakończono import. Rekordów w bazie: {final_count}. Statystyki: {stats}")
-        return stats
+    def _is_postgres(self) -> bool:
+        return self.db.get_bind().dialect.name == "postgresql"
+
+    def _ranked_matches(self, name: str, fuzzy: bool):
+        # One query for what used to be up to four ILIKE scans: exact, case-insensitive,
+        # prefix and substring matches ranked in that order, plus trigram-similar names
+        # on Postgres when fuzzy is set. The pg_trgm GIN index serves ILIKE and %.
+        pattern = _escape_like(name)
+        trade_name = PolishMedication.trade_name
+        conditions = [trade_name.ilike(f"%{pattern}%", escape="\\")]
+        if fuzzy and self._is_postgres():
+            conditions.append(trade_name.op("%")(name))
+
+        rank = case(
+            (trade_name == name, 0),
+            (func.lower(trade_name) == name.lower(), 1),
+            (trade_name.ilike(f"{pattern}%", escape="\\"), 2),
+            (trade_name.ilike(f"%{pattern}%", escape="\\"), 3),
+            else_=4
+        )
+        ordering = [rank]
+        if self._is_postgres():
+            ordering.append(func.similarity(trade_name, name).desc())
+        ordering += [func.length(trade_name), trade_name]
+        return self.db.query(PolishMedication).filter(or_(*conditions)).order_by(*ordering)
 
     def search_polish_medications(self, query: str, limit: int = 50):
-        search_query = f"%{query}%"
-        results = self.db.query(PolishMedication).filter(
-            PolishMedication.trade_name.ilike(search_query)
-        ).limit(limit).all()
-        
+        query = (query or "").strip()
+        if not query:
+            return []
+        results = self._ranked_matches(query, fuzzy=True).limit(limit).all()
         return [f"{r.trade_name} || {r.active_substance}" for r in results]
+
     def get_exact_medication(self, name: str):
         name = name.strip()
-        med = self.db.query(PolishMedication).filter(
-            PolishMedication.trade_name == name
-        ).first()
-        
-        if med:
-            self.logger.info(f"Exact match for: {name}")
-            return med
-        med = self.db.query(PolishMedication).filter(
-            PolishMedication.trade_name.ilike(name)
-        ).first()
-        
-        if med:
-            self.logger.info(f"Case-insensitive match for: {name}")
-            return med
-        med = self.db.query(PolishMedication).filter(
-            PolishMedication.trade_name.ilike(f"{name}%")
-        ).first()
-        
-        if med:
-            self.logger.info(f"Prefix match for: {name} -> {med.trade_name}")
-            return med
-        med = self.db.query(PolishMedication).filter(
-            PolishMedication.trade_name.ilike(f"%{name}%")
-        ).first()
-        
+        if not name:
+            return None
+        # No fuzzy matches here, a look-alike name must not resolve to another drug's substance.
+        med = self._ranked_matches(name, fuzzy=False).first()
         if med:
-            self.logger.info(f"Partial match for: {name} -> {med.trade_name}")
-            return med
-        
-        self.logger.warning(f"No match found for: {name}")
-        return None
+            self.logger.info(f"Matched {name} -> {med.trade_name}")
+        else:
+            self.logger.warning(f"No match found for: {name}")
+        return med
 
     def get_active_substance(self, trade_name: str) -> str:
         med = self.get_exact_medication(trade_name)
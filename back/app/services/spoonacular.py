@@ -2,10 +2,18 @@ import os
 import httpx
 import logging
 import asyncio
+from collections import defaultdict
 from typing import Dict, Any, List, Optional
+from sqlalchemy.orm import Session
 from app.schemas.health_form import HealthFormCreate
 from app.schemas.spoonacular import DailyPlanResponse, WeeklyPlanResponse, ComplexSearchResponse, RecipeResponse
 from app.services.calculator import CalculatorService
+from app.services.recipe_cache import RecipeCacheService
+from app.services.recipe_catalog import RecipeCatalogService
+from app.utils.http_client import get_http_client
+
+RECIPE_CATALOG_HARVEST_SIZE = int(os.getenv("RECIPE_CATALOG_HARVEST_SIZE") or 5)
+SPOONACULAR_MAX_CONCURRENCY = int(os.getenv("SPOONACULAR_MAX_CONCURRENCY") or 4)
 
 class Spoonacular:
     ACCEPTABLE_DIETS = {
@@ -17,10 +25,12 @@ class Spoonacular:
         "sesame", "shellfish", "soy", "sulfite", "tree nut", "wheat"
     }
 
-    def __init__(self):
+    def __init__(self, db: Optional[Session] = None):
         self.base = "https://api.spoonacular.com"
         self.api_key = os.getenv("SPOONACULAR_API_KEY")
         self.headers = {}
+        self.recipe_cache = RecipeCacheService(db)
+        self.catalog = RecipeCatalogService(db)
 
     async def _make_request(self, endpoint: str, params: Dict[str, Any] = None) -> Dict:
         if params is None:
@@ -30,22 +40,22 @@ class Spoonacular:
         endpoint = endpoint.lstrip("/")
         full_url = f"{self.base}/{endpoint}"
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    full_url, 
-                    params=params, 
-                    headers=self.headers,
-                      timeout=15.0
-                      )
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPStatusError as e:
-                logging.error(f"HTTP error: {e.response.status_code} - {e.response.text}")
-                raise e
-            except Exception as e:
-                logging.error(f"Request error: {str(e)}")
-                raise e
+        client = get_http_client()
+        try:
+            response = await client.get(
+                full_url, 
+                params=params, 
+                headers=self.headers,
+                timeout=15.0
+                )
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPStatusError as e:
+            logging.error(f"HTTP error: {e.response.status_code} - {e.response.text}")
+            raise e
+        except Exception as e:
+            logging.error(f"Request error: {str(e)}")
+            raise e
 
     def _validate_list_param(self, items: Optional[List[str] | str], allowed_set: set) -> Optional[str]:
         if not items:
@@ -87,55 +97,39 @@ class Spoonacular:
         params["targetCalories"] = target_calories
         return params
 
-    async def generate_structured_plan(self, health_form: HealthFormCreate, meal_types: List[str]) -> DailyPlanResponse:
-        params = self._format_diet_params(health_form)
-        total_calories = params.get("targetCalories", 2000)
-        num_meals = len(meal_types)
-        
-        avg_calories = total_calories / num_meals
-        min_cal = int(avg_calories * 0.7) 
-        max_cal = int(avg_calories * 1.3)
-
-        diet = params.get("diet")
-        intolerances = params.get("intolerances")
-
-        async def fetch_recipe_for_slot(query_type: str):
-            search_params = {
-                "type": query_type,
-                "minCalories": min_cal,
-                "maxCalories": max_cal,
-                "number": 1,
-                "sort": "random", 
-                "addRecipeInformation": "true",
-                "addRecipeNutrition": "true", # KLUCZOWA POPRAWKA DLA MAKROSKŁADNIKÓW
-                "instructionsRequired": "true",
-                "fillIngredients": "false"
-            }
-            if diet: search_params["diet"] = diet
-            if intolerances: search_params["intolerances"] = intolerances
-
-            try:
-                result = await self._make_request("recipes/complexSearch", params=search_params)
-                results = result.get("results", [])
-                if results:
-                    return results[0]
-                return None
-            except Exception as e:
-                logging.error(f"Error fetching recipe for type {query_type}: {e}")
-                return None
-
-        tasks = [fetch_recipe_for_slot(m_type) for m_type in meal_types]
-        recipes = await asyncio.gather(*tasks)
+    async def _search_slot_recipes(self, query_type: str, number: int, min_cal: int, max_cal: int,
+                                   diet: Optional[str], intolerances: Optional[str]) -> List[Dict]:
+        search_params = {
+            "type": query_type,
+            "minCalories": min_cal,
+            "maxCalories": max_cal,
+            "number": number,
+            "sort": "random", 
+            "addRecipeInformation": "true",
+            "addRecipeNutrition": "true", # KLUCZOWA POPRAWKA DLA MAKROSKŁADNIKÓW
+            "instructionsRequired": "true",
+            "fillIngredients": "false"
+        }
+        if diet: search_params["diet"] = diet
+        if intolerances: search_params["intolerances"] = intolerances
 
-        valid_recipes = [r for r in recipes if r is not None]
+        try:
+            result = await self._make_request("recipes/complexSearch", params=search_params)
+            results = result.get("results", [])
+            self.catalog.ingest(results, dish_type=query_type, diet=diet, intolerances=intolerances)
+            return results
+        except Exception as e:
+            logging.error(f"Error fetching recipe for type {query_type}: {e}")
+            return []
 
+    def _summarize_recipes(self, recipes: List[Dict]) -> DailyPlanResponse:
         meals_response = []
         total_cals = 0.0
         total_prot = 0.0
         total_fat = 0.0
         total_carb = 0.0
 
-        for recipe in valid_recipes:
+        for recipe in recipes:
             nutrients = recipe.get("nutrition", {}).get("nutrients", [])
             
             cal = next((n['amount'] for n in nutrients if n['name'] == 'Calories'), 0)
@@ -166,6 +160,64 @@ class Spoonacular:
             }
         )
 
+    async def generate_structured_plan(self, health_form: HealthFormCreate, meal_types: List[str], use_catalog: bool = False) -> DailyPlanResponse:
+        plans = await self.generate_structured_plans(health_form, meal_types, days=1, use_catalog=use_catalog)
+        return plans[0]
+
+    async def generate_structured_plans(self, health_form: HealthFormCreate, meal_types: List[str],
+                                        days: int = 1, use_catalog: bool = False) -> List[DailyPlanResponse]:
+        params = self._format_diet_params(health_form)
+        total_calories = params.get("targetCalories", 2000)
+        num_meals = len(meal_types)
+        
+        avg_calories = total_calories / num_meals
+        min_cal = int(avg_calories * 0.7) 
+        max_cal = int(avg_calories * 1.3)
+
+        diet = params.get("diet")
+        intolerances = params.get("intolerances")
+
+        slots: List[List[Optional[Dict]]] = [[None] * num_meals for _ in range(days)]
+        used_ids = set()
+        if use_catalog:
+            for day_slots in slots:
+                for index, m_type in enumerate(meal_types):
+                    recipe = self.catalog.pick(m_type, min_cal, max_cal, diet=diet,
+                                               intolerances=intolerances, exclude_ids=used_ids)
+                    if recipe:
+                        day_slots[index] = recipe
+                        used_ids.add(recipe["id"])
+
+        # One search per dish type covers that type's slots on every day of the range.
+        missing = defaultdict(list)
+        for day, day_slots in enumerate(slots):
+            for index, recipe in enumerate(day_slots):
+                if recipe is None:
+                    missing[meal_types[index]].append((day, index))
+
+        if missing:
+            semaphore = asyncio.Semaphore(SPOONACULAR_MAX_CONCURRENCY)
+
+            async def search(query_type: str, needed: int):
+                async with semaphore:
+                    # Extra results only pay off when the catalog is read back, otherwise they cost points.
+                    extra = RECIPE_CATALOG_HARVEST_SIZE if use_catalog else 0
+                    number = min(100, needed + extra)
+                    return await self._search_slot_recipes(query_type, number, min_cal, max_cal, diet, intolerances)
+
+            query_types = list(missing)
+            results = await asyncio.gather(*[search(t, len(missing[t])) for t in query_types])
+            for query_type, candidates in zip(query_types, results):
+                pool = [r for r in candidates if r["id"] not in used_ids] or candidates
+                if not pool:
+                    continue
+                for n, (day, index) in enumerate(missing[query_type]):
+                    recipe = pool[n % len(pool)]
+                    slots[day][index] = recipe
+                    used_ids.add(recipe["id"])
+
+        return [self._summarize_recipes([r for r in day_slots if r is not None]) for day_slots in slots]
+
     async def generate_meal_plan(self, health_form: HealthFormCreate, time_frame: str = "day"):
         if time_frame not in ["day", "week"]:
             raise ValueError("time_frame must be 'day' or 'week'.")
@@ -278,8 +330,30 @@ class Spoonacular:
         return ComplexSearchResponse.model_validate(data) if data else ComplexSearchResponse(results=[], totalResults=0)
 
     async def get_recipe_information(self, recipe_id: int) -> Optional[RecipeResponse]:
+        cached = self.recipe_cache.get(recipe_id)
+        if cached is not None:
+            return cached
+
         endpoint = f"recipes/{recipe_id}/information"
         params = {"includeNutrition": "true"}
         
         data = await self._make_request(endpoint, params=params)
-        return RecipeResponse.model_validate(data) if data else None
+        recipe = RecipeResponse.model_validate(data) if data else None
+        if recipe:
+            self.recipe_cache.put(recipe)
+            self.catalog.ingest([data])
+        return recipe
+
+    async def get_recipes_information(self, recipe_ids: List[int]) -> Dict[int, RecipeResponse]:
+        recipes = self.recipe_cache.get_many(recipe_ids)
+        missing = [rid for rid in dict.fromkeys(recipe_ids) if rid not in recipes]
+        if not missing:
+            return recipes
+
+        params = {"ids": ",".join(str(rid) for rid in missing), "includeNutrition": "true"}
+        data = await self._make_request("recipes/informationBulk", params=params)
+        fetched = [RecipeResponse.model_validate(item) for item in (data or [])]
+        self.recipe_cache.put_many(fetched)
+        self.catalog.ingest(data or [])
+        recipes.update({recipe.id: recipe for recipe in fetched})
+        return recipes
@@ -1,3 +1,4 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.schemas.user import UserCreate
 from app.schemas.user_auth import UserAuthCreate, UserWithAuth, PasswordUpdateRequest, PasswordUpdateResponse
@@ -6,10 +7,10 @@ from app.crud.user_auth import (create_new_user_auth as crud_create_new_user_aut
                                 get_user_auth_by_id, 
                                 get_user_auth_by_email)
 from app.utils.jwt import generate_access_token
+from app.utils import passwords
 from app.schemas.token import Token
-
-import hashlib
-import secrets
+from app.database.database import AnySession, execute, commit
+from app.models.user_auth import UserAuth
 
 class UserService:
 
@@ -39,20 +40,11 @@ class UserService:
 
     @staticmethod
     def hash_password(password:str):
-        salt = secrets.token_hex(16)
-        hashed = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000)
-        return hashed.hex() + salt
+        return passwords.hash_password(password)
 
     @staticmethod
     def verify_password(password: str, hashed_password: str):
-        if len(hashed_password) < 32:
-            return False
-        
-        salt = hashed_password[-32:]
-        original_hash = hashed_password[:-32]
-        new_hash = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000).hex()
-    
-        return original_hash == new_hash
+        return passwords.verify_password(password, hashed_password)
     
     @staticmethod
     def change_password(db:Session, change_password_data: PasswordUpdateRequest, user_id:int):
@@ -82,11 +74,31 @@ class UserService:
         if not UserService.verify_password(login_data.password, user_auth.password):
             raise ValueError("Invalid password or email1")
         
+        return UserService._issue_token(user_auth)
+
+    @staticmethod
+    async def authenticate_user_async(db: AnySession, login_data: UserAuthCreate):
+        # Hashing runs in the password pool, the event loop only waits for it.
+        result = await execute(db, select(UserAuth).where(UserAuth.email == login_data.email))
+        user_auth = result.scalars().first()
+        if not user_auth:
+            raise ValueError("Invalid password or email")
+
+        if not await passwords.verify_password_async(login_data.password, user_auth.password):
+            raise ValueError("Invalid password or email1")
+
+        if passwords.needs_rehash(user_auth.password):
+            user_auth.password = await passwords.hash_password_async(login_data.password)
+            await commit(db)
+
+        return UserService._issue_token(user_auth)
+
+    @staticmethod
+    def _issue_token(user_auth):
         token_payload = {
         "email": user_auth.email,
         "user_id": user_auth.user_id
         }
-        print(token_payload)
         token = generate_access_token(token_payload)
 
         return Token(
@@ -0,0 +1,49 @@
+import os
+import logging
+import httpx
+from typing import Optional
+
+HTTP_MAX_CONNECTIONS = int(os.getenv('HTTP_MAX_CONNECTIONS') or 100)
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('HTTP_MAX_KEEPALIVE_CONNECTIONS') or 20)
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv('HTTP_KEEPALIVE_EXPIRY') or 30.0)
+HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT') or 15.0)
+
+try:
+    import h2  # noqa: F401  (httpx only negotiates HTTP/2 when h2 is installed)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_client: Optional[httpx.AsyncClient] = None
+
+def _build_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+    )
+    return httpx.AsyncClient(
+        limits=limits,
+        timeout=HTTP_TIMEOUT,
+        http2=HTTP2_AVAILABLE
+    )
+
+def get_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+async def start_http_client():
+    client = get_http_client()
+    logging.info(
+        f"Shared HTTP client ready (http2={HTTP2_AVAILABLE}, "
+        f"max_connections={HTTP_MAX_CONNECTIONS}, keepalive={HTTP_MAX_KEEPALIVE_CONNECTIONS})"
+    )
+    return client
+
+async def close_http_client():
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
@@ -1,11 +1,20 @@
+import hashlib
+import time
 from datetime import datetime, timedelta
+from typing import Dict
 from jose import JWTError, jwt
 from dotenv import load_dotenv
 from fastapi import HTTPException, status, Depends
 from sqlalchemy.orm import Session
 from fastapi.security import OAuth2PasswordBearer
 from app.database.database import get_database
+from sqlalchemy import event
 from app.crud.user import get_user_info_by_id
+from app.models.user import User
+from app.models.user_auth import UserAuth
+from app.schemas.user import User as UserSnapshot
+from app.schemas.token import TokenUser
+from app.utils.cache import TTLLRUCache
 import os
 from pathlib import Path
 
@@ -16,8 +25,18 @@ load_dotenv(dotenv_path=env_path)
 SECRET_KEY = os.getenv('SECRET_KEY')
 ALGORITHM = os.getenv('ALGORITHM')
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv('ACCESS_TOKEN_EXPIRE_MINUTES') or 60)
+AUTH_CACHE_TTL_SECONDS = int(os.getenv('AUTH_CACHE_TTL_SECONDS') or 60)
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv('AUTH_CACHE_MAX_ENTRIES') or 1024)
+# Comma separated e-mails allowed to run maintenance endpoints (cache eviction, registry imports, pool stats).
+ADMIN_EMAILS = {email.strip().lower() for email in (os.getenv('ADMIN_EMAILS') or '').split(',') if email.strip()}
+
+# Verified token -> (epoch, user snapshot), keyed by a hash so raw tokens are not kept around.
+user_lru = TTLLRUCache(max_size=AUTH_CACHE_MAX_ENTRIES, ttl=AUTH_CACHE_TTL_SECONDS)
+_user_epochs: Dict[int, int] = {}
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/token")
+# EventSource cannot send headers, streams may pass the token as a query parameter instead.
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/token", auto_error=False)
 
 def generate_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
@@ -42,7 +61,8 @@ def get_current_user_data(token: str = Depends(oauth2_scheme)):
         email = payload.get("email")
         user_data = {
             "user_id": user_id,
-            "email": email
+            "email": email,
+            "exp": payload.get("exp")
             }
         if user_id is None or email is None:
             raise HTTPException(
@@ -59,9 +79,26 @@ def get_current_user_data(token: str = Depends(oauth2_scheme)):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+def get_current_user_claims(token: str = Depends(oauth2_scheme)):
+    # For endpoints that only need the user id, no users query at all.
+    user_data = get_current_user_data(token)
+    return TokenUser(id=user_data["user_id"], email=user_data["email"])
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def invalidate_cached_user(user_id: int):
+    # Bumping the epoch drops every cached token of the user at once.
+    _user_epochs[user_id] = _user_epochs.get(user_id, 0) + 1
+
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_database)):
+    key = _token_key(token)
+    cached = user_lru.get(key)
+    if cached is not None and cached[0] == _user_epochs.get(cached[1].id, 0):
+        return cached[1]
     try:
         user_data = get_current_user_data(token)
+        epoch = _user_epochs.get(user_data["user_id"], 0)
         user =  get_user_info_by_id(db, user_data["user_id"])
         if user is None:
             raise HTTPException(
@@ -69,6 +106,34 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
                 detail="User not found",
                 headers={"WWW_authenticate": "Bearer"}
             )
-        return user
+        snapshot = UserSnapshot.model_validate(user)
+        # Never cache past the token's own expiry, a hit skips the signature check.
+        ttl = min(AUTH_CACHE_TTL_SECONDS, (user_data["exp"] or 0) - time.time())
+        if ttl > 0:
+            user_lru.set(key, (epoch, snapshot), ttl=ttl)
+        return snapshot
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def is_admin(claims: TokenUser) -> bool:
+    return claims.email.lower() in ADMIN_EMAILS
+
+def get_current_admin(claims: TokenUser = Depends(get_current_user_claims), user: UserSnapshot = Depends(get_current_user)):
+    # The live user lookup makes a deleted admin's token stop working right away.
+    if not is_admin(claims):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
+        )
+    return user
+
+def _invalidate_user(mapper, connection, target):
+    invalidate_cached_user(target.id)
+
+def _invalidate_user_auth(mapper, connection, target):
+    invalidate_cached_user(target.user_id)
+
+event.listen(User, "after_update", _invalidate_user)
+event.listen(User, "after_delete", _invalidate_user)
+event.listen(UserAuth, "after_update", _invalidate_user_auth)
+event.listen(UserAuth, "after_delete", _invalidate_user_auth)
\ No newline at end of file
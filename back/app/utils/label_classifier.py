@@ -0,0 +1,145 @@
+from typing import Dict, Iterable, List, Tuple
+from app.models.common import WithMealRelation
+
+# Pattern tables are built once at import instead of on every call. Matching is a plain
+# substring test per pattern: on label-sized text a combined regex or a guard-word
+# prefilter measured no faster in CPython, the scans themselves dominate. That makes
+# severity on short descriptions ~2x faster, meal timing on whole labels gains nothing
+# (benchmarks/label_matcher.py), its repeat work is saved by the timing cache instead.
+def _pattern_table(weighted_patterns: Dict[str, Dict[str, int]]) -> Tuple[Tuple[str, str, int], ...]:
+    return tuple((pattern, category, points)
+                 for category, patterns in weighted_patterns.items()
+                 for pattern, points in patterns.items())
+
+TIMING_CONTRADICTIONS = (
+    'regardless of food', 'with or without food', 'does not matter',
+    'food has no effect', 'not affected by food', 'no food effect'
+)
+
+TIMING_PATTERNS = _pattern_table({
+    'empty_stomach': {
+        'on an empty stomach': 100, 'empty stomach': 100, 'do not take with food': 100,
+        'must not be taken with food': 95, 'without food': 85, 'food decreases absorption': 80,
+        'absorption decreased by food': 80, 'fasting': 70, 'take on empty': 60,
+        'at least 1 hour before food': 90, 'at least 2 hours before food': 95,
+        'at least 30 minutes before food': 85, 'away from food': 75, 'separate from food': 70,
+        'avoid food': 80, 'food may reduce absorption': 75, 'reduced bioavailability with food': 80,
+        'avoid taking with food': 85, 'should not be taken with food': 90
+    },
+    'before': {
+        '1 hour before meals': 100, 'one hour before meals': 100, '30 minutes before meals': 95,
+        'thirty minutes before': 95, 'at least 1 hour before': 95, 'before meals': 80,
+        'before eating': 80, 'prior to meals': 75, 'morning before breakfast': 80,
+        'take before': 70, '15 minutes before meals': 90, 'half an hour before': 95,
+        'on arising, before breakfast': 85, 'at least 30 minutes before': 85
+    },
+    'during': {
+        'with food': 100, 'with meals': 100, 'take with food': 95, 'should be taken with food': 95,
+        'during meals': 85, 'with breakfast': 85, 'with dinner': 85, 'with lunch': 85,
+        'food increases absorption': 75, 'to minimize stomach upset': 65, 'with fatty meal': 80,
+        'with high-fat meal': 85, 'to reduce gastrointestinal': 70, 'to avoid nausea': 65,
+        'administer with food': 90, 'take alongside food': 85, 'better absorbed with food': 80,
+        'improved absorption with food': 80, 'food enhances bioavailability': 85,
+        'to reduce stomach irritation': 70, 'with a meal': 95
+    },
+    'after': {
+        '2 hours after meals': 100, 'two hours after meals': 100, '1 hour after meals': 95,
+        'after meals': 80, 'after eating': 80, 'following meals': 75, 'post-meal': 70,
+        'at least 2 hours after': 95, 'wait 1 hour after eating': 90, 'at least 1 hour after': 90
+    },
+})
+
+TIMING_CATEGORIES = ('empty_stomach', 'before', 'during', 'after')
+
+TIMING_CONTEXT_BONUSES = (
+    (('absorption', 'decreased', 'food'), 'empty_stomach', 30),
+    (('absorption', 'increased', 'food'), 'during', 30),
+    (('bioavailability', 'reduced', 'food'), 'empty_stomach', 30),
+    (('bioavailability', 'increased', 'food'), 'during', 30),
+    (('stomach', 'upset'), 'during', 20),
+    (('hour', 'before'), 'before', 15),
+    (('hour', 'after'), 'after', 15),
+)
+
+TIMING_RELATIONS = {
+    'empty_stomach': WithMealRelation.empty_stomach, 'before': WithMealRelation.before,
+    'during': WithMealRelation.during, 'after': WithMealRelation.after
+}
+
+SEVERITY_PATTERNS = _pattern_table({
+    'critical': {
+        'contraindicated': 100, 'do not use together': 100, 'must not be used': 100,
+        'life-threatening': 100, 'fatal': 90, 'death': 90, 'cardiac arrest': 100,
+        'anaphylaxis': 90, 'severe bleeding': 85, 'hemorrhage': 80, 'stroke': 80
+    },
+    'high': {
+        'significant interaction': 60, 'serious': 65, 'severe': 70, 'avoid': 60,
+        'should not': 55, 'increased bleeding': 70, 'seizure': 65, 'liver damage': 70,
+        'kidney damage': 70, 'renal failure': 75, 'significantly increases': 55
+    },
+    'moderate': {
+        'monitor': 30, 'caution': 25, 'use with caution': 30, 'may increase': 25,
+        'may decrease': 25, 'dose adjustment': 35, 'reduced effectiveness': 30
+    },
+    'low': {'minor': 10, 'mild': 10, 'unlikely': 5, 'possible': 10},
+})
+
+SEVERITY_DANGER_COMBINATIONS = (
+    (('bleeding', 'anticoagulant'), 30), (('bleeding', 'nsaid'), 25),
+    (('prolonged', 'qt'), 40), (('serotonin', 'syndrome'), 50)
+)
+
+def classify_meal_timing(description: str) -> WithMealRelation:
+    if not description or len(description.strip()) < 5:
+        return WithMealRelation.unknown
+
+    desc = description.lower()
+    if any(pattern in desc for pattern in TIMING_CONTRADICTIONS):
+        return WithMealRelation.unknown
+
+    timing_scores = dict.fromkeys(TIMING_CATEGORIES, 0)
+    for pattern, category, points in TIMING_PATTERNS:
+        if pattern in desc:
+            timing_scores[category] += points
+
+    if 'do not take with food' in desc or 'avoid taking with food' in desc:
+        timing_scores['during'] = 0
+        timing_scores['after'] = 0
+    if timing_scores['empty_stomach'] >= 80:
+        timing_scores['before'] = 0
+
+    for keywords, category, bonus in TIMING_CONTEXT_BONUSES:
+        if all(kw in desc for kw in keywords):
+            timing_scores[category] += bonus
+
+    max_score = max(timing_scores.values())
+    total_score = sum(timing_scores.values())
+    confidence = max_score / total_score if total_score > 0 else 0.0
+
+    if max_score < 50 or confidence < 0.4:
+        return WithMealRelation.unknown
+
+    winner = max(timing_scores.items(), key=lambda x: x[1])[0]
+    return TIMING_RELATIONS.get(winner, WithMealRelation.unknown)
+
+def determine_severity(description: str) -> str:
+    if not description or len(description.strip()) < 10:
+        return "Unknown"
+
+    description_lower = description.lower()
+    risk_score = sum(points for pattern, _, points in SEVERITY_PATTERNS if pattern in description_lower)
+
+    for keywords, bonus in SEVERITY_DANGER_COMBINATIONS:
+        if all(k in description_lower for k in keywords):
+            risk_score += bonus
+
+    if risk_score >= 100: return "Critical"
+    if risk_score >= 50: return "High"
+    if risk_score >= 20: return "Moderate"
+    if risk_score >= 1: return "Low"
+    return "Unknown"
+
+def determine_severity_many(descriptions: Iterable[str]) -> List[str]:
+    descriptions = list(descriptions)
+    results = {description: determine_severity(description) for description in set(descriptions)}
+    return [results[description] for description in descriptions]
@@ -0,0 +1,51 @@
+import os
+import hmac
+import asyncio
+import hashlib
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+
+PASSWORD_HASH_ITERATIONS = int(os.getenv('PASSWORD_HASH_ITERATIONS') or 100000)
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS') or min(4, os.cpu_count() or 1))
+PASSWORD_HASH_ALGORITHM = "pbkdf2_sha256"
+
+# hashlib releases the GIL while deriving, so threads run PBKDF2 in parallel. The pool
+# bounds how many hashes run at once, a login burst queues here instead of taking
+# every core and every request thread.
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+def _derive(password: str, salt: str, iterations: int) -> str:
+    return hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), iterations).hex()
+
+def hash_password(password: str, iterations: int = None) -> str:
+    # pbkdf2_sha256$<iterations>$<salt>$<hash>, the cost travels with the hash.
+    iterations = iterations or PASSWORD_HASH_ITERATIONS
+    salt = secrets.token_hex(16)
+    return f"{PASSWORD_HASH_ALGORITHM}${iterations}${salt}${_derive(password, salt, iterations)}"
+
+def _parse(hashed_password: str):
+    if hashed_password.startswith(PASSWORD_HASH_ALGORITHM + "$"):
+        _, iterations, salt, expected = hashed_password.split("$", 3)
+        return int(iterations), salt, expected
+    # Legacy format: hex hash followed by a 32 character salt, 100k iterations.
+    if len(hashed_password) < 32:
+        return None
+    return 100000, hashed_password[-32:], hashed_password[:-32]
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    parsed = _parse(hashed_password or "")
+    if parsed is None:
+        return False
+    iterations, salt, expected = parsed
+    return hmac.compare_digest(_derive(password, salt, iterations), expected)
+
+def needs_rehash(hashed_password: str) -> bool:
+    parsed = _parse(hashed_password or "")
+    return (parsed is None or not hashed_password.startswith(PASSWORD_HASH_ALGORITHM + "$")
+            or parsed[0] != PASSWORD_HASH_ITERATIONS)
+
+async def hash_password_async(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_executor, hash_password, password)
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(_executor, verify_password, password, hashed_password)
@@ -0,0 +1,98 @@
+import os
+import json
+import asyncio
+import logging
+from typing import Any, Dict, Set
+
+NOTIFICATION_BROKER = (os.getenv('NOTIFICATION_BROKER') or 'local').lower()
+NOTIFICATION_CHANNEL = os.getenv('NOTIFICATION_CHANNEL') or 'notifications'
+NOTIFICATION_QUEUE_SIZE = int(os.getenv('NOTIFICATION_QUEUE_SIZE') or 100)
+
+class LocalBroker:
+    # Per-user fan-out to the subscribers of this process.
+    def __init__(self):
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=NOTIFICATION_QUEUE_SIZE)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(user_id)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[user_id]
+
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def _deliver(self, user_id: int, message: Dict[str, Any]):
+        for queue in list(self._subscribers.get(user_id, ())):
+            if queue.full():
+                # A stalled client loses its oldest message instead of holding up the publisher.
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+    async def publish(self, user_id: int, message: Dict[str, Any]):
+        self._deliver(user_id, message)
+
+class PostgresBroker(LocalBroker):
+    # Relays messages through LISTEN/NOTIFY so a notification created on one uvicorn
+    # worker reaches subscribers connected to any of them. Each worker keeps one
+    # dedicated asyncpg connection for both listening and publishing.
+    def __init__(self, dsn: str, channel: str):
+        super().__init__()
+        self.dsn = dsn
+        self.channel = channel
+        self._connection = None
+        self._lock = asyncio.Lock()
+
+    async def start(self):
+        await self._connect()
+
+    async def stop(self):
+        if self._connection is not None:
+            await self._connection.close()
+        self._connection = None
+
+    async def _connect(self):
+        import asyncpg
+        self._connection = await asyncpg.connect(self.dsn)
+        await self._connection.add_listener(self.channel, self._on_notify)
+        logging.info(f"Listening for notifications on channel {self.channel}")
+
+    def _on_notify(self, connection, pid, channel, payload):
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            logging.error(f"Malformed notification payload on {channel}")
+            return
+        self._deliver(data["user_id"], data["message"])
+
+    async def publish(self, user_id: int, message: Dict[str, Any]):
+        payload = json.dumps({"user_id": user_id, "message": message})
+        try:
+            # One asyncpg connection runs one query at a time.
+            async with self._lock:
+                if self._connection is None or self._connection.is_closed():
+                    await self._connect()
+                await self._connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+        except Exception as e:
+            logging.error(f"NOTIFY failed, delivering to local subscribers only: {e}")
+            self._deliver(user_id, message)
+
+def build_broker(kind: str = NOTIFICATION_BROKER) -> LocalBroker:
+    if kind == "postgres":
+        from app.database.database import DataBaseUrl
+        return PostgresBroker(DataBaseUrl, NOTIFICATION_CHANNEL)
+    return LocalBroker()
+
+notification_broker = build_broker()
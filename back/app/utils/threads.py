@@ -0,0 +1,12 @@
+import asyncio
+
+async def run_in_thread(func, *args, **kwargs):
+    # asyncio.to_thread, except that cancelling the caller does not abandon the thread.
+    # A thread cannot be interrupted, so the caller waits for it to return before the
+    # cancellation propagates and it releases the session or file the thread still uses.
+    future = asyncio.ensure_future(asyncio.to_thread(func, *args, **kwargs))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        await asyncio.wait([future])
+        raise
@@ -0,0 +1,189 @@
+# Compares the precompiled label classifier with the per-call pattern tables it replaced.
+# Run from back/: python -m benchmarks.label_matcher
+import random
+import time
+from app.models.common import WithMealRelation
+from app.utils.label_classifier import classify_meal_timing, determine_severity, determine_severity_many
+
+LABEL_SENTENCES = [
+    "Take this medication by mouth with food, usually once or twice daily",
+    "Absorption is decreased by food, take at least 1 hour before food",
+    "Tablets should be swallowed whole on an empty stomach with a full glass of water",
+    "Dosage must be individualized on the basis of both effectiveness and tolerance",
+    "Monitor renal function periodically in elderly patients",
+    "Use with caution in patients with hepatic impairment; dose adjustment may be required",
+    "Concomitant use with anticoagulants may increase the risk of severe bleeding",
+    "Serotonin syndrome has been reported with concomitant use of serotonergic drugs",
+    "Patients should be advised to report any signs of an allergic reaction",
+    "In clinical trials the most common adverse reactions were headache and nausea",
+    "Store at room temperature away from moisture and light",
+    "Pharmacokinetics were not affected in patients with mild renal impairment",
+    "The tablets may be taken 30 minutes before meals to reduce gastrointestinal discomfort",
+    "Possible QT interval prolongation was observed at supratherapeutic doses",
+]
+
+def legacy_meal_timing(description: str) -> WithMealRelation:
+    if not description or len(description.strip()) < 5:
+        return WithMealRelation.unknown
+
+    desc = description.lower()
+
+    contradictions = [
+        'regardless of food', 'with or without food', 'does not matter',
+        'food has no effect', 'not affected by food', 'no food effect'
+    ]
+    for pattern in contradictions:
+        if pattern in desc:
+            return WithMealRelation.unknown
+
+    timing_scores = {'empty_stomach': 0, 'before': 0, 'during': 0, 'after': 0}
+
+    empty_stomach_patterns = {
+        'on an empty stomach': 100, 'empty stomach': 100, 'do not take with food': 100,
+        'must not be taken with food': 95, 'without food': 85, 'food decreases absorption': 80,
+        'absorption decreased by food': 80, 'fasting': 70, 'take on empty': 60,
+        'at least 1 hour before food': 90, 'at least 2 hours before food': 95,
+        'at least 30 minutes before food': 85, 'away from food': 75, 'separate from food': 70,
+        'avoid food': 80, 'food may reduce absorption': 75, 'reduced bioavailability with food': 80,
+        'avoid taking with food': 85, 'should not be taken with food': 90
+    }
+    before_patterns = {
+        '1 hour before meals': 100, 'one hour before meals': 100, '30 minutes before meals': 95,
+        'thirty minutes before': 95, 'at least 1 hour before': 95, 'before meals': 80,
+        'before eating': 80, 'prior to meals': 75, 'morning before breakfast': 80,
+        'take before': 70, '15 minutes before meals': 90, 'half an hour before': 95,
+        'on arising, before breakfast': 85, 'at least 30 minutes before': 85
+    }
+    during_patterns = {
+        'with food': 100, 'with meals': 100, 'take with food': 95, 'should be taken with food': 95,
+        'during meals': 85, 'with breakfast': 85, 'with dinner': 85, 'with lunch': 85,
+        'food increases absorption': 75, 'to minimize stomach upset': 65, 'with fatty meal': 80,
+        'with high-fat meal': 85, 'to reduce gastrointestinal': 70, 'to avoid nausea': 65,
+        'administer with food': 90, 'take alongside food': 85, 'better absorbed with food': 80,
+        'improved absorption with food': 80, 'food enhances bioavailability': 85,
+        'to reduce stomach irritation': 70, 'with a meal': 95
+    }
+    after_patterns = {
+        '2 hours after meals': 100, 'two hours after meals': 100, '1 hour after meals': 95,
+        'after meals': 80, 'after eating': 80, 'following meals': 75, 'post-meal': 70,
+        'at least 2 hours after': 95, 'wait 1 hour after eating': 90, 'at least 1 hour after': 90
+    }
+
+    all_patterns = [
+        (empty_stomach_patterns, 'empty_stomach'), (before_patterns, 'before'),
+        (during_patterns, 'during'), (after_patterns, 'after')
+    ]
+
+    for patterns_dict, category in all_patterns:
+        sorted_patterns = sorted(patterns_dict.items(), key=lambda x: len(x[0]), reverse=True)
+        for pattern, points in sorted_patterns:
+            if pattern in desc:
+                timing_scores[category] += points
+
+    if 'do not take with food' in desc or 'avoid taking with food' in desc:
+        timing_scores['during'] = 0
+        timing_scores['after'] = 0
+    if timing_scores['empty_stomach'] >= 80:
+        timing_scores['before'] = 0
+
+    context_bonuses = [
+        (['absorption', 'decreased', 'food'], 'empty_stomach', 30),
+        (['absorption', 'increased', 'food'], 'during', 30),
+        (['bioavailability', 'reduced', 'food'], 'empty_stomach', 30),
+        (['bioavailability', 'increased', 'food'], 'during', 30),
+        (['stomach', 'upset'], 'during', 20),
+        (['hour', 'before'], 'before', 15),
+        (['hour', 'after'], 'after', 15),
+    ]
+    for keywords, category, bonus in context_bonuses:
+        if all(kw in desc for kw in keywords):
+            timing_scores[category] += bonus
+
+    max_score = max(timing_scores.values())
+    total_score = sum(timing_scores.values())
+    confidence = max_score / total_score if total_score > 0 else 0.0
+
+    if max_score < 50 or confidence < 0.4:
+        return WithMealRelation.unknown
+
+    winner = max(timing_scores.items(), key=lambda x: x[1])[0]
+    mapping = {
+        'empty_stomach': WithMealRelation.empty_stomach, 'before': WithMealRelation.before,
+        'during': WithMealRelation.during, 'after': WithMealRelation.after
+    }
+    return mapping.get(winner, WithMealRelation.unknown)
+
+def legacy_severity(description: str) -> str:
+    if not description or len(description.strip()) < 10:
+        return "Unknown"
+
+    description_lower = description.lower()
+    risk_score = 0
+
+    critical_patterns = {
+        'contraindicated': 100, 'do not use together': 100, 'must not be used': 100,
+        'life-threatening': 100, 'fatal': 90, 'death': 90, 'cardiac arrest': 100,
+        'anaphylaxis': 90, 'severe bleeding': 85, 'hemorrhage': 80, 'stroke': 80
+    }
+    high_risk_patterns = {
+        'significant interaction': 60, 'serious': 65, 'severe': 70, 'avoid': 60,
+        'should not': 55, 'increased bleeding': 70, 'seizure': 65, 'liver damage': 70,
+        'kidney damage': 70, 'renal failure': 75, 'significantly increases': 55
+    }
+    moderate_risk_patterns = {
+        'monitor': 30, 'caution': 25, 'use with caution': 30, 'may increase': 25,
+        'may decrease': 25, 'dose adjustment': 35, 'reduced effectiveness': 30
+    }
+    low_risk_patterns = {'minor': 10, 'mild': 10, 'unlikely': 5, 'possible': 10}
+
+    all_patterns = {**critical_patterns, **high_risk_patterns, **moderate_risk_patterns, **low_risk_patterns}
+    sorted_patterns = sorted(all_patterns.items(), key=lambda x: len(x[0]), reverse=True)
+
+    for pattern, points in sorted_patterns:
+        if pattern in description_lower:
+            risk_score += points
+
+    danger_combinations = [
+        (['bleeding', 'anticoagulant'], 30), (['bleeding', 'nsaid'], 25),
+        (['prolonged', 'qt'], 40), (['serotonin', 'syndrome'], 50)
+    ]
+    for keywords, bonus in danger_combinations:
+        if all(k in description_lower for k in keywords):
+            risk_score += bonus
+
+    if risk_score >= 100: return "Critical"
+    if risk_score >= 50: return "High"
+    if risk_score >= 20: return "Moderate"
+    if risk_score >= 1: return "Low"
+    return "Unknown"
+
+def make_label(rng: random.Random, sentences: int) -> str:
+    return ". ".join(rng.choice(LABEL_SENTENCES) for _ in range(sentences)) + "."
+
+def timed(func, inputs, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        results = func(inputs)
+    return (time.perf_counter() - started) / rounds, results
+
+def report(name, legacy, compiled, batch, inputs, rounds):
+    legacy_time, legacy_results = timed(lambda items: [legacy(i) for i in items], inputs, rounds)
+    compiled_time, compiled_results = timed(lambda items: [compiled(i) for i in items], inputs, rounds)
+    assert legacy_results == compiled_results, f"{name}: results differ"
+    print(f"{name}: {len(inputs)} inputs, avg {sum(map(len, inputs)) // len(inputs)} chars")
+    print(f"  legacy   {legacy_time * 1000:8.2f} ms")
+    print(f"  compiled {compiled_time * 1000:8.2f} ms  ({legacy_time / compiled_time:.1f}x)")
+    if batch is not None:
+        batch_time, batch_results = timed(batch, inputs, rounds)
+        assert batch_results == legacy_results, f"{name}: batch results differ"
+        print(f"  batch    {batch_time * 1000:8.2f} ms  ({legacy_time / batch_time:.1f}x)")
+
+if __name__ == "__main__":
+    rng = random.Random(42)
+    # openFDA labels joined for timing analysis are typically 10-60 kB.
+    labels = [make_label(rng, rng.randint(120, 600)) for _ in range(50)]
+    # Interaction descriptions are single sentences cut to 300 chars, often repeated across pairs.
+    sentences = [make_label(rng, 1)[:300] for _ in range(2000)]
+
+    report("meal timing", legacy_meal_timing, classify_meal_timing, None, labels, 5)
+    report("severity", legacy_severity, determine_severity, determine_severity_many, sentences, 5)
@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.routes.user import router as user_router
@@ -11,13 +12,50 @@ from app.api.routes.recipes import router as recipes_router
 from app.api.routes.dependant import router as dependant_router
 from app.api.routes.notification import router as notification_router
 from app.api.routes.integration import router as google_router
+from app.api.routes.system import router as system_router
+from app.api.routes.jobs import router as jobs_router
+from app.utils.http_client import start_http_client, close_http_client
+from app.database.database import dispose_async_engine
+from app.services.jobs import job_runner
+from app.services.medication_index import medication_index
+from app.utils.pubsub import notification_broker
+from app.services.notification_dispatcher import notification_dispatcher
+import app.services.job_handlers
+import asyncio
+import logging
 import uvicorn
 import sys
 import os
 
 sys.path.append(os.path.join(os.path.dirname(__file__), "app"))
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await start_http_client()
+    await job_runner.start()
+    try:
+        await notification_broker.start()
+    except Exception as e:
+        # Publishing retries the connection, until then only local subscribers are reached.
+        logging.error(f"Failed to start notification broker: {e}")
+    await notification_dispatcher.start()
+    try:
+        await asyncio.to_thread(medication_index.rebuild)
+    except Exception as e:
+        # Search falls back to the database until the periodic refresh builds the index.
+        logging.error(f"Failed to build medication index: {e}")
+    await medication_index.start()
+    try:
+        yield
+    finally:
+        await job_runner.stop()
+        await medication_index.stop()
+        await notification_dispatcher.stop()
+        await notification_broker.stop()
+        await close_http_client()
+        await dispose_async_engine()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -38,6 +76,8 @@ app.include_router(recipes_router)
 app.include_router(dependant_router)
 app.include_router(notification_router)
 app.include_router(google_router)
+app.include_router(system_router)
+app.include_router(jobs_router)
 
 #+local
 if __name__=="__main__":
@@ -3,8 +3,11 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 from fastapi.testclient import TestClient
-from app.database.database import Base, get_database
+from app.database.database import Base, get_database, get_async_database
 from main import app
+from app.services.jobs import job_runner
+from app.services.medication_index import medication_index
+from app.services.notification_dispatcher import notification_dispatcher
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
 
@@ -35,5 +38,9 @@ def client(db_session):
             db_session.close()
     
     app.dependency_overrides[get_database] = override_get_db
+    app.dependency_overrides[get_async_database] = override_get_db
+    job_runner.session_factory = TestingSessionLocal
+    medication_index.session_factory = TestingSessionLocal
+    notification_dispatcher.session_factory = TestingSessionLocal
     with TestClient(app) as c:
         yield c
\ No newline at end of file
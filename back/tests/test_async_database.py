@@ -0,0 +1,91 @@
+import pytest
+from datetime import date, time
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from fastapi.testclient import TestClient
+from app.database.database import Base, get_database, get_async_database
+from main import app
+from app.models.plan import Plan
+from app.models.meal import Meal
+from app.models.medication import Medication
+from app.models.daily_adherence import DailyAdherence
+from app.models.common import MealType, WithMealRelation
+from app.services.jobs import job_runner
+from app.services.medication_index import medication_index
+from app.services.notification_dispatcher import notification_dispatcher
+
+# The shared client fixture hands the sync session to async routes as well. Here both
+# dependencies point at one SQLite file, the async one through aiosqlite, so the routes
+# run on a real AsyncSession like they do on asyncpg.
+@pytest.fixture(scope="function")
+def async_client(tmp_path):
+    url = f"{tmp_path / 'app.db'}"
+    engine = create_engine(f"sqlite:///{url}", connect_args={"check_same_thread": False})
+    # NullPool: aiosqlite connections belong to the TestClient's loop, none may outlive it.
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{url}", poolclass=NullPool)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    Base.metadata.create_all(bind=engine)
+
+    def override_get_db():
+        with SessionLocal() as db:
+            yield db
+
+    async def override_get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app.dependency_overrides[get_database] = override_get_db
+    app.dependency_overrides[get_async_database] = override_get_async_db
+    job_runner.session_factory = SessionLocal
+    medication_index.session_factory = SessionLocal
+    notification_dispatcher.session_factory = SessionLocal
+    with TestClient(app) as c:
+        yield c, SessionLocal
+    app.dependency_overrides.clear()
+    engine.dispose()
+
+def test_status_and_edit_endpoints_on_async_session(async_client):
+    client, SessionLocal = async_client
+    client.post("/api/v1/users/", json={
+        "user_data": {"name": "Async", "surname": "Carer", "login": "async"},
+        "user_auth_data": {"email": "async@test.com", "password": "pass"}
+    })
+    token = client.post("/api/v1/auth/session", json={"email": "async@test.com", "password": "pass"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    dependent_id = client.post("/api/v1/dependents/create", headers=headers, json={
+        "user_data": {"name": "Dep", "surname": "User", "login": "async-dep"},
+        "user_auth_data": {"email": "async-dep@test.com", "password": "pass"}
+    }).json()["id"]
+
+    with SessionLocal() as db:
+        plan = Plan(user_id=dependent_id, day_start=date(2025, 3, 1))
+        db.add(plan)
+        db.flush()
+        meal = Meal(plan_id=plan.id, time=time(8), meal_type=MealType.breakfast, spoonacular_recipe_id=1, eaten=False)
+        medication = Medication(plan_id=plan.id, time=time(8), name="Apap", description="", taken=False,
+                                with_meal_relation=WithMealRelation.unknown)
+        db.add_all([meal, medication])
+        db.commit()
+        meal_id, medication_id = meal.id, medication.id
+
+    # The carer is not the owner, so the care relation is checked on the AsyncSession too.
+    with patch("app.crud.daily_adherence.ADHERENCE_ROLLUP_ENABLED", True):
+        meal_res = client.patch(f"/api/v1/meals/{meal_id}", headers=headers, json={"eaten": True})
+        med_res = client.patch(f"/api/v1/medications/{medication_id}/medication", headers=headers, json={"taken": True})
+    assert meal_res.status_code == 200 and meal_res.json()["eaten"] is True
+    assert med_res.status_code == 200 and med_res.json()["taken"] is True
+
+    meal_edit = client.patch(f"/api/v1/meals/{meal_id}/details", headers=headers, json={"time": "09:30:00"})
+    med_edit = client.patch(f"/api/v1/medications/{medication_id}", headers=headers, json={"time": "07:15:00"})
+    assert meal_edit.status_code == 200 and meal_edit.json()["time"] == "09:30:00"
+    assert med_edit.status_code == 200 and med_edit.json()["time"] == "07:15:00"
+
+    with SessionLocal() as db:
+        rollup = db.query(DailyAdherence).filter(DailyAdherence.user_id == dependent_id).one()
+        assert (rollup.meals_done, rollup.meals_total, rollup.meds_taken, rollup.meds_total) == (1, 1, 1, 1)
+        assert db.get(Meal, meal_id).time == time(9, 30)
+        assert db.get(Medication, medication_id).time == time(7, 15)
@@ -1,3 +1,11 @@
+from unittest.mock import patch
+from app.crud.user import get_user_info_by_id, update_user_password
+from app.utils.jwt import get_current_user, user_lru
+from app.utils import passwords
+from app.crud.user_auth import get_user_auth_by_email
+from app.models.user import User
+from app.models.user_auth import UserAuth
+
 def test_register_user(client):
     response = client.post("/api/v1/users/", json={
         "user_data": {
@@ -38,4 +46,59 @@ def test_users_me_is_patient_check(client):
     
     response = client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {token}"})
     assert response.status_code == 200
-    assert response.json()["is_patient"] is False
\ No newline at end of file
+    assert response.json()["is_patient"] is False
+
+def test_current_user_is_cached_until_password_change(client, db_session):
+    user = client.post("/api/v1/users/", json={
+        "user_data": {"name": "Cache", "surname": "Test", "login": "cacheuser"},
+        "user_auth_data": {"email": "cache@test.com", "password": "pass"}
+    }).json()
+    token = client.post("/api/v1/auth/session", json={"email": "cache@test.com", "password": "pass"}).json()["access_token"]
+    user_lru.clear()
+
+    with patch("app.utils.jwt.get_user_info_by_id", wraps=get_user_info_by_id) as lookup:
+        assert get_current_user(token, db_session).login == "cacheuser"
+        assert get_current_user(token, db_session).id == user["id"]
+        assert lookup.call_count == 1
+
+        update_user_password(db_session, user["id"], "new-hash")
+        get_current_user(token, db_session)
+        assert lookup.call_count == 2
+
+    response = client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+
+def test_login_rehashes_legacy_password(client, db_session):
+    client.post("/api/v1/users/", json={
+        "user_data": {"name": "Legacy", "surname": "Hash", "login": "legacy"},
+        "user_auth_data": {"email": "legacy@test.com", "password": "pass"}
+    })
+    user_auth = get_user_auth_by_email(db_session, "legacy@test.com")
+    assert user_auth.password.startswith("pbkdf2_sha256$")
+    salt = "ab" * 16
+    user_auth.password = passwords._derive("pass", salt, 100000) + salt
+    db_session.commit()
+
+    assert client.post("/api/v1/auth/session", json={"email": "legacy@test.com", "password": "wrong"}).status_code == 401
+    assert client.post("/api/v1/auth/session", json={"email": "legacy@test.com", "password": "pass"}).status_code == 200
+    # The request closed db_session, so user_auth is detached: load it again.
+    user_auth = get_user_auth_by_email(db_session, "legacy@test.com")
+    assert user_auth.password.startswith(f"pbkdf2_sha256${passwords.PASSWORD_HASH_ITERATIONS}$")
+    assert not passwords.needs_rehash(user_auth.password)
+    assert passwords.verify_password("pass", user_auth.password)
+
+def test_deleted_user_token_is_rejected(client, db_session):
+    user = client.post("/api/v1/users/", json={
+        "user_data": {"name": "Gone", "surname": "Test", "login": "gone"},
+        "user_auth_data": {"email": "gone@test.com", "password": "pass"}
+    }).json()
+    token = client.post("/api/v1/auth/session", json={"email": "gone@test.com", "password": "pass"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    body = {"current_password": "wrong", "new_password": "a", "confirm_password": "b"}
+    assert client.put("/api/v1/users/me/password", json=body, headers=headers).status_code == 400
+
+    db_session.delete(db_session.get(UserAuth, user["id"]))
+    db_session.delete(db_session.get(User, user["id"]))
+    db_session.commit()
+
+    assert client.put("/api/v1/users/me/password", json=body, headers=headers).status_code == 401
@@ -0,0 +1,135 @@
+import asyncio
+import time
+import threading
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+import pytest
+from app.schemas.medication import RplDownloadStats
+from app.utils.threads import run_in_thread
+
+@pytest.fixture(autouse=True)
+def admin_emails():
+    with patch("app.utils.jwt.ADMIN_EMAILS", {"admin@test.com"}):
+        yield
+
+def _auth_headers(client):
+    client.post("/api/v1/users/", json={
+        "user_data": {"name": "Admin", "surname": "Test", "login": "admin"},
+        "user_auth_data": {"email": "admin@test.com", "password": "pass"}
+    })
+    token = client.post("/api/v1/auth/session", json={"email": "admin@test.com", "password": "pass"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def _wait_for(client, job_id, headers, statuses=("succeeded", "failed", "cancelled")):
+    for _ in range(100):
+        job = client.get(f"/api/v1/jobs/{job_id}", headers=headers).json()
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} did not finish: {job}")
+
+def test_rpl_update_runs_as_single_flight_job(client):
+    headers = _auth_headers(client)
+
+    async def fake_update(self, mode="delta", progress=None, cancel_check=None):
+        progress(0.5, "Importing registry")
+        await asyncio.sleep(0.2)
+        return RplDownloadStats(total_processed=3, added=3, errors=0, mode=mode)
+
+    with patch("app.services.rpl_service.RPLService.update_database_from_rpl", new=fake_update):
+        first = client.post("/api/v1/medications/rpl/update/job?mode=full", headers=headers)
+        second = client.post("/api/v1/medications/rpl/update/job", headers=headers)
+        assert first.status_code == 202
+        assert second.json()["id"] == first.json()["id"]
+
+        job = _wait_for(client, first.json()["id"], headers)
+
+    assert job["status"] == "succeeded"
+    assert job["progress"] == 1.0
+    assert job["result"]["added"] == 3
+    assert job["result"]["mode"] == "full"
+
+def test_running_job_can_be_cancelled(client):
+    headers = _auth_headers(client)
+
+    async def slow_update(self, mode="delta", progress=None, cancel_check=None):
+        await asyncio.sleep(10)
+
+    with patch("app.services.rpl_service.RPLService.update_database_from_rpl", new=slow_update):
+        job_id = client.post("/api/v1/medications/rpl/update/job", headers=headers).json()["id"]
+        _wait_for(client, job_id, headers, statuses=("running",))
+        client.delete(f"/api/v1/jobs/{job_id}", headers=headers)
+        job = _wait_for(client, job_id, headers)
+
+    assert job["status"] == "cancelled"
+
+def test_cancel_waits_for_the_blocking_step(client):
+    headers = _auth_headers(client)
+    thread_done = threading.Event()
+
+    async def threaded_update(self, mode="delta", progress=None, cancel_check=None):
+        def work():
+            try:
+                while True:
+                    cancel_check()
+                    time.sleep(0.01)
+            finally:
+                time.sleep(0.1)
+                thread_done.set()
+        await run_in_thread(work)
+
+    with patch("app.services.rpl_service.RPLService.update_database_from_rpl", new=threaded_update):
+        job_id = client.post("/api/v1/medications/rpl/update/job", headers=headers).json()["id"]
+        _wait_for(client, job_id, headers, statuses=("running",))
+        client.delete(f"/api/v1/jobs/{job_id}", headers=headers)
+        job = _wait_for(client, job_id, headers)
+        assert thread_done.is_set()
+
+    assert job["status"] == "cancelled"
+
+def test_shared_jobs_are_admin_only(client):
+    headers = _auth_headers(client)
+    client.post("/api/v1/users/", json={
+        "user_data": {"name": "Plain", "surname": "User", "login": "plain"},
+        "user_auth_data": {"email": "plain@test.com", "password": "pass"}
+    })
+    token = client.post("/api/v1/auth/session", json={"email": "plain@test.com", "password": "pass"}).json()["access_token"]
+    other = {"Authorization": f"Bearer {token}"}
+
+    async def slow_update(self, mode="delta", progress=None, cancel_check=None):
+        await asyncio.sleep(10)
+
+    with patch("app.services.rpl_service.RPLService.update_database_from_rpl", new=slow_update):
+        assert client.post("/api/v1/medications/rpl/update/job", headers=other).status_code == 403
+        # The old synchronous endpoint is gone, the job is the only way to update the registry.
+        assert client.post("/api/v1/medications/rpl/update", headers=other).status_code == 404
+        job_id = client.post("/api/v1/medications/rpl/update/job", headers=headers).json()["id"]
+        assert client.get(f"/api/v1/jobs/{job_id}", headers=other).status_code == 404
+        assert client.delete(f"/api/v1/jobs/{job_id}", headers=other).status_code == 404
+        client.delete(f"/api/v1/jobs/{job_id}", headers=headers)
+        _wait_for(client, job_id, headers)
+
+def test_enqueue_without_runner_leaves_no_job(db_session):
+    from app.models.job import Job
+    from app.services.jobs import job_runner
+    import app.services.job_handlers
+
+    with pytest.raises(RuntimeError):
+        job_runner.enqueue(db_session, "rpl_update", {"mode": "delta"}, lock_key="rpl_update")
+    assert db_session.query(Job).count() == 0
+
+def test_only_jobs_without_heartbeat_are_failed(db_session):
+    from app.crud.job import fail_stale_jobs
+    from app.models.job import Job
+
+    now = datetime.now(timezone.utc)
+    alive = Job(kind="rpl_update", status="running", worker_id="a", heartbeat_at=now)
+    dead = Job(kind="rpl_update", status="running", worker_id="b", heartbeat_at=now - timedelta(minutes=10))
+    db_session.add_all([alive, dead])
+    db_session.commit()
+
+    assert fail_stale_jobs(db_session, now - timedelta(minutes=2)) == 1
+    db_session.refresh(alive)
+    db_session.refresh(dead)
+    assert alive.status == "running"
+    assert dead.status == "failed"
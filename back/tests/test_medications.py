@@ -0,0 +1,285 @@
+import asyncio
+import openpyxl
+from unittest.mock import AsyncMock, patch
+from app.services.drug_label_cache import DrugLabelCacheService, label_lru
+from app.services.medication_timing import timing_lru
+from app.services.medication_service import DrugInteractionService
+from app.crud.drug_interaction import create_drug_interactions_bulk, get_interactions_for_pairs
+from app.schemas.drug_interaction import DrugInteractionCreate
+from app.models.common import WithMealRelation
+from app.utils.label_classifier import classify_meal_timing, determine_severity_many
+from app.services.rpl_service import RPLService
+from app.schemas.medication import RplDownloadStats
+from app.services.medication_index import MedicationPrefixIndex, medication_index
+from app.services.medication_service import fda_search_lru
+from app.crud.rpl import save_rpl_sync_state
+
+label_payload = {
+    "results": [{
+        "openfda": {"brand_name": ["Ibuprofen"], "generic_name": ["IBUPROFEN"]},
+        "dosage_and_administration": ["Take with food or milk."],
+        "spl_unclassified_section": ["Not needed for timing or interactions."]
+    }]
+}
+
+def test_drug_label_is_fetched_once(client):
+    label_lru.clear()
+
+    with patch("app.services.medication_service.DrugInteractionService._make_request", new_callable=AsyncMock) as mock_request:
+        mock_request.return_value = label_payload
+        first = client.post("/api/v1/medications/validate", json={"drug_name": "Ibuprofen"})
+        second = client.post("/api/v1/medications/validate", json={"drug_name": "  ibuprofen "})
+
+        assert first.json()["is_valid"] is True
+        assert second.json()["is_valid"] is True
+        assert mock_request.await_count == 1
+
+        label_lru.clear()
+        client.post("/api/v1/medications/validate", json={"drug_name": "Ibuprofen"})
+        assert mock_request.await_count == 1
+
+def test_missing_drug_label_is_cached(client):
+    label_lru.clear()
+
+    with patch("app.services.medication_service.DrugInteractionService._make_request", new_callable=AsyncMock) as mock_request:
+        mock_request.return_value = None
+        first = client.post("/api/v1/medications/validate", json={"drug_name": "Notadrug"})
+        second = client.post("/api/v1/medications/validate", json={"drug_name": "Notadrug"})
+
+        assert first.json()["is_valid"] is False
+        assert second.json()["is_valid"] is False
+        assert mock_request.await_count == 4
+
+def test_label_without_known_sections_is_not_cached_as_missing(db_session):
+    label_lru.clear()
+    cache = DrugLabelCacheService(db=db_session)
+
+    assert cache.put("Rarely", {"id": "abc", "spl_unclassified_section": ["Text."]}) == {"id": "abc"}
+    assert cache.put("Notadrug", None) is not cache.put("Otherdrug", None)
+
+    label_lru.clear()
+    assert cache.get("rarely") == {"id": "abc"}
+    assert cache.get("notadrug") == {}
+
+def test_label_cache_write_leaves_caller_transaction_alone(db_session):
+    from app.models.user import User
+    db_session.add(User(name="Pending", surname="User", login="pending-label"))
+
+    with patch("app.services.drug_label_cache.save_cached_label", side_effect=RuntimeError("disk full")):
+        assert DrugLabelCacheService(db=db_session).put("Apap", {"id": "apap"}) == {"id": "apap"}
+    db_session.commit()
+
+    assert db_session.query(User).filter(User.login == "pending-label").count() == 1
+
+def test_interaction_matrix_fetches_each_label_once(db_session):
+    labels = {
+        "warfarin": {"drug_interactions": ["Aspirin may increase the risk of severe bleeding. Take as directed."]},
+        "aspirin": {"warnings": ["Ask a doctor before use."]},
+        "metformin": None,
+    }
+    service = DrugInteractionService(db=db_session, fda_api_key=None)
+
+    with patch.object(service, "_get_drug_label_info", new_callable=AsyncMock) as mock_label:
+        mock_label.side_effect = lambda name: labels[name]
+        interactions = asyncio.run(service.check_drug_interaction(["Warfarin", "Aspirin", "Metformin"]))
+
+        assert mock_label.await_count == 3
+        assert len(interactions) == 1
+        assert {interactions[0].medication_1, interactions[0].medication_2} == {"warfarin", "aspirin"}
+        assert interactions[0].severity != "Unknown"
+
+        again = asyncio.run(service.check_drug_interaction(["metformin", "aspirin", "warfarin"]))
+        assert mock_label.await_count == 3
+        assert len(again) == 1
+
+def test_interaction_check_leaves_caller_transaction_alone(db_session):
+    from app.models.user import User
+    service = DrugInteractionService(db=db_session, fda_api_key=None)
+    db_session.add(User(name="Pending", surname="User", login="pending-meds"))
+
+    with patch.object(service, "_fetch_interactions_from_api", new_callable=AsyncMock) as mock_fetch:
+        mock_fetch.side_effect = RuntimeError("openFDA is down")
+        assert asyncio.run(service.check_drug_interaction(["Warfarin", "Aspirin"])) == []
+    db_session.commit()
+
+    assert db_session.query(User).filter(User.login == "pending-meds").count() == 1
+
+def test_interaction_pairs_are_canonical(db_session):
+    create_drug_interactions_bulk(db_session, [
+        DrugInteractionCreate(drug1="Warfarin", drug2="Aspirin", severity="High", description="Bleeding risk."),
+        DrugInteractionCreate(drug1="aspirin", drug2="warfarin", severity="High", description="Duplicate."),
+    ])
+    create_drug_interactions_bulk(db_session, [
+        DrugInteractionCreate(drug1="warfarin", drug2="aspirin", severity="Low", description="Stored again."),
+    ])
+
+    found = get_interactions_for_pairs(db_session, [("WARFARIN", "aspirin"), ("aspirin", "metformin")])
+    assert len(found) == 1
+    assert (found[0].drug1, found[0].drug2) == ("aspirin", "warfarin")
+    assert found[0].description == "Duplicate."
+
+def test_label_classifier_batch():
+    assert [classify_meal_timing(label) for label in [
+        "Take on an empty stomach, at least 1 hour before food.",
+        "Tablets should be taken with food to minimize stomach upset.",
+        "May be taken with or without food.",
+        "",
+    ]] == [WithMealRelation.empty_stomach, WithMealRelation.during, WithMealRelation.unknown, WithMealRelation.unknown]
+
+    assert determine_severity_many([
+        "Concomitant use is contraindicated.",
+        "Monitor blood pressure.",
+        "Monitor blood pressure.",
+        "short",
+    ]) == ["Critical", "Moderate", "Moderate", "Unknown"]
+
+def test_medication_timing_is_memoized(db_session):
+    timing_lru.clear()
+    service = DrugInteractionService(db=db_session, fda_api_key=None)
+    label = {"set_id": "abc", "version": "7", "dosage_and_administration": ["Take on an empty stomach."]}
+
+    with patch.object(service, "_get_drug_label_info", new_callable=AsyncMock) as mock_label:
+        mock_label.return_value = label
+        first = asyncio.run(service.get_medication_timings(["Levothyroxine", "levothyroxine "]))
+        assert first == {
+            "Levothyroxine": WithMealRelation.empty_stomach,
+            "levothyroxine ": WithMealRelation.empty_stomach
+        }
+        assert mock_label.await_count == 1
+
+        timing_lru.clear()
+        second = asyncio.run(service.get_medication_timing("LEVOTHYROXINE"))
+        assert second == WithMealRelation.empty_stomach
+        assert mock_label.await_count == 1
+
+def test_medication_timing_is_recomputed_for_a_new_label_version(db_session):
+    timing_lru.clear()
+    label_lru.clear()
+    service = DrugInteractionService(db=db_session, fda_api_key=None)
+    old = {"set_id": "abc", "version": "1", "dosage_and_administration": ["Take on an empty stomach."]}
+    new = {"set_id": "abc", "version": "2", "dosage_and_administration": ["Take with food."]}
+
+    with patch.object(service, "_fetch_drug_label", new_callable=AsyncMock) as mock_fetch:
+        mock_fetch.return_value = old
+        assert asyncio.run(service.get_medication_timing("Metformin")) == WithMealRelation.empty_stomach
+
+        # The label cache now holds a newer label, the memoized timing no longer matches it.
+        service.label_cache.put("Metformin", new)
+        assert asyncio.run(service.get_medication_timing("Metformin")) == WithMealRelation.during
+        assert mock_fetch.await_count == 1
+
+def _write_registry(tmp_path, rows, header=("Nazwa Produktu Leczniczego", "Nazwa powszechnie stosowana", "Moc", "Postać farmaceutyczna")):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(list(header))
+    for row in rows:
+        ws.append(row)
+    path = tmp_path / "rpl.xlsx"
+    wb.save(path)
+    return str(path)
+
+def test_rpl_import_replaces_registry(db_session, tmp_path):
+    service = RPLService(db=db_session)
+    first = service.import_rpl_file(_write_registry(tmp_path, [
+        ["Apap", "Paracetamolum", "500 mg", "tabletki"],
+        ["Polopiryna", "Acidum acetylsalicylicum", "300 mg", "tabletki"],
+    ]), RplDownloadStats(total_processed=0, added=0, errors=0))
+    assert first.added == 2
+
+    second = service.import_rpl_file(_write_registry(tmp_path, [
+        ["Apap", "Paracetamolum", "500 mg", "tabletki"],
+        [None, "skipped", None, None],
+    ]), RplDownloadStats(total_processed=0, added=0, errors=0))
+    assert second.total_processed == 2
+    assert second.added == 1
+    assert service.get_active_substance("apap") == "Paracetamolum"
+    assert service.get_exact_medication("Polopiryna") is None
+
+def test_rpl_delta_sync_applies_only_changes(db_session, tmp_path):
+    header = ("Identyfikator Produktu Leczniczego", "Nazwa Produktu Leczniczego", "Nazwa powszechnie stosowana", "Moc", "Postać farmaceutyczna")
+    service = RPLService(db=db_session)
+    service.import_rpl_file(_write_registry(tmp_path, [
+        [1, "Apap", "Paracetamolum", "500 mg", "tabletki"],
+        [2, "Polopiryna", "Acidum acetylsalicylicum", "300 mg", "tabletki"],
+        [3, "Ibum", "Ibuprofenum", "200 mg", "kapsułki"],
+    ], header), RplDownloadStats(total_processed=0, added=0, errors=0))
+
+    stats = service.sync_rpl_file(_write_registry(tmp_path, [
+        [1, "Apap", "Paracetamolum", "500 mg", "tabletki"],
+        [3, "Ibum", "Ibuprofenum", "400 mg", "kapsułki"],
+        [4, "Nurofen", "Ibuprofenum", "200 mg", "tabletki"],
+    ], header), RplDownloadStats(total_processed=0, added=0, errors=0, mode="delta"))
+
+    assert (stats.added, stats.updated, stats.deleted, stats.unchanged) == (1, 1, 1, 1)
+    assert service.get_exact_medication("Ibum").strength == "400 mg"
+    assert service.get_exact_medication("Polopiryna") is None
+    assert service.get_active_substance("Nurofen") == "Ibuprofenum"
+
+def test_polish_medication_search_is_ranked(db_session, tmp_path):
+    service = RPLService(db=db_session)
+    service.import_rpl_file(_write_registry(tmp_path, [
+        ["Ibuprom Max", "Ibuprofenum", "400 mg", "tabletki"],
+        ["Nurofen", "Ibuprofenum", "200 mg", "tabletki"],
+        ["Ibuprom", "Ibuprofenum", "200 mg", "tabletki"],
+        ["Apap 100%", "Paracetamolum", "500 mg", "tabletki"],
+    ]), RplDownloadStats(total_processed=0, added=0, errors=0))
+
+    assert service.search_polish_medications("ibuprom")[:2] == ["Ibuprom || Ibuprofenum", "Ibuprom Max || Ibuprofenum"]
+    assert service.search_polish_medications("100%") == ["Apap 100% || Paracetamolum"]
+    assert service.get_exact_medication("IBUPROM").trade_name == "Ibuprom"
+    assert service.get_exact_medication("Ibup").trade_name == "Ibuprom"
+
+def test_medication_prefix_index_folds_diacritics(db_session, tmp_path):
+    RPLService(db=db_session).import_rpl_file(_write_registry(tmp_path, [
+        ["Łagodny Syrop", "Althaeae radix", "100 ml", "syrop"],
+        ["Apap", "Paracetamolum", "500 mg", "tabletki"],
+        ["Apap Extra", "Paracetamolum", "500 mg", "tabletki"],
+        ["Żel Ibuprom", "Ibuprofenum", "5%", "żel"],
+    ]), RplDownloadStats(total_processed=0, added=0, errors=0))
+    index = MedicationPrefixIndex()
+    index.rebuild(db_session)
+
+    assert index.search("apa") == ["Apap", "Apap Extra"]
+    assert index.search("APAP", limit=1) == ["Apap"]
+    assert index.search("lagod") == ["Łagodny Syrop"]
+    assert index.search("zel") == ["Żel Ibuprom"]
+    assert index.search("paracet") == ["Paracetamolum"]
+    assert index.search("") == []
+
+def test_medication_index_reloads_when_registry_changes(db_session, tmp_path):
+    index = MedicationPrefixIndex()
+    index.session_factory = medication_index.session_factory
+    index.build([])
+    assert not index.ready
+
+    save_rpl_sync_state(db_session, etag="v1", last_modified=None, row_count=1)
+    RPLService(db=db_session).import_rpl_file(_write_registry(tmp_path, [
+        ["Apap", "Paracetamolum", "500 mg", "tabletki"],
+    ]), RplDownloadStats(total_processed=0, added=0, errors=0))
+    assert index.refresh_if_stale()
+    assert index.search("apa") == ["Apap"]
+    assert not index.refresh_if_stale()
+
+    RPLService(db=db_session).import_rpl_file(_write_registry(tmp_path, [
+        ["Apap", "Paracetamolum", "500 mg", "tabletki"],
+        ["Apap Extra", "Paracetamolum", "500 mg", "tabletki"],
+    ]), RplDownloadStats(total_processed=0, added=0, errors=0))
+    save_rpl_sync_state(db_session, etag="v2", last_modified=None, row_count=2)
+    assert index.refresh_if_stale()
+    assert index.search("apa") == ["Apap", "Apap Extra"]
+
+def test_search_merges_local_and_openfda_names(client):
+    fda_search_lru.clear()
+    medication_index.build(["Ibuprom", "Ibuprofen", "Ibum"])
+
+    with patch("app.services.medication_service.DrugInteractionService._make_request", new_callable=AsyncMock) as mock_request:
+        mock_request.return_value = label_payload
+        local_only = client.get("/api/v1/medications/search", params={"query": "ibu", "limit": 2})
+        merged = client.get("/api/v1/medications/search", params={"query": "ibu", "limit": 5})
+        again = client.get("/api/v1/medications/search", params={"query": "IBU", "limit": 5})
+
+    assert local_only.json() == ["Ibum", "Ibuprofen"]
+    assert merged.json() == ["Ibum", "Ibuprofen", "Ibuprom"]
+    assert again.json() == merged.json()
+    assert mock_request.await_count == 1
+    medication_index.build([])
@@ -1,5 +1,11 @@
 from unittest.mock import patch, AsyncMock
 from app.schemas.spoonacular import DailyPlanResponse, Nutrients, RecipeResponse
+import asyncio
+from app.models.user import User
+from app.schemas.notification import NotificationCreate
+from app.crud.notification import create_new_notification
+from app.utils.pubsub import notification_broker
+from app.services.notification_dispatcher import notification_dispatcher
 
 def test_meal_status_notification(client):
     client.post("/api/v1/users/", json={
@@ -48,9 +54,171 @@ def test_meal_status_notification(client):
         "comment": "Yummy"
     })
     assert patch_res.status_code == 200
+    asyncio.run(notification_dispatcher.flush(force=True))
     notif_res = client.get("/api/v1/notifications/me", headers=carer_headers)
     assert notif_res.status_code == 200
     notifications = notif_res.json()
     assert len(notifications) > 0
     assert "eaten" in notifications[0]["message"]
-    assert "Test Soup" in notifications[0]["message"]
\ No newline at end of file
+    assert "Test Soup" in notifications[0]["message"]
+
+def test_new_notification_is_pushed_to_subscribers(db_session):
+    carer = User(name="Push", surname="Carer", login="push-carer")
+    patient = User(name="Push", surname="Patient", login="push-patient")
+    db_session.add_all([carer, patient])
+    db_session.commit()
+
+    async def scenario():
+        queue = notification_broker.subscribe(carer.id)
+        try:
+            created = await create_new_notification(db_session, NotificationCreate(
+                user_id=carer.id, related_user_id=patient.id, type="meal_status_update", message="Eaten"
+            ))
+            return created, queue.get_nowait()
+        finally:
+            notification_broker.unsubscribe(carer.id, queue)
+
+    created, pushed = asyncio.run(scenario())
+    assert pushed["id"] == created.id
+    assert pushed["message"] == "Eaten"
+    assert pushed["subject"]["name"] == "Push"
+    assert notification_broker.subscriber_count() == 0
+
+def test_notification_stream_requires_token(client):
+    assert client.get("/api/v1/notifications/stream").status_code == 401
+
+def test_stream_replay_pages_through_read_and_unread(db_session):
+    from sqlalchemy.orm import sessionmaker
+    from app.models.notification import Notification
+    from app.api.routes.notification import _notification_events, _missed_notifications
+
+    carer = User(name="Replay", surname="Carer", login="replay-carer")
+    patient = User(name="Replay", surname="Patient", login="replay-patient")
+    db_session.add_all([carer, patient])
+    db_session.flush()
+    rows = [Notification(user_id=carer.id, related_user_id=patient.id, type="meal_status_update",
+                         message=f"update {i}", is_read=i % 2 == 0) for i in range(6)]
+    db_session.add_all(rows)
+    db_session.commit()
+    ids = [row.id for row in rows]
+
+    async def replay():
+        queue = notification_broker.subscribe(carer.id)
+        # The first page is what the endpoint fetches before the response starts.
+        events = _notification_events(carer.id, queue, _missed_notifications(carer.id, ids[0]), ids[0])
+        try:
+            return [await events.__anext__() for _ in range(6)]
+        finally:
+            await events.aclose()
+
+    with patch("app.api.routes.notification.local_session", sessionmaker(bind=db_session.get_bind())), \
+         patch("app.api.routes.notification.NOTIFICATIONS_MAX_PAGE_SIZE", 2):
+        received = asyncio.run(replay())
+
+    assert received[0] == "retry: 3000\n\n"
+    assert [int(event.split("\n")[0][len("id: "):]) for event in received[1:]] == ids[1:]
+    assert notification_broker.subscriber_count() == 0
+
+def test_notification_feed_pages_counts_and_bulk_read(client, db_session):
+    from datetime import datetime, timedelta
+    from app.models.notification import Notification
+
+    client.post("/api/v1/users/", json={
+        "user_data": {"name": "Feed", "surname": "Carer", "login": "feed-carer"},
+        "user_auth_data": {"email": "feed@n.com", "password": "pass"}
+    })
+    token = client.post("/api/v1/auth/session", json={"email": "feed@n.com", "password": "pass"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    user_id = client.get("/api/v1/users/me", headers=headers).json()["id"]
+
+    sent_at = datetime(2025, 1, 1, 12)
+    # Two rows share a timestamp, the id breaks the tie.
+    for minutes in (0, 1, 2, 2, 3):
+        db_session.add(Notification(user_id=user_id, type="info", message=f"m{minutes}",
+                                    sent_at=sent_at + timedelta(minutes=minutes), is_read=False))
+    db_session.commit()
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/api/v1/notifications/me/page", headers=headers, params=params).json()
+        seen += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert len(seen) == 5 and len(set(seen)) == 5
+    assert client.get("/api/v1/notifications/me/unread-count", headers=headers).json() == {"unread": 5}
+
+    marked = client.post("/api/v1/notifications/me/read", headers=headers, json={"up_to_id": seen[2]}).json()
+    assert marked == {"updated": 3}
+    assert client.get("/api/v1/notifications/me/unread-count", headers=headers).json() == {"unread": 2}
+    assert client.post("/api/v1/notifications/me/read", headers=headers, json={}).json() == {"updated": 2}
+    assert client.get("/api/v1/notifications/me/page", headers=headers, params={"cursor": "bad"}).status_code == 400
+
+def test_status_bursts_are_coalesced_per_patient(db_session):
+    from app.models.care_relation import CareRelation
+    from app.models.notification import Notification
+    from sqlalchemy.orm import sessionmaker
+    from app.services.notification_dispatcher import NotificationDispatcher
+
+    carer = User(name="Digest", surname="Carer", login="digest-carer")
+    patient = User(name="Ola", surname="Patient", login="digest-patient")
+    loner = User(name="Solo", surname="Patient", login="digest-loner")
+    db_session.add_all([carer, patient, loner])
+    db_session.flush()
+    db_session.add(CareRelation(carer_id=carer.id, patient_id=patient.id))
+    db_session.commit()
+
+    dispatcher = NotificationDispatcher(window=60)
+    dispatcher.session_factory = sessionmaker(bind=db_session.get_bind())
+    dispatcher.dispatch(patient.id, "meal_status_update", 1, "eaten 'Soup'.")
+    dispatcher.dispatch(patient.id, "meal_status_update", 1, "marked as not eaten 'Soup'.")
+    dispatcher.dispatch(patient.id, "medication_status_update", 7, "taken - Apap")
+    dispatcher.dispatch(loner.id, "meal_status_update", 2, "eaten 'Toast'.")
+
+    assert asyncio.run(dispatcher.flush()) == 0
+    assert asyncio.run(dispatcher.flush(force=True)) == 1
+    assert dispatcher.pending_count() == 0
+    notifications = db_session.query(Notification).filter(Notification.user_id == carer.id).all()
+    assert len(notifications) == 1
+    assert notifications[0].type == "status_digest"
+    assert notifications[0].message == "Ola made 2 updates: marked as not eaten 'Soup'.; taken - Apap"
+
+def test_failed_flush_is_retried_then_dropped(db_session):
+    import pytest
+    from app.models.care_relation import CareRelation
+    from app.models.notification import Notification
+    from sqlalchemy.orm import sessionmaker
+    from app.services.notification_dispatcher import NotificationDispatcher
+
+    carer = User(name="Retry", surname="Carer", login="retry-carer")
+    patient = User(name="Ewa", surname="Patient", login="retry-patient")
+    db_session.add_all([carer, patient])
+    db_session.flush()
+    db_session.add(CareRelation(carer_id=carer.id, patient_id=patient.id))
+    db_session.commit()
+
+    working = sessionmaker(bind=db_session.get_bind())
+    def broken():
+        raise RuntimeError("database is down")
+
+    dispatcher = NotificationDispatcher(window=60)
+    dispatcher.session_factory = broken
+    dispatcher.dispatch(patient.id, "meal_status_update", 1, "eaten 'Soup'.")
+    with pytest.raises(RuntimeError):
+        asyncio.run(dispatcher.flush(force=True))
+    assert dispatcher.pending_count() == 1
+
+    dispatcher.dispatch(patient.id, "meal_status_update", 1, "marked as not eaten 'Soup'.")
+    dispatcher.session_factory = working
+    assert asyncio.run(dispatcher.flush(force=True)) == 1
+    notification = db_session.query(Notification).filter(Notification.user_id == carer.id).one()
+    assert notification.message == "Ewa marked as not eaten 'Soup'."
+
+    dispatcher.session_factory = broken
+    dispatcher.dispatch(patient.id, "medication_status_update", 7, "taken - Apap")
+    with patch("app.services.notification_dispatcher.NOTIFICATION_FLUSH_RETRIES", 1):
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                asyncio.run(dispatcher.flush(force=True))
+    assert dispatcher.pending_count() == 0
@@ -43,4 +43,211 @@ def test_create_dependent_and_plan(client):
     assert data["user_id"] == dependent_id
     assert data["created_by"] != dependent_id
     assert len(data["meals"]) == 3
-    assert data["meals"][0]["description"] == "Test Meal 1"
\ No newline at end of file
+    assert data["meals"][0]["description"] == "Test Meal 1"
+
+def test_generate_plan_from_local_catalog(client, db_session):
+    from app.models.recipe_catalog import CatalogRecipe
+    for recipe_id in range(500, 504):
+        db_session.add(CatalogRecipe(recipe_id=recipe_id, title=f"Catalog Breakfast {recipe_id}", dish_type="breakfast",
+                                     calories=900, protein=30, fat=20, carbohydrates=120))
+    for recipe_id in range(600, 605):
+        db_session.add(CatalogRecipe(recipe_id=recipe_id, title=f"Catalog Main {recipe_id}", dish_type="main course",
+                                     calories=900, protein=40, fat=30, carbohydrates=90))
+    db_session.commit()
+
+    client.post("/api/v1/users/", json={
+        "user_data": {"name": "Offline", "surname": "User", "login": "offline"},
+        "user_auth_data": {"email": "offline@test.com", "password": "pass"}
+    })
+    login = client.post("/api/v1/auth/session", json={"email": "offline@test.com", "password": "pass"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    user_id = client.get("/api/v1/users/me", headers=headers).json()["id"]
+
+    client.put(f"/api/v1/health-form/{user_id}", headers=headers, json={
+        "height": 180, "weight": 80, "age": 30, "gender": "male",
+        "activity_level": "moderate", "calorie_goal": "maintain",
+        "number_of_meals_per_day": 3, "medicament_usage": ""
+    })
+
+    with patch("app.services.plan.PLAN_GENERATOR_MODE", "catalog"), \
+         patch("app.services.spoonacular.Spoonacular._make_request", new_callable=AsyncMock) as mock_request:
+        plan_res = client.post("/api/v1/meals/generate?plan_date=2025-01-02", headers=headers)
+        assert mock_request.await_count == 0
+
+    assert plan_res.status_code == 200
+    meals = plan_res.json()["meals"]
+    assert len(meals) == 3
+    assert meals[0]["description"].startswith("Catalog Breakfast")
+    assert len({meal["spoonacular_recipe_id"] for meal in meals}) == 3
+
+
+def test_generate_week_plan_in_one_batch(client):
+    client.post("/api/v1/users/", json={
+        "user_data": {"name": "Weekly", "surname": "User", "login": "weekly"},
+        "user_auth_data": {"email": "weekly@test.com", "password": "pass"}
+    })
+    login = client.post("/api/v1/auth/session", json={"email": "weekly@test.com", "password": "pass"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    user_id = client.get("/api/v1/users/me", headers=headers).json()["id"]
+
+    client.put(f"/api/v1/health-form/{user_id}", headers=headers, json={
+        "height": 180, "weight": 80, "age": 30, "gender": "male",
+        "activity_level": "moderate", "calorie_goal": "maintain",
+        "number_of_meals_per_day": 3, "medicament_usage": ""
+    })
+
+    recipe_ids = iter(range(1000, 2000))
+
+    async def fake_search(endpoint, params=None):
+        return {"results": [
+            {"id": next(recipe_ids), "title": f"{params['type']} recipe", "readyInMinutes": 10, "servings": 1,
+             "sourceUrl": "http://test.com", "nutrition": {"nutrients": [{"name": "Calories", "amount": 700}]}}
+            for _ in range(params["number"])
+        ]}
+
+    with patch("app.services.spoonacular.Spoonacular._make_request", side_effect=fake_search) as mock_request:
+        res = client.post("/api/v1/meals/generate?range=week&plan_date=2025-02-03", headers=headers)
+        assert mock_request.call_count == 2
+        assert sum(c.kwargs["params"]["number"] for c in mock_request.call_args_list) == 21
+
+    assert res.status_code == 200
+    plans = res.json()
+    assert len(plans) == 7
+    assert plans[-1]["day_start"] == "2025-02-09"
+    meal_recipes = [meal["spoonacular_recipe_id"] for plan in plans for meal in plan["meals"]]
+    assert len(meal_recipes) == 21
+    assert len(set(meal_recipes)) == 21
+
+def test_dashboard_summary_counts_latest_plan(client, db_session):
+    from datetime import date, datetime, time
+    from app.models.plan import Plan
+    from app.models.meal import Meal
+    from app.models.medication import Medication
+
+    client.post("/api/v1/users/", json={
+        "user_data": {"name": "Summary", "surname": "Carer", "login": "summary"},
+        "user_auth_data": {"email": "summary@test.com", "password": "pass"}
+    })
+    token = client.post("/api/v1/auth/session", json={"email": "summary@test.com", "password": "pass"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    dependent_ids = [client.post("/api/v1/dependents/create", headers=headers, json={
+        "user_data": {"name": f"Dep{i}", "surname": "User", "login": f"summary-dep{i}"},
+        "user_auth_data": {"email": f"summary-dep{i}@test.com", "password": "pass"}
+    }).json()["id"] for i in range(2)]
+
+    older = Plan(user_id=dependent_ids[0], day_start=date.today(), created_at=datetime(2025, 1, 1, 8))
+    latest = Plan(user_id=dependent_ids[0], day_start=date.today(), created_at=datetime(2025, 1, 1, 9))
+    db_session.add_all([older, latest])
+    db_session.flush()
+    db_session.add_all([
+        Meal(plan_id=older.id, time=time(8), eaten=True),
+        Meal(plan_id=latest.id, time=time(8), eaten=True),
+        Meal(plan_id=latest.id, time=time(13), eaten=False),
+        Medication(plan_id=latest.id, time=time(8), name="Apap", taken=True),
+    ])
+    db_session.commit()
+
+    summary = client.get("/api/v1/dependents/dashboard-summary", headers=headers).json()
+    assert [s["id"] for s in summary] == dependent_ids
+    assert (summary[0]["meals_done"], summary[0]["meals_total"], summary[0]["meds_taken"], summary[0]["meds_total"]) == (1, 2, 1, 1)
+    assert summary[0]["plan_status"] == "In Progress"
+    assert summary[1]["plan_status"] == "No Plan"
+
+def test_dashboard_range_reads_rollup_kept_by_status_updates(client, db_session):
+    from datetime import date, time, timedelta
+    from app.models.plan import Plan
+    from app.models.meal import Meal
+    from app.models.daily_adherence import DailyAdherence
+    from app.models.common import MealType
+
+    client.post("/api/v1/users/", json={
+        "user_data": {"name": "Range", "surname": "Carer", "login": "range"},
+        "user_auth_data": {"email": "range@test.com", "password": "pass"}
+    })
+    token = client.post("/api/v1/auth/session", json={"email": "range@test.com", "password": "pass"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    dependent_id = client.post("/api/v1/dependents/create", headers=headers, json={
+        "user_data": {"name": "Dep", "surname": "User", "login": "range-dep"},
+        "user_auth_data": {"email": "range-dep@test.com", "password": "pass"}
+    }).json()["id"]
+
+    start = date(2025, 3, 1)
+    plan = Plan(user_id=dependent_id, day_start=start + timedelta(days=1))
+    db_session.add(plan)
+    db_session.flush()
+    meal = Meal(plan_id=plan.id, time=time(8), meal_type=MealType.breakfast, spoonacular_recipe_id=1, eaten=False)
+    db_session.add(meal)
+    db_session.commit()
+    # The requests below close db_session, read the id while the meal is still attached.
+    meal_id = meal.id
+    params = {"start": start.isoformat(), "end": (start + timedelta(days=2)).isoformat()}
+
+    live = client.get("/api/v1/dependents/dashboard-summary/range", headers=headers, params=params).json()
+    assert [day["plan_status"] for day in live] == ["No Plan", "In Progress", "No Plan"]
+
+    with patch("app.crud.daily_adherence.ADHERENCE_ROLLUP_ENABLED", True), \
+         patch("app.api.routes.dependant.ADHERENCE_ROLLUP_ENABLED", True):
+        assert client.patch(f"/api/v1/meals/{meal_id}", headers=headers, json={"eaten": True}).status_code == 200
+        rollup = db_session.query(DailyAdherence).filter(DailyAdherence.user_id == dependent_id).one()
+        assert (rollup.meals_done, rollup.meals_total) == (1, 1)
+
+        summary = client.get("/api/v1/dependents/dashboard-summary/range", headers=headers, params=params).json()
+    assert [day["plan_status"] for day in summary] == ["No Plan", "Completed", "No Plan"]
+    assert client.get("/api/v1/dependents/dashboard-summary/range", headers=headers,
+                      params={"start": "2025-03-02", "end": "2025-03-01"}).status_code == 400
+
+def test_catalog_ingest_leaves_caller_transaction_alone(db_session):
+    from app.models.user import User
+    from app.models.recipe_catalog import CatalogRecipe
+    from app.services.recipe_catalog import RecipeCatalogService
+
+    db_session.add(User(name="Pending", surname="User", login="pending"))
+    ingested = RecipeCatalogService(db_session).ingest([
+        {"id": 77, "title": "Oats", "dishTypes": ["breakfast"],
+         "nutrition": {"nutrients": [{"name": "Calories", "amount": 350}]}}
+    ])
+    db_session.rollback()
+
+    assert ingested == 1
+    assert db_session.query(CatalogRecipe).count() == 1
+    assert db_session.query(User).filter(User.login == "pending").count() == 0
+
+def test_create_plans_bulk_writes_range_in_bulk(db_session):
+    from datetime import date, time
+    from sqlalchemy import event
+    from app.crud.plans import create_plans_bulk
+    from app.models.user import User
+    from app.models.common import MealType, WithMealRelation
+    from app.schemas.plan import PlanCreate, MealCreate
+    from app.schemas.medication import MedicationCreate
+
+    user = User(name="Bulk", surname="User", login="bulk")
+    db_session.add(user)
+    db_session.commit()
+    entries = [
+        (PlanCreate(user_id=user.id, created_by=user.id, day_start=date(2025, 4, day)),
+         [MealCreate(meal_type=MealType.breakfast, time=time(8), spoonacular_recipe_id=day * 10 + n) for n in range(day)],
+         [MedicationCreate(name="Apap", time=time(9), with_meal_relation=WithMealRelation.unknown, description="")])
+        for day in (1, 2, 3)
+    ]
+
+    inserts = []
+    def count_inserts(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("INSERT"):
+            inserts.append(statement)
+    event.listen(db_session.get_bind(), "before_cursor_execute", count_inserts)
+    try:
+        created = create_plans_bulk(db_session, entries)
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", count_inserts)
+
+    if db_session.get_bind().dialect.name == "postgresql":
+        assert len(inserts) == 3
+    else:
+        # One row per INSERT: 3 plans, 1 + 2 + 3 meals, 3 medications.
+        assert len(inserts) == 12
+    assert [plan.day_start.day for plan, _, _ in created] == [1, 2, 3]
+    for plan, meals, meds in created:
+        assert len(meals) == plan.day_start.day
+        assert {meal.plan_id for meal in meals} == {plan.id}
+        assert [med.plan_id for med in meds] == [plan.id]
@@ -0,0 +1,78 @@
+from unittest.mock import AsyncMock, patch
+from app.services.recipe_cache import recipe_lru
+
+recipe_payload = {
+    "id": 4242,
+    "title": "Cached Soup",
+    "readyInMinutes": 20,
+    "servings": 2,
+    "sourceUrl": "http://test.com",
+    "extendedIngredients": [
+        {"id": 1, "aisle": "Produce", "name": "carrot", "original": "1 carrot", "amount": 1, "unit": ""}
+    ]
+}
+
+def _auth_headers(client):
+    client.post("/api/v1/users/", json={
+        "user_data": {"name": "Cook", "surname": "Test", "login": "cook"},
+        "user_auth_data": {"email": "cook@test.com", "password": "pass"}
+    })
+    token = client.post("/api/v1/auth/session", json={"email": "cook@test.com", "password": "pass"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def test_recipe_information_is_cached(client):
+    recipe_lru.clear()
+    headers = _auth_headers(client)
+
+    with patch("app.services.spoonacular.Spoonacular._make_request", new_callable=AsyncMock) as mock_request:
+        mock_request.return_value = dict(recipe_payload)
+        first = client.get("/api/v1/recipes/4242", headers=headers)
+        second = client.get("/api/v1/recipes/4242", headers=headers)
+
+        assert first.status_code == 200
+        assert second.status_code == 200
+        assert second.json()["title"] == "Cached Soup"
+        assert mock_request.await_count == 1
+
+        recipe_lru.clear()
+        third = client.get("/api/v1/recipes/4242", headers=headers)
+        assert third.status_code == 200
+        assert mock_request.await_count == 1
+
+    stats = client.get("/api/v1/recipes/cache/stats", headers=headers).json()
+    assert stats["db_hits"] >= 1
+    assert stats["db_entries"] == 1
+
+def test_recipe_cache_invalidation(client):
+    recipe_lru.clear()
+    headers = _auth_headers(client)
+
+    with patch("app.services.spoonacular.Spoonacular._make_request", new_callable=AsyncMock) as mock_request:
+        mock_request.return_value = dict(recipe_payload)
+        client.get("/api/v1/recipes/4242", headers=headers)
+        assert client.delete("/api/v1/recipes/4242/cache", headers=headers).status_code == 403
+        with patch("app.utils.jwt.ADMIN_EMAILS", {"cook@test.com"}):
+            assert client.delete("/api/v1/recipes/4242/cache", headers=headers).status_code == 204
+        client.get("/api/v1/recipes/4242", headers=headers)
+        assert mock_request.await_count == 2
+
+def test_explicit_zero_ttl_is_not_replaced_by_default():
+    from app.schemas.spoonacular import RecipeResponse
+    from app.services.recipe_cache import RecipeCacheService
+    recipe_lru.clear()
+    RecipeCacheService().put(RecipeResponse.model_validate(recipe_payload), ttl=0)
+    assert recipe_lru.get(4242) is None
+
+def test_recipe_cache_write_leaves_caller_transaction_alone(db_session):
+    from app.models.user import User
+    from app.models.recipe_cache import RecipeCache
+    from app.schemas.spoonacular import RecipeResponse
+    from app.services.recipe_cache import RecipeCacheService
+    recipe_lru.clear()
+    db_session.add(User(name="Pending", surname="User", login="pending-recipe"))
+
+    RecipeCacheService(db_session).put(RecipeResponse.model_validate(recipe_payload))
+    db_session.rollback()
+
+    assert db_session.query(RecipeCache).filter(RecipeCache.recipe_id == 4242).count() == 1
+    assert db_session.query(User).filter(User.login == "pending-recipe").count() == 0
@@ -0,0 +1,64 @@
+from datetime import date
+from unittest.mock import patch
+
+def _auth_headers(client):
+    client.post("/api/v1/users/", json={
+        "user_data": {"name": "Ops", "surname": "Test", "login": "ops"},
+        "user_auth_data": {"email": "ops@test.com", "password": "pass"}
+    })
+    token = client.post("/api/v1/auth/session", json={"email": "ops@test.com", "password": "pass"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def test_database_pool_stats(client):
+    headers = _auth_headers(client)
+    assert client.get("/api/v1/system/db/pool", headers=headers).status_code == 403
+    with patch("app.utils.jwt.ADMIN_EMAILS", {"ops@test.com"}):
+        response = client.get("/api/v1/system/db/pool", headers=headers)
+
+    assert response.status_code == 200
+    stats = response.json()["sync_engine"]
+    assert stats["size"] >= 1
+    assert stats["checked_out"] == 0
+    assert stats["avg_wait_ms"] >= 0
+
+def test_database_pool_stats_requires_auth(client):
+    assert client.get("/api/v1/system/db/pool").status_code == 401
+
+def test_pool_records_time_blocked_on_exhausted_pool():
+    import threading
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import QueuePool
+    from app.database.database import _timed_pool, _pool_waits
+
+    engine = create_engine("sqlite://", poolclass=_timed_pool("test", QueuePool), pool_size=1, max_overflow=0)
+    held = engine.connect()
+    assert _pool_waits["test"]["max_wait"] == 0.0
+
+    threading.Timer(0.2, held.close).start()
+    with engine.connect():
+        pass
+    assert _pool_waits["test"]["checkouts"] == 2
+    assert _pool_waits["test"]["max_wait"] >= 0.1
+    engine.dispose()
+
+def test_adherence_backfill_is_admin_only_and_chunked(client):
+    import time
+    headers = _auth_headers(client)
+    url = "/api/v1/system/adherence/backfill/job"
+    assert client.post(url, params={"start": "2025-01-01", "end": "2025-01-03"}, headers=headers).status_code == 403
+
+    with patch("app.utils.jwt.ADMIN_EMAILS", {"ops@test.com"}), \
+         patch("app.services.job_handlers.ADHERENCE_BACKFILL_CHUNK_DAYS", 2), \
+         patch("app.services.job_handlers.backfill_daily_adherence") as backfill:
+        assert client.post(url, params={"start": "2025-01-03", "end": "2025-01-01"}, headers=headers).status_code == 400
+        job_id = client.post(url, params={"start": "2025-01-01", "end": "2025-01-03"}, headers=headers).json()["id"]
+        for _ in range(100):
+            job = client.get(f"/api/v1/jobs/{job_id}", headers=headers).json()
+            if job["status"] not in ("queued", "running"):
+                break
+            time.sleep(0.02)
+
+    assert job["status"] == "succeeded"
+    assert [call.args[1:] for call in backfill.call_args_list] == [
+        (date(2025, 1, 1), date(2025, 1, 2)), (date(2025, 1, 3), date(2025, 1, 3))
+    ]